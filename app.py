@@ -1,390 +1,435 @@
 # app.py
 # ----------------------------- #
-# Single-file Streamlit + Models
+# Streamlit UI (models live in dealsnap/)
 # ----------------------------- #
 from __future__ import annotations
 
-import json
+import os
+import sqlite3
+import uuid
 from datetime import date
-from typing import Any, Dict, List, Optional, Union, Literal
-from enum import Enum
+from functools import partial, wraps
+from typing import Any, BinaryIO, Callable, Dict, List, Optional
 
+import pandas as pd
 import streamlit as st
-from pydantic import BaseModel, Field, ValidationError
 
-# ===========================
-# ENUMS (Dropdown Data)
-# ===========================
-class YesNo(str, Enum):
-    Yes = "Yes"
-    No = "No"
-
-class YesNoNA(str, Enum):
-    Yes = "Yes"
-    No = "No"
-    NA = "NA"
-
-class BrokerOrMRU(str, Enum):
-    Broker = "Broker"
-    MRU = "MRU"
-
-class CustomerStatus(str, Enum):
-    New = "New"
-    Existing = "Existing"  # corrected spelling
-
-class ResidentialStatus(str, Enum):
-    Aus = "Aus"
-    Overseas = "Overseas"
-
-class CitizenshipStatus(str, Enum):
-    Aus = "Aus"
-    NZ = "NZ"
-    Other = "Other"
-
-class NumberOfLoans(int, Enum):
-    One = 1
-    Two = 2
-    Three = 3
-    Four = 4
-
-class LoanProduct(str, Enum):
-    TailoredVariable = "Tailored Home Loan - Variable"
-    TailoredFixed1 = "Tailored Home Loan - 1 year fixed"
-    TailoredFixed2 = "Tailored Home Loan - 2 year fixed"
-    TailoredFixed3 = "Tailored Home Loan - 3 year fixed"
-    TailoredFixed4 = "Tailored Home Loan - 4 year fixed"
-    TailoredFixed5 = "Tailored Home Loan - 5 year fixed"
-    ChoiceVariable = "Tailored Home Loan, Choice Package - Variable"
-    ChoiceFixed1 = "Tailored Home Loan, Choice Package - 1 year fixed"
-    ChoiceFixed2 = "Tailored Home Loan, Choice Package - 2 year fixed"
-    ChoiceFixed3 = "Tailored Home Loan, Choice Package - 3 year fixed"
-    ChoiceFixed4 = "Tailored Home Loan, Choice Package - 4 year fixed"
-    ChoiceFixed5 = "Tailored Home Loan, Choice Package - 5 year fixed"
-    BaseVariable = "Base variable rate home loan"
-    Flexiplus = "Flexiplus Mortgage"
-    FlexiplusChoice = "Flexiplus Mortgage, Choice Package"
-
-# ===========================
-# Pydantic MODELS
-# (minimal set used by UI)
-# ===========================
-class ApplicationSummary(BaseModel):
-    submission_date: str = Field(..., description="ISO date string")
-    budget_surplus: Optional[float] = None
-    PAT: Optional[str] = None
-    lender_id: str
-    LVR: Optional[Union[str, float]] = None
-    broker_name: Optional[str] = None
-    broker_phone_no: Optional[str] = None
-    aggregated_lending: Optional[YesNoNA] = None
-    lmi_required: Optional[YesNo] = None
-    broker_or_MRU: Optional[BrokerOrMRU] = None
-    cas_decision: Optional[str] = None
-    government_guarantee_scheme: Optional[str] = None
-
-class LoanDetail(BaseModel):
-    loan_amount: Optional[float] = None
-    loan_type: Optional[str] = None
-    loan_product: Optional[LoanProduct] = None
-    repayment_type: Optional[str] = None
-    loan_term_years: Optional[int] = None
-    upc_code: Optional[str] = None
-    pricing_docs_attached: Optional[str] = None
-    interest_rate: Optional[float] = None
-    construction: Optional[str] = None
-
-class LoanSection(BaseModel):
-    number_of_loans: NumberOfLoans
-    loans: List[LoanDetail]
-    loan_purpose_notes: Optional[str] = None
-
-class PersonBase(BaseModel):
-    name: str
-    customer_number: Optional[str] = None
-    dob: Optional[str] = None
-    customer_status: Optional[CustomerStatus] = None
-    residential_status: Optional[ResidentialStatus] = None
-    citizenship_status: Optional[CitizenshipStatus] = None
-    number_of_dependents: Optional[int] = None
-    marital_status: Optional[str] = None
-    vevo_check_completed: Optional[YesNo] = None
-
-class Applicant(PersonBase):
-    pass
-
-class Guarantor(PersonBase):
-    pass
-
-class ApplicantSection(BaseModel):
-    number_of_applicants: int
-    number_of_guarantors: int
-    applicants: List[Applicant]
-    guarantors: List[Guarantor] = []
-    alerts_narratives_details: Optional[str] = None
-
-class IncomeLine(BaseModel):
-    applicant: str
-    income_type: Optional[str] = None
-    employment_type: Optional[str] = None
-    employment_basis: Optional[str] = None
-    employment_start_date: Optional[str] = None
-    income_docs_attached: Optional[str] = None
-    allowances: Optional[YesNo] = None
-    deductions: Optional[YesNo] = None
-    verification_for_allowances: Optional[YesNo] = None
-    flags: Optional[str] = None
-    semp_proof_of_lodgement: Optional[YesNo] = None
-    semp_broker_rationale: Optional[str] = None
-    semp_company_search_verified: Optional[YesNo] = None
-    income_frequency: Optional[str] = None
-    annual_amount: Optional[float] = None
-
-class IncomeSection(BaseModel):
-    number_of_incomes: int
-    incomes: List[IncomeLine] = []
-    income_summary: Optional[str] = None
-
-class ExpenseLine(BaseModel):
-    financial_passport_run: Optional[str] = None
-    zero_expenses_listed: Optional[str] = None
-    discrepancies: Optional[str] = None
-    commentary: Optional[str] = None
-    expense_category: Optional[str] = None
-    monthly_amount: Optional[float] = None
-
-class ExpenseSection(BaseModel):
-    number_of_households: int
-    households: List[ExpenseLine] = []
-    expenses_notes_summary: Optional[str] = None
-
-class AssetLiabilitySection(BaseModel):
-    ccr_complete: Optional[str] = None
-    refinance_payment_history_verified: Optional[str] = None
-    transaction_report_check_complete: Optional[str] = None
-    genuine_savings_type: Optional[str] = None
-    genuine_savings_docs_verified: Optional[str] = None
-    commentary: Optional[str] = None
-    existing_homeloan_repayments_validated: Optional[str] = None
-    imminent_retirement_docs_verified: Optional[str] = None
-    assets_liabilities_notes_summary: Optional[str] = None
-
-class SecurityDetail(BaseModel):
-    address: Optional[str] = None
-    property_purpose: Optional[str] = None
-    property_type: Optional[str] = None
-    transaction: Optional[str] = None
-    contract_of_sale_verified: Optional[str] = None
-    purchase_price: Optional[float] = None
-    valuation_report_verified: Optional[str] = None
-    valuation_amount: Optional[float] = None
-    valuation_risk_alerts: Optional[str] = None
-    risk_ratings: Optional[str] = None
-    title_search_verified: Optional[str] = None
-    ownership: Optional[str] = None
-    construction: Optional[str] = None
-    construction_contract_verified: Optional[str] = None
-    out_of_contract_items: Optional[str] = None
-
-class SecuritySection(BaseModel):
-    securities: List[SecurityDetail] = []
-
-class HGSBlock(BaseModel):
-    NOA_attached: Optional[YesNo] = None
-    medicare_or_PMKeys_ID_held: Optional[YesNo] = None
-    deposit_requirements_met: Optional[YesNo] = None
-    first_home_buyer: Optional[YesNo] = None
-    home_buyer_declaration_attached: Optional[YesNo] = None
-    is_property_regional: Optional[YesNo] = None
-    evidence_of_living_regionally: Optional[YesNo] = None
-    currently_own_property: Optional[YesNo] = None
-    single_parent_evidence: Optional[YesNo] = None
-    retain_savings_notes: Optional[str] = None
-    scheme_eligibility_notes: Optional[str] = None
-
-class LMIBlock(BaseModel):
-    lmi_applicable: Optional[str] = None
-    lmi_calculation: Optional[Union[str, float]] = None
-    lmi_provider: Optional[str] = None
-    existing_LMI: Optional[YesNo] = None
-    waiver_medical_practitioners_AHPRA: Optional[YesNo] = None
-    waiver_professional_services_registration: Optional[YesNo] = None
-    waiver_other_broker_notes: Optional[str] = None
-
-class DealSnapshotForm(BaseModel):
-    application_summary: ApplicationSummary
-    loan_section: LoanSection
-    applicant_section: ApplicantSection
-    income_section: IncomeSection
-    expense_section: ExpenseSection
-    asset_liability_section: AssetLiabilitySection
-    security_section: SecuritySection
-    hgs_block: Optional[HGSBlock] = None
-    lmi_block: Optional[LMIBlock] = None
+from dealsnap.models import (
+    YesNo, YesNoNA, BrokerOrMRU, LoanProduct,
+    Applicant, IncomeLine, ExpenseLine, SecurityDetail, DealSnapshotForm,
+)
+from dealsnap.csv_import import CSVImportError, read_expense_csv, read_income_csv
+from dealsnap.deal_file import DealFileError, DealRecord, find_deals, index_deals, read_deal
+from dealsnap.drafts import DraftJournal, DraftRef, snapshot_data
+from dealsnap.enrichment import Enricher, Finding, load_stubs
+from dealsnap.frequency import FREQUENCIES, annualize
+from dealsnap.fulltext import TEXT_FIELDS, SearchQueryError
+from dealsnap.grid import GridColumn, grid_columns, invalid_cells, records_from_table, table_from_prefill
+from dealsnap.helpers import enum_options, enum_from_value, option_index, format_currency, lvr_fraction, to_json_bytes
+from dealsnap.lmi import (
+    DEFAULT_TABLE_PATH as LMI_TABLE_PATH, FREE_LVR, LMIQuote, PremiumTable, entered_lvr_mismatch,
+    load_premium_table, quote_deal, with_derived_lmi,
+)
+from dealsnap.metrics import MetricsRecorder, deal_shape
+from dealsnap.policy import POLICY, Breach, check_deal
+from dealsnap.prefill import EMPTY_PREFILL, PrefillIndex, content_digest, load_prefill
+from dealsnap.repayments import GRID_TERMS, RATE_BUFFERS, loan_columns, net_position_grid
+from dealsnap.report import report_bytes
+from dealsnap.sections import SECTION_NAMES, SectionValidator, SnapshotValidationError
+from dealsnap.serialization import snapshot_to_bytes
+from dealsnap.store import DealStore, deal_id_for
+from dealsnap.summary import SubmissionSummary, summarize_submission
 
 # ===========================
 # UI Helpers
 # ===========================
-def enum_options(enum_cls):
-    return [e.value if hasattr(e, "value") else e.name for e in enum_cls]
-
-def enum_from_value(enum_cls, value):
-    if value is None or value == "":
-        return None
-    for e in enum_cls:
-        if (hasattr(e, "value") and e.value == value) or e.name == value:
-            return e
-    return None
-
-def to_json_bytes(payload: Dict[str, Any]) -> bytes:
-    return json.dumps(payload, indent=2, ensure_ascii=False).encode("utf-8")
-
 def section_header(title: str, help_text: Optional[str] = None):
     st.markdown(f"## {title}")
     if help_text:
         st.caption(help_text)
     st.divider()
 
-def format_currency(value: float) -> str:
-    return f"${value:,.2f}"
-
 def render_submission_summary(payload: DealSnapshotForm) -> None:
-    total_loans = payload.loan_section.number_of_loans
-    total_amount = sum((loan.loan_amount or 0.0) for loan in payload.loan_section.loans)
-    applicant_names = ", ".join(a.name for a in payload.applicant_section.applicants if a.name) or "n/a"
-    guarantor_count = len(payload.applicant_section.guarantors)
-    hgs_flag = "Included" if payload.hgs_block else "Not included"
-    lmi_flag = "Included" if payload.lmi_block else "Not included"
-    total_annual_income = sum((inc.annual_amount or 0.0) for inc in payload.income_section.incomes)
-    total_monthly_income = total_annual_income / 12 if total_annual_income else 0.0
-    total_monthly_expenses = sum((exp.monthly_amount or 0.0) for exp in payload.expense_section.households)
-    net_monthly_position = total_monthly_income - total_monthly_expenses
+    summary = summarize_submission(payload)
+    hgs_flag = "Included" if summary.hgs_included else "Not included"
+    lmi_flag = "Included" if summary.lmi_included else "Not included"
 
     st.markdown("### Submission at a Glance")
     col_a, col_b, col_c = st.columns(3)
     with col_a:
-        st.metric("Loans", str(total_loans))
+        st.metric("Loans", str(summary.total_loans))
     with col_b:
-        st.metric("Total Loan Amount", format_currency(total_amount))
+        st.metric("Total Loan Amount", format_currency(summary.total_amount))
     with col_c:
-        st.metric("Applicants", str(len(payload.applicant_section.applicants)))
+        st.metric("Applicants", str(summary.applicant_count))
 
-    col_d, col_e, col_f = st.columns(3)
+    col_d, col_e, col_f, col_g = st.columns(4)
     with col_d:
-        st.metric("Annual Income", format_currency(total_annual_income))
+        st.metric("Annual Income", format_currency(summary.total_annual_income))
     with col_e:
-        st.metric("Monthly Expenses", format_currency(total_monthly_expenses))
+        st.metric("Monthly Expenses", format_currency(summary.total_monthly_expenses))
     with col_f:
-        st.metric("Net Monthly Position", format_currency(net_monthly_position))
+        st.metric("Monthly Repayments", format_currency(summary.total_monthly_repayments))
+    with col_g:
+        st.metric("Net Monthly Position", format_currency(summary.net_monthly_position))
 
-    st.write(f"Primary applicants: **{applicant_names}**")
-    st.write(f"Guarantors: **{guarantor_count}**")
+    st.write(f"Primary applicants: **{summary.applicant_names}**")
+    st.write(f"Guarantors: **{summary.guarantor_count}**")
     if payload.income_section.income_summary:
         st.caption(f"Income notes: {payload.income_section.income_summary}")
     if payload.expense_section.expenses_notes_summary:
         st.caption(f"Expense notes: {payload.expense_section.expenses_notes_summary}")
     st.caption(f"HGS Block: {hgs_flag} · LMI Block: {lmi_flag}")
+    if payload.loan_section.loans:
+        render_serviceability_grid(payload, summary)
+
+def render_serviceability_grid(payload: DealSnapshotForm, summary: SubmissionSummary) -> None:
+    principal, rate, _, io = loan_columns(payload.loan_section.loans)
+    grid = net_position_grid(summary.total_monthly_income, summary.total_monthly_expenses, principal, rate, io)
+    with st.expander("Serviceability sensitivity (net monthly position)"):
+        st.caption("Each loan repriced at its rate plus a buffer over each term. Negative cells do not service.")
+        table: Dict[str, Any] = {"Rate buffer": [f"+{b:.2f}%" for b in RATE_BUFFERS]}
+        for j, term in enumerate(GRID_TERMS):
+            table[f"{term} years"] = grid[:, j]
+        st.dataframe(
+            table, hide_index=True,
+            column_config={f"{t} years": st.column_config.NumberColumn(format="dollar") for t in GRID_TERMS},
+        )
+
+def render_lmi_quote(payload: DealSnapshotForm, quote: LMIQuote, table: Optional[PremiumTable]) -> None:
+    if quote.lvr is None:
+        st.caption("LVR can't be derived: no security has a valuation or purchase price.")
+        return
+    line = (f"Derived LVR **{quote.lvr:.1%}** ({format_currency(quote.loan_total)} lending / "
+            f"{format_currency(quote.security_value)} security)")
+    if quote.premium is not None:
+        line += f" · LMI premium **{format_currency(quote.premium)}** at {quote.rate:.2f}% ({table.name})"
+    elif table is not None and quote.lvr > FREE_LVR:
+        line += f" · outside the {table.name} premium table"
+    st.write(line)
+    entered = entered_lvr_mismatch(payload, quote)
+    if entered is not None:
+        st.warning(f"Entered LVR {entered:.1%} differs from the derived {quote.lvr:.1%}.")
+
+def render_policy_breaches(breaches: List[Breach]) -> None:
+    st.markdown("### Policy Checks")
+    if not breaches:
+        st.caption(f"All {len(POLICY)} policy rules pass.")
+        return
+    for severity, show in (("error", st.error), ("warning", st.warning)):
+        found = [b for b in breaches if b.severity == severity]
+        if found:
+            show("\n".join(f"- {b.label}" for b in found))
+
+def render_enrichment(findings: Optional[List[Finding]]) -> None:
+    if findings is None:
+        st.caption("Lookups didn't finish in time; the deal was not enriched.")
+        return
+    flagged = [f for f in findings if f.status in ("not_found", "mismatch")]
+    if flagged:
+        st.warning("Lookups disagree with what was entered:\n" + "\n".join(f"- {f.label}" for f in flagged))
+    for f in findings:
+        if f.status == "error":
+            st.caption(f.label)
+    checked = [f for f in findings if f.status == "ok"]
+    if checked:
+        with st.expander(f"Lookups ({len(checked)} matched)"):
+            for f in checked:
+                st.caption(f.label)
 
 # ===========================
-# Streamlit App
+# Instrumentation
 # ===========================
-st.set_page_config(page_title="Deal Snapshot Form", layout="wide")
-st.title("Deal Snapshot – Streamlit Form (Single File)")
-
-with st.sidebar:
-    st.header("Import / Export")
-    uploaded = st.file_uploader("Load existing JSON", type=["json"])
-    prefill_data: Optional[Dict[str, Any]] = None
-    if uploaded:
-        try:
-            prefill_data = json.load(uploaded)
-            st.success("JSON loaded. Values will pre-fill where applicable.")
-        except Exception as e:
-            st.error(f"Invalid JSON: {e}")
-    st.caption("On submit, a validated JSON download will be provided.")
+# Stage timings go to one process-wide recorder; set DEALSNAP_METRICS_PROM
+# and/or DEALSNAP_METRICS_NDJSON to also write them to disk.
+@st.cache_resource(show_spinner=False)
+def metrics() -> MetricsRecorder:
+    return MetricsRecorder()
+
+def session_id() -> str:
+    # Also the draft ID autosave files this session's form under.
+    if "session_id" not in st.session_state:
+        st.session_state["session_id"] = uuid.uuid4().hex[:12]
+    return st.session_state["session_id"]
+
+def instrumented(render: Callable[[PrefillIndex], None]) -> Callable[[PrefillIndex], None]:
+    # Goes under @st.fragment, so fragment-only reruns are timed too.
+    stage = "render:" + render.__name__[len("render_"):]
+
+    @wraps(render)
+    def wrapper(prefill: PrefillIndex) -> None:
+        with metrics().stage(stage, session=session_id()):
+            render(prefill)
+        metrics().flush()
+    return wrapper
+
+def render_metrics_panel() -> None:
+    recorder = metrics()
+    summary = recorder.summary()
+    if not summary:
+        st.caption("No timings recorded yet.")
+        return
+    st.dataframe(
+        pd.DataFrame.from_dict(summary, orient="index").round(2),
+        column_config={"count": st.column_config.NumberColumn("n")},
+        width="stretch",
+    )
+    if "metrics_shape" in st.session_state:
+        st.caption("Last submit: " + ", ".join(f"{k} {v}" for k, v in st.session_state["metrics_shape"].items()))
+    st.download_button("Download metrics (Prometheus)", data=recorder.prometheus_text(),
+                       file_name="dealsnap_metrics.prom", mime="text/plain")
 
-with st.form("deal_form", clear_on_submit=False):
+# ===========================
+# Form Sections
+# ===========================
+# Each numbered section is an independently rerunnable fragment: interacting
+# with a widget reruns only that section, which stores its model kwargs in
+# session state and validates them (cached by input hash) so problems show
+# inline; the submit handler assembles the already-validated sections.
+def section_validator() -> SectionValidator:
+    if "section_validator" not in st.session_state:
+        st.session_state["section_validator"] = SectionValidator()
+    return st.session_state["section_validator"]
+
+def save_section(name: str, data: Dict[str, Any], field_errors: Optional[List[Dict[str, Any]]] = None) -> None:
+    st.session_state[f"section:{name}"] = data
+    validator = section_validator()
+    misses = validator.misses
+    with metrics().stage(f"validate:{name}", session=session_id()) as fields:
+        result = validator.validate(name, data, field_errors or ())
+        fields["cached"] = validator.misses == misses
+    autosave(name, result.digest)
+    errors = result.errors
+    if errors:
+        with st.expander(f"⚠️ {len(errors)} issue(s) in this section", expanded=len(errors) <= 3):
+            for err in errors[:50]:
+                path = ".".join(str(part + 1 if isinstance(part, int) else part) for part in err["loc"][1:])
+                st.markdown(f"- `{path}`: {err['msg']}")
+
+def load_section(name: str) -> Dict[str, Any]:
+    return st.session_state[f"section:{name}"]
+
+def autosave(name: str, digest: str) -> None:
+    # The first state seen for each section (blank or just prefilled) is the
+    # baseline; any change after it queues the whole form for the journal. The
+    # queue is in memory, the journal's own thread does the writing.
+    seen = st.session_state.setdefault("draft_digests", {})
+    previous, seen[name] = seen.get(name), digest
+    if previous is not None and previous != digest:
+        sections = {n: st.session_state[f"section:{n}"] for n in SECTION_NAMES if f"section:{n}" in st.session_state}
+        draft_journal().save(session_id(), sections)
+
+def wkey(prefill: PrefillIndex, path: str) -> str:
+    # Widget keys are the model path namespaced by the loaded file, so loading
+    # a different deal resets every widget to its new prefill value.
+    return f"{prefill.digest[:12]}:{path}"
+
+def csv_import(prefill: PrefillIndex, section: str, list_key: str,
+               reader: Callable[[bytes], List[Any]], label: str) -> PrefillIndex:
+    # Imported lines replace the section's list and come back as a prefill of
+    # their own, so the section's widgets reset to the imported values.
+    with st.expander(f"Bulk import {label} (CSV)"):
+        upload = st.file_uploader(
+            f"CSV with one {label[:-1]} per row; columns named after the form fields",
+            type=["csv"], key=f"import:{section}",
+        )
+    if upload is None:
+        return prefill
+    raw = upload.getvalue()
+    try:
+        imported = cached_import(content_digest(prefill.digest.encode() + raw), section, list_key,
+                                 _prefill=prefill, _read=upload.getvalue, _reader=reader)
+    except CSVImportError as exc:
+        st.error(f"Could not import {upload.name}:\n\n" + "\n".join(f"- {p}" for p in exc.problems[:20]))
+        return prefill
+    st.caption(f"Imported {imported.count(section + '.' + list_key)} {label} from {upload.name}.")
+    return imported
+
+GRID_ROW_PX = 35
+GRID_VISIBLE_ROWS = 10
+GRID_DTYPES = {"text": object, "select": object, "integer": "Int64", "number": "float64"}
+
+def grid_column_config(column: GridColumn):
+    if column.kind == "select":
+        return st.column_config.SelectboxColumn(column.label, options=list(column.options))
+    if column.kind == "integer":
+        return st.column_config.NumberColumn(column.label, min_value=0, step=1, format="%d")
+    if column.kind == "number":
+        return st.column_config.NumberColumn(column.label, min_value=0.0, step=0.01, format="dollar")
+    return st.column_config.TextColumn(column.label, required=column.required, validate=column.pattern)
+
+def grid_editor(prefill: PrefillIndex, path: str, columns: List[GridColumn], min_rows: int = 0) -> List[Dict[str, Any]]:
+    # One st.data_editor per repeated section instead of a widget per field per
+    # line. The grid draws only the rows in view, so widget count and rerun cost
+    # stay flat however many lines a deal has.
+    table = table_from_prefill(prefill, path, columns, min_rows)
+    # Explicit dtypes, so empty or all-blank columns still edit as their field type.
+    frame = pd.DataFrame({c.name: pd.Series(table[c.name], dtype=GRID_DTYPES[c.kind]) for c in columns})
+    visible = min(max(len(frame), 3), GRID_VISIBLE_ROWS) + 2
+    edited = st.data_editor(
+        frame, key=wkey(prefill, path), num_rows="dynamic", hide_index=True, width="stretch",
+        height=visible * GRID_ROW_PX, column_config={c.name: grid_column_config(c) for c in columns},
+    )
+    records = records_from_table(edited.astype(object).where(edited.notna(), None).to_dict("list"), columns)
+    problems = invalid_cells(records, columns)
+    if problems:
+        st.warning("Expected YYYY-MM-DD dates: " + ", ".join(problems[:10]))
+    return records
+
+PERSON_COLUMNS = grid_columns(Applicant, labels={
+    "dob": "DOB (YYYY-MM-DD)", "number_of_dependents": "# dependents", "vevo_check_completed": "VEVO check completed",
+})
+INCOME_COLUMNS = grid_columns(IncomeLine, options={"income_frequency": FREQUENCIES}, labels={
+    "employment_start_date": "Employment start date (YYYY-MM-DD)", "flags": "Flags / notes",
+    "semp_proof_of_lodgement": "SEMP proof of lodgement", "semp_broker_rationale": "SEMP broker rationale",
+    "semp_company_search_verified": "SEMP company search verified", "annual_amount": "Amount (AUD, per frequency)",
+})
+EXPENSE_COLUMNS = grid_columns(ExpenseLine, labels={
+    "zero_expenses_listed": "SO responses/zero expenses listed", "commentary": "Commentary related to flags",
+    "monthly_amount": "Monthly amount (AUD)",
+})
+SECURITY_COLUMNS = grid_columns(SecurityDetail)
+
+@st.fragment
+@instrumented
+def render_application_summary(prefill: PrefillIndex) -> None:
     # 1) Application Summary
+    p = "application_summary."
     section_header("1. Application Summary")
     col1, col2, col3, col4 = st.columns(4)
     with col1:
         submission_date = st.text_input(
             "Submission date (ISO)",
-            value=(prefill_data or {}).get("application_summary", {}).get("submission_date", str(date.today()))
+            value=prefill.get_str(p + "submission_date", str(date.today())),
+            key=wkey(prefill, p + "submission_date"),
         )
     with col2:
         budget_surplus = st.number_input(
-            "Budget surplus", value=float((prefill_data or {}).get("application_summary", {}).get("budget_surplus", 0.0)),
-            step=0.01, format="%.2f"
+            "Budget surplus", value=prefill.get_float(p + "budget_surplus"),
+            step=0.01, format="%.2f", key=wkey(prefill, p + "budget_surplus"),
         )
     with col3:
-        pat = st.text_input("PAT", value=(prefill_data or {}).get("application_summary", {}).get("PAT", "") )
+        pat = st.text_input("PAT", value=prefill.get_str(p + "PAT"), key=wkey(prefill, p + "PAT"))
     with col4:
-        lender_id = st.text_input("Lender ID", value=(prefill_data or {}).get("application_summary", {}).get("lender_id", "") )
+        lender_id = st.text_input("Lender ID", value=prefill.get_str(p + "lender_id"), key=wkey(prefill, p + "lender_id"))
 
     col5, col6, col7, col8 = st.columns(4)
     with col5:
-        lvr_raw = (prefill_data or {}).get("application_summary", {}).get("LVR", "")
-        lvr = st.text_input("LVR (e.g., 0.8 or '80%')", value=str(lvr_raw or ""))
+        lvr = st.text_input("LVR (e.g., 0.8 or '80%')", value=prefill.get_str(p + "LVR"), key=wkey(prefill, p + "LVR"),
+                            help="Leave blank to derive it from the loan amounts and security values on submit.")
     with col6:
-        broker_name = st.text_input("Broker name", value=(prefill_data or {}).get("application_summary", {}).get("broker_name", ""))
+        broker_name = st.text_input("Broker name", value=prefill.get_str(p + "broker_name"), key=wkey(prefill, p + "broker_name"))
     with col7:
-        broker_phone_no = st.text_input("Broker phone no.", value=(prefill_data or {}).get("application_summary", {}).get("broker_phone_no", ""))
+        broker_phone_no = st.text_input(
+            "Broker phone no.", value=prefill.get_str(p + "broker_phone_no"), key=wkey(prefill, p + "broker_phone_no")
+        )
     with col8:
         lm_required = st.selectbox(
             "LMI required", enum_options(YesNo),
-            index=1 if not (prefill_data or {}).get("application_summary") else
-            enum_options(YesNo).index((prefill_data or {}).get("application_summary", {}).get("lmi_required", "No"))
+            index=option_index(enum_options(YesNo), prefill.get(p + "lmi_required"), 1),
+            key=wkey(prefill, p + "lmi_required"),
         )
 
     col9, col10, col11, col12 = st.columns(4)
     with col9:
         aggregated_lending = st.selectbox(
             "Aggregated lending", enum_options(YesNoNA),
-            index=2 if not (prefill_data or {}).get("application_summary") else
-            enum_options(YesNoNA).index((prefill_data or {}).get("application_summary", {}).get("aggregated_lending", "NA"))
+            index=option_index(enum_options(YesNoNA), prefill.get(p + "aggregated_lending"), 2),
+            key=wkey(prefill, p + "aggregated_lending"),
         )
     with col10:
         broker_or_mru = st.selectbox(
             "Broker or MRU", enum_options(BrokerOrMRU),
-            index=0 if not (prefill_data or {}).get("application_summary") else
-            enum_options(BrokerOrMRU).index((prefill_data or {}).get("application_summary", {}).get("broker_or_MRU", "Broker"))
+            index=option_index(enum_options(BrokerOrMRU), prefill.get(p + "broker_or_MRU"), 0),
+            key=wkey(prefill, p + "broker_or_MRU"),
         )
     with col11:
-        cas_decision = st.text_input("CAS decision", value=(prefill_data or {}).get("application_summary", {}).get("cas_decision", ""))
+        cas_decision = st.text_input("CAS decision", value=prefill.get_str(p + "cas_decision"), key=wkey(prefill, p + "cas_decision"))
     with col12:
         government_guarantee_scheme = st.text_input(
             "Government guarantee scheme",
-            value=(prefill_data or {}).get("application_summary", {}).get("government_guarantee_scheme", "")
+            value=prefill.get_str(p + "government_guarantee_scheme"),
+            key=wkey(prefill, p + "government_guarantee_scheme"),
         )
-
+    # An LVR that reads as neither a fraction nor a percentage is a section
+    # error, so the deal can't be submitted with it.
+    lvr_errors = []
+    try:
+        lvr = lvr_fraction(lvr)
+    except ValueError as e:
+        lvr_errors.append({"type": "value_error", "loc": ("application_summary", "LVR"), "msg": str(e)})
+    save_section("application_summary", dict(
+        submission_date=submission_date,
+        budget_surplus=budget_surplus,
+        PAT=pat,
+        lender_id=lender_id,
+        LVR=lvr,
+        broker_name=broker_name,
+        broker_phone_no=broker_phone_no,
+        aggregated_lending=enum_from_value(YesNoNA, aggregated_lending),
+        lmi_required=enum_from_value(YesNo, lm_required),
+        broker_or_MRU=enum_from_value(BrokerOrMRU, broker_or_mru),
+        cas_decision=cas_decision,
+        government_guarantee_scheme=government_guarantee_scheme,
+    ), lvr_errors)
+
+@st.fragment
+@instrumented
+def render_loan_section(prefill: PrefillIndex) -> None:
     # 2) Loan Section
+    p = "loan_section."
     section_header("2. Loan Section")
-    num_loans_default = int((prefill_data or {}).get("loan_section", {}).get("number_of_loans", 1))
-    number_of_loans = st.select_slider("Number of loans", options=[1, 2, 3, 4], value=num_loans_default)
+    num_loans_default = prefill.get_int(p + "number_of_loans", prefill.count(p + "loans", 1))
+    number_of_loans = st.select_slider(
+        "Number of loans", options=[1, 2, 3, 4], value=min(max(num_loans_default, 1), 4),
+        key=wkey(prefill, p + "number_of_loans"),
+    )
 
     loan_details: List[Dict[str, Any]] = []
     for i in range(number_of_loans):
+        base = f"{p}loans.{i}."
         st.markdown(f"**Loan {i+1}**")
         c1, c2, c3, c4 = st.columns(4)
         with c1:
-            loan_amount = st.number_input(f"Loan {i+1} amount", min_value=0.0, step=1000.0, value=0.0)
+            loan_amount = st.number_input(
+                f"Loan {i+1} amount", min_value=0.0, step=1000.0,
+                value=prefill.get_float(base + "loan_amount"), key=wkey(prefill, base + "loan_amount"),
+            )
         with c2:
-            loan_type = st.text_input(f"Loan {i+1} type", value="")
+            loan_type = st.text_input(f"Loan {i+1} type", value=prefill.get_str(base + "loan_type"), key=wkey(prefill, base + "loan_type"))
         with c3:
-            loan_product = st.selectbox(f"Loan {i+1} product", enum_options(LoanProduct), index=0, key=f"lp_{i}")
+            loan_product = st.selectbox(
+                f"Loan {i+1} product", enum_options(LoanProduct),
+                index=option_index(enum_options(LoanProduct), prefill.get(base + "loan_product"), 0),
+                key=wkey(prefill, base + "loan_product"),
+            )
         with c4:
-            repayment_type = st.text_input(f"Loan {i+1} repayment type", value="")
+            repayment_type = st.text_input(
+                f"Loan {i+1} repayment type", value=prefill.get_str(base + "repayment_type"),
+                key=wkey(prefill, base + "repayment_type"),
+            )
         c5, c6, c7, c8 = st.columns(4)
         with c5:
-            loan_term_years = st.number_input(f"Loan {i+1} term (years)", min_value=0, step=1, value=30)
+            loan_term_years = st.number_input(
+                f"Loan {i+1} term (years)", min_value=0, step=1,
+                value=prefill.get_int(base + "loan_term_years", 30), key=wkey(prefill, base + "loan_term_years"),
+            )
         with c6:
-            upc_code = st.text_input(f"Loan {i+1} UPC code", value="")
+            upc_code = st.text_input(f"Loan {i+1} UPC code", value=prefill.get_str(base + "upc_code"), key=wkey(prefill, base + "upc_code"))
         with c7:
-            pricing_docs = st.text_input(f"Loan {i+1} pricing docs attached", value="")
+            pricing_docs = st.text_input(
+                f"Loan {i+1} pricing docs attached", value=prefill.get_str(base + "pricing_docs_attached"),
+                key=wkey(prefill, base + "pricing_docs_attached"),
+            )
         with c8:
-            interest_rate = st.number_input(f"Loan {i+1} interest rate (%)", min_value=0.0, step=0.01, value=0.0)
+            interest_rate = st.number_input(
+                f"Loan {i+1} interest rate (%)", min_value=0.0, step=0.01,
+                value=prefill.get_float(base + "interest_rate"), key=wkey(prefill, base + "interest_rate"),
+            )
 
-        construction = st.text_input(f"Loan {i+1} construction", value="")
+        construction = st.text_input(
+            f"Loan {i+1} construction", value=prefill.get_str(base + "construction"), key=wkey(prefill, base + "construction")
+        )
         loan_details.append(dict(
             loan_amount=loan_amount,
             loan_type=loan_type,
@@ -397,458 +442,476 @@ with st.form("deal_form", clear_on_submit=False):
             construction=construction,
         ))
 
-    loan_purpose_notes = st.text_area("Loan purpose / broker notes", value="")
-
+    loan_purpose_notes = st.text_area(
+        "Loan purpose / broker notes", value=prefill.get_str(p + "loan_purpose_notes"),
+        key=wkey(prefill, p + "loan_purpose_notes"),
+    )
+    save_section("loan_section", dict(
+        number_of_loans=number_of_loans,
+        loans=loan_details,
+        loan_purpose_notes=loan_purpose_notes,
+    ))
+
+@st.fragment
+@instrumented
+def render_applicant_section(prefill: PrefillIndex) -> None:
     # 3) Applicant & Guarantor
-    section_header("3. Applicant & Guarantor Details")
-    num_applicants = st.number_input("Number of applicants", min_value=1, step=1, value=1)
-    num_guarantors = st.number_input("Number of guarantors", min_value=0, step=1, value=0)
-
-    applicants_payload: List[Dict[str, Any]] = []
-    for i in range(num_applicants):
-        st.markdown(f"**Applicant {i+1}**")
-        c1, c2, c3 = st.columns(3)
-        with c1:
-            name = st.text_input(f"Applicant {i+1} name")
-        with c2:
-            dob = st.text_input(f"Applicant {i+1} DOB (YYYY-MM-DD)")
-        with c3:
-            customer_number = st.text_input(f"Applicant {i+1} customer number")
-        c4, c5, c6 = st.columns(3)
-        with c4:
-            customer_status = st.selectbox(f"Applicant {i+1} customer status", enum_options(CustomerStatus), index=0, key=f"cs_{i}")
-        with c5:
-            residential_status = st.selectbox(f"Applicant {i+1} residential status", enum_options(ResidentialStatus), index=0, key=f"rs_{i}")
-        with c6:
-            citizenship_status = st.selectbox(f"Applicant {i+1} citizenship status", enum_options(CitizenshipStatus), index=0, key=f"ct_{i}")
-        c7, c8, c9 = st.columns(3)
-        with c7:
-            dependents = st.number_input(f"Applicant {i+1} # dependents", min_value=0, step=1, value=0)
-        with c8:
-            marital_status = st.text_input(f"Applicant {i+1} marital status")
-        with c9:
-            vevo_check = st.selectbox(f"Applicant {i+1} VEVO check completed", enum_options(YesNo), index=1, key=f"vv_{i}")
-
-        applicants_payload.append(dict(
-            name=name, dob=dob, customer_number=customer_number,
-            customer_status=enum_from_value(CustomerStatus, customer_status),
-            residential_status=enum_from_value(ResidentialStatus, residential_status),
-            citizenship_status=enum_from_value(CitizenshipStatus, citizenship_status),
-            number_of_dependents=int(dependents),
-            marital_status=marital_status,
-            vevo_check_completed=enum_from_value(YesNo, vevo_check),
-        ))
-
-    guarantors_payload: List[Dict[str, Any]] = []
-    for i in range(num_guarantors):
-        st.markdown(f"**Guarantor {i+1}**")
-        gname = st.text_input(f"Guarantor {i+1} name")
-        gdob = st.text_input(f"Guarantor {i+1} DOB (YYYY-MM-DD)")
-        gnum = st.text_input(f"Guarantor {i+1} customer number")
-        guarantors_payload.append(dict(name=gname, dob=gdob, customer_number=gnum))
-
-    alerts_narratives = st.text_area("Alerts / narrative details", value="")
-
+    p = "applicant_section."
+    section_header("3. Applicant & Guarantor Details", "Add or remove rows at the bottom of each table.")
+    st.markdown("**Applicants**")
+    applicants_payload = grid_editor(prefill, p + "applicants", PERSON_COLUMNS, min_rows=1)
+    st.markdown("**Guarantors**")
+    guarantors_payload = grid_editor(prefill, p + "guarantors", PERSON_COLUMNS)
+    alerts_narratives = st.text_area(
+        "Alerts / narrative details", value=prefill.get_str(p + "alerts_narratives_details"),
+        key=wkey(prefill, p + "alerts_narratives_details"),
+    )
+    save_section("applicant_section", dict(
+        number_of_applicants=len(applicants_payload),
+        number_of_guarantors=len(guarantors_payload),
+        applicants=applicants_payload,
+        guarantors=guarantors_payload,
+        alerts_narratives_details=alerts_narratives,
+    ))
+
+@st.fragment
+@instrumented
+def render_income_section(prefill: PrefillIndex) -> None:
     # 4) Income
-    section_header("4. Income")
-    prefill_incomes = (prefill_data or {}).get("income_section", {}).get("incomes", [])
-    num_incomes_default = len(prefill_incomes)
-    num_incomes = int(
-        st.number_input(
-            "Number of income lines",
-            min_value=0,
-            step=1,
-            value=num_incomes_default
-        )
+    p = "income_section."
+    section_header("4. Income", "Amounts are per the line's frequency; totals are annualized.")
+    prefill = csv_import(prefill, "income_section", "incomes", read_income_csv, "income lines")
+    incomes_payload = grid_editor(prefill, p + "incomes", INCOME_COLUMNS)
+    if incomes_payload:
+        annual = annualize([i["annual_amount"] for i in incomes_payload], [i["income_frequency"] for i in incomes_payload])
+        st.caption(f"Annualized income: {format_currency(float(annual.sum()))} ({format_currency(float(annual.sum()) / 12)} / month)")
+    income_summary = st.text_area(
+        "Income summary", value=prefill.get_str(p + "income_summary"), key=wkey(prefill, p + "income_summary")
     )
-    incomes_payload: List[Dict[str, Any]] = []
-    for i in range(num_incomes):
-        existing_income = prefill_incomes[i] if i < len(prefill_incomes) else {}
-        st.markdown(f"**Income line {i+1}**")
-        c1, c2, c3, c4 = st.columns(4)
-        with c1:
-            applicant_name = st.text_input(
-                f"Income {i+1} – applicant",
-                value=existing_income.get("applicant", "")
-            )
-        with c2:
-            income_type = st.text_input(
-                f"Income {i+1} – income type",
-                value=existing_income.get("income_type", "")
-            )
-        with c3:
-            employment_type = st.text_input(
-                f"Income {i+1} – employment type",
-                value=existing_income.get("employment_type", "")
-            )
-        with c4:
-            employment_basis = st.text_input(
-                f"Income {i+1} – employment basis",
-                value=existing_income.get("employment_basis", "")
-            )
-        c5, c6, c7, c8 = st.columns(4)
-        with c5:
-            start_date = st.text_input(
-                f"Income {i+1} – employment start date (YYYY-MM-DD)",
-                value=existing_income.get("employment_start_date", "")
-            )
-        with c6:
-            docs_attached = st.text_input(
-                f"Income {i+1} – income docs attached",
-                value=existing_income.get("income_docs_attached", "")
-            )
-        with c7:
-            allowances_options = enum_options(YesNo)
-            allowances_default = existing_income.get("allowances", "No")
-            allowances_index = allowances_options.index(allowances_default) if allowances_default in allowances_options else 1
-            allowances = st.selectbox(
-                f"Income {i+1} – allowances",
-                allowances_options,
-                index=allowances_index,
-                key=f"al_{i}"
-            )
-        with c8:
-            deductions_options = enum_options(YesNo)
-            deductions_default = existing_income.get("deductions", "No")
-            deductions_index = deductions_options.index(deductions_default) if deductions_default in deductions_options else 1
-            deductions = st.selectbox(
-                f"Income {i+1} – deductions",
-                deductions_options,
-                index=deductions_index,
-                key=f"de_{i}"
-            )
-        c9, c10, c11 = st.columns(3)
-        with c9:
-            verify_options = enum_options(YesNo)
-            verify_default = existing_income.get("verification_for_allowances", "No")
-            verify_index = verify_options.index(verify_default) if verify_default in verify_options else 1
-            verify_allow = st.selectbox(
-                f"Income {i+1} – verification for allowances",
-                verify_options,
-                index=verify_index,
-                key=f"va_{i}"
-            )
-        with c10:
-            proof_options = enum_options(YesNo)
-            proof_default = existing_income.get("semp_proof_of_lodgement", "No")
-            proof_index = proof_options.index(proof_default) if proof_default in proof_options else 1
-            proof_lodgement = st.selectbox(
-                f"Income {i+1} – SEMP proof of lodgement",
-                proof_options,
-                index=proof_index,
-                key=f"pl_{i}"
-            )
-        with c11:
-            company_options = enum_options(YesNo)
-            company_default = existing_income.get("semp_company_search_verified", "No")
-            company_index = company_options.index(company_default) if company_default in company_options else 1
-            company_search = st.selectbox(
-                f"Income {i+1} – SEMP company search verified",
-                company_options,
-                index=company_index,
-                key=f"csx_{i}"
-            )
-        flags = st.text_input(
-            f"Income {i+1} – flags / notes",
-            value=existing_income.get("flags", "")
-        )
-        broker_rationale = st.text_input(
-            f"Income {i+1} – SEMP broker rationale",
-            value=existing_income.get("semp_broker_rationale", "")
-        )
-        c12, c13 = st.columns(2)
-        with c12:
-            annual_amount = st.number_input(
-                f"Income {i+1} – annual amount (AUD)",
-                min_value=0.0,
-                step=1000.0,
-                value=float(existing_income.get("annual_amount", 0.0))
-            )
-        with c13:
-            frequency_options = ["Annual", "Monthly", "Fortnightly", "Weekly"]
-            freq_default = existing_income.get("income_frequency", "Annual")
-            freq_index = frequency_options.index(freq_default) if freq_default in frequency_options else 0
-            income_frequency = st.selectbox(
-                f"Income {i+1} – income frequency",
-                frequency_options,
-                index=freq_index,
-                key=f"freq_{i}"
-            )
-        incomes_payload.append(dict(
-            applicant=applicant_name,
-            income_type=income_type,
-            employment_type=employment_type,
-            employment_basis=employment_basis,
-            employment_start_date=start_date,
-            income_docs_attached=docs_attached,
-            allowances=enum_from_value(YesNo, allowances),
-            deductions=enum_from_value(YesNo, deductions),
-            verification_for_allowances=enum_from_value(YesNo, verify_allow),
-            flags=flags,
-            semp_proof_of_lodgement=enum_from_value(YesNo, proof_lodgement),
-            semp_broker_rationale=broker_rationale,
-            semp_company_search_verified=enum_from_value(YesNo, company_search),
-            income_frequency=income_frequency,
-            annual_amount=annual_amount,
-        ))
-    income_summary_default = (prefill_data or {}).get("income_section", {}).get("income_summary", "")
-    income_summary = st.text_area("Income summary", value=income_summary_default)
-
+    save_section("income_section", dict(
+        number_of_incomes=len(incomes_payload),
+        incomes=incomes_payload,
+        income_summary=income_summary,
+    ))
+
+@st.fragment
+@instrumented
+def render_expense_section(prefill: PrefillIndex) -> None:
     # 5) Expenses
+    p = "expense_section."
     section_header("5. Expenses")
-    prefill_expenses = (prefill_data or {}).get("expense_section", {}).get("households", [])
-    num_expenses_default = len(prefill_expenses)
-    num_households = int(
-        st.number_input(
-            "Number of households (expense lines)",
-            min_value=0,
-            step=1,
-            value=num_expenses_default
-        )
+    prefill = csv_import(prefill, "expense_section", "households", read_expense_csv, "expense lines")
+    expenses_payload = grid_editor(prefill, p + "households", EXPENSE_COLUMNS)
+    expenses_summary = st.text_area(
+        "Expenses notes summary", value=prefill.get_str(p + "expenses_notes_summary"),
+        key=wkey(prefill, p + "expenses_notes_summary"),
     )
-    expenses_payload: List[Dict[str, Any]] = []
-    for i in range(num_households):
-        existing_expense = prefill_expenses[i] if i < len(prefill_expenses) else {}
-        st.markdown(f"**Expense line {i+1}**")
-        c1, c2, c3, c4 = st.columns(4)
-        with c1:
-            fin_passport = st.text_input(
-                f"Household {i+1} – financial passport run",
-                value=existing_expense.get("financial_passport_run", "")
-            )
-        with c2:
-            zero_listed = st.text_input(
-                f"Household {i+1} – SO responses/zero expenses listed",
-                value=existing_expense.get("zero_expenses_listed", "")
-            )
-        with c3:
-            discrepancies = st.text_input(
-                f"Household {i+1} – discrepancies",
-                value=existing_expense.get("discrepancies", "")
-            )
-        with c4:
-            expense_category = st.text_input(
-                f"Household {i+1} – expense category",
-                value=existing_expense.get("expense_category", "")
-            )
-        c5, c6 = st.columns(2)
-        with c5:
-            commentary = st.text_input(
-                f"Household {i+1} – commentary related to flags",
-                value=existing_expense.get("commentary", "")
-            )
-        with c6:
-            monthly_amount = st.number_input(
-                f"Household {i+1} – monthly amount (AUD)",
-                min_value=0.0,
-                step=100.0,
-                value=float(existing_expense.get("monthly_amount", 0.0))
-            )
-        expenses_payload.append(dict(
-            financial_passport_run=fin_passport,
-            zero_expenses_listed=zero_listed,
-            discrepancies=discrepancies,
-            commentary=commentary,
-            expense_category=expense_category,
-            monthly_amount=monthly_amount,
-        ))
-    expenses_summary_default = (prefill_data or {}).get("expense_section", {}).get("expenses_notes_summary", "")
-    expenses_summary = st.text_area("Expenses notes summary", value=expenses_summary_default)
-
+    save_section("expense_section", dict(
+        number_of_households=len(expenses_payload),
+        households=expenses_payload,
+        expenses_notes_summary=expenses_summary,
+    ))
+
+@st.fragment
+@instrumented
+def render_asset_liability_section(prefill: PrefillIndex) -> None:
     # 6) Assets & Liabilities
+    p = "asset_liability_section."
+
+    def field(label: str, name: str) -> str:
+        return st.text_input(label, value=prefill.get_str(p + name), key=wkey(prefill, p + name))
+
     section_header("6. Assets & Liabilities")
     colA, colB, colC = st.columns(3)
     with colA:
-        ccr_complete = st.text_input("CCR complete")
-        refinance_hist = st.text_input("If refinance, payment history verified")
-        txn_report = st.text_input("Customer transaction report check complete")
+        ccr_complete = field("CCR complete", "ccr_complete")
+        refinance_hist = field("If refinance, payment history verified", "refinance_payment_history_verified")
+        txn_report = field("Customer transaction report check complete", "transaction_report_check_complete")
     with colB:
-        genuine_savings_type = st.text_input("Genuine savings type")
-        genuine_savings_docs = st.text_input("Genuine savings documents attached & verified")
-        commentary_al = st.text_input("Commentary related to flags")
+        genuine_savings_type = field("Genuine savings type", "genuine_savings_type")
+        genuine_savings_docs = field("Genuine savings documents attached & verified", "genuine_savings_docs_verified")
+        commentary_al = field("Commentary related to flags", "commentary")
     with colC:
-        repayments_validated = st.text_input("Existing home loan repayments validated")
-        retire_docs = st.text_input("Imminent retirement/exit strategy docs attached & verified")
-    al_summary = st.text_area("Assets/Liabilities Notes Summary", value="")
-
+        repayments_validated = field("Existing home loan repayments validated", "existing_homeloan_repayments_validated")
+        retire_docs = field("Imminent retirement/exit strategy docs attached & verified", "imminent_retirement_docs_verified")
+    al_summary = st.text_area(
+        "Assets/Liabilities Notes Summary", value=prefill.get_str(p + "assets_liabilities_notes_summary"),
+        key=wkey(prefill, p + "assets_liabilities_notes_summary"),
+    )
+    save_section("asset_liability_section", dict(
+        ccr_complete=ccr_complete,
+        refinance_payment_history_verified=refinance_hist,
+        transaction_report_check_complete=txn_report,
+        genuine_savings_type=genuine_savings_type,
+        genuine_savings_docs_verified=genuine_savings_docs,
+        commentary=commentary_al,
+        existing_homeloan_repayments_validated=repayments_validated,
+        imminent_retirement_docs_verified=retire_docs,
+        assets_liabilities_notes_summary=al_summary,
+    ))
+
+@st.fragment
+@instrumented
+def render_security_section(prefill: PrefillIndex) -> None:
     # 7) Security Details
+    p = "security_section."
     section_header("7. Security Details")
-    securities_count = st.number_input("Number of securities", min_value=0, step=1, value=0)
-    securities_payload: List[Dict[str, Any]] = []
-    for i in range(securities_count):
-        st.markdown(f"**Security {i+1}**")
-        c1, c2, c3, c4 = st.columns(4)
-        with c1:
-            address = st.text_input(f"Security {i+1} – address")
-        with c2:
-            property_purpose = st.text_input(f"Security {i+1} – property purpose")
-        with c3:
-            property_type = st.text_input(f"Security {i+1} – property type")
-        with c4:
-            transaction = st.text_input(f"Security {i+1} – transaction")
-        c5, c6, c7, c8 = st.columns(4)
-        with c5:
-            cos_verified = st.text_input(f"Security {i+1} – contract of sale verified")
-        with c6:
-            purchase_price = st.number_input(f"Security {i+1} – purchase price", min_value=0.0, step=1000.0, value=0.0)
-        with c7:
-            val_verified = st.text_input(f"Security {i+1} – valuation report verified")
-        with c8:
-            valuation_amount = st.number_input(f"Security {i+1} – valuation amount", min_value=0.0, step=1000.0, value=0.0)
-        risk_alerts = st.text_input(f"Security {i+1} – valuation risk alerts")
-        risk_ratings = st.text_input(f"Security {i+1} – risk ratings")
-        title_search = st.text_input(f"Security {i+1} – title search verified")
-        ownership = st.text_input(f"Security {i+1} – ownership")
-        construction = st.text_input(f"Security {i+1} – construction")
-        cc_verified = st.text_input(f"Security {i+1} – construction contract verified")
-        out_of_contract_items = st.text_input(f"Security {i+1} – out of contract items")
-        securities_payload.append(dict(
-            address=address, property_purpose=property_purpose, property_type=property_type,
-            transaction=transaction, contract_of_sale_verified=cos_verified,
-            purchase_price=purchase_price, valuation_report_verified=val_verified,
-            valuation_amount=valuation_amount, valuation_risk_alerts=risk_alerts,
-            risk_ratings=risk_ratings, title_search_verified=title_search, ownership=ownership,
-            construction=construction, construction_contract_verified=cc_verified,
-            out_of_contract_items=out_of_contract_items,
-        ))
+    securities_payload = grid_editor(prefill, p + "securities", SECURITY_COLUMNS)
+    save_section("security_section", dict(securities=securities_payload))
 
+@st.fragment
+@instrumented
+def render_conditional_blocks(prefill: PrefillIndex) -> None:
     # 8) Conditional Blocks
     section_header("8. Conditional Blocks")
+    yes_no = enum_options(YesNo)
+
+    def yes_no_field(label: str, path: str) -> Optional[YesNo]:
+        value = st.selectbox(label, yes_no, index=option_index(yes_no, prefill.get(path), 1), key=wkey(prefill, path))
+        return enum_from_value(YesNo, value)
+
+    def text_field(label: str, path: str) -> str:
+        return st.text_input(label, value=prefill.get_str(path), key=wkey(prefill, path))
+
     colh1, colh2 = st.columns(2)
     with colh1:
-        hgs_enabled = st.checkbox("Include HGS Block", value=False)
+        hgs_enabled = st.checkbox("Include HGS Block", value=prefill.has("hgs_block"), key=wkey(prefill, "hgs_block"))
     with colh2:
-        lmi_enabled = st.checkbox("Include LMI Block", value=False)
+        lmi_enabled = st.checkbox("Include LMI Block", value=prefill.has("lmi_block"), key=wkey(prefill, "lmi_block"))
 
     hgs_payload = None
     if hgs_enabled:
+        p = "hgs_block."
         st.markdown("**Home Guarantee Scheme (HGS)**")
         h1, h2, h3, h4 = st.columns(4)
         with h1:
-            noa_attached = st.selectbox("NOA attached", enum_options(YesNo), index=1)
-            fhb = st.selectbox("First home buyer", enum_options(YesNo), index=1)
-            buyer_decl = st.selectbox("Home buyer declaration attached", enum_options(YesNo), index=1)
+            noa_attached = yes_no_field("NOA attached", p + "NOA_attached")
+            fhb = yes_no_field("First home buyer", p + "first_home_buyer")
+            buyer_decl = yes_no_field("Home buyer declaration attached", p + "home_buyer_declaration_attached")
         with h2:
-            id_held = st.selectbox("Medicare/PMKeys ID held", enum_options(YesNo), index=1)
-            regional = st.selectbox("Is property regional?", enum_options(YesNo), index=1)
-            evidence_reg = st.selectbox("Evidence of living regionally", enum_options(YesNo), index=1)
+            id_held = yes_no_field("Medicare/PMKeys ID held", p + "medicare_or_PMKeys_ID_held")
+            regional = yes_no_field("Is property regional?", p + "is_property_regional")
+            evidence_reg = yes_no_field("Evidence of living regionally", p + "evidence_of_living_regionally")
         with h3:
-            deposit_met = st.selectbox("Deposit requirements met", enum_options(YesNo), index=1)
-            own_property = st.selectbox("Currently own property", enum_options(YesNo), index=1)
-            single_parent_ev = st.selectbox("Single parent evidence", enum_options(YesNo), index=1)
+            deposit_met = yes_no_field("Deposit requirements met", p + "deposit_requirements_met")
+            own_property = yes_no_field("Currently own property", p + "currently_own_property")
+            single_parent_ev = yes_no_field("Single parent evidence", p + "single_parent_evidence")
         with h4:
-            retain_notes = st.text_input("Retain savings notes")
-            scheme_notes = st.text_input("Scheme eligibility notes")
+            retain_notes = text_field("Retain savings notes", p + "retain_savings_notes")
+            scheme_notes = text_field("Scheme eligibility notes", p + "scheme_eligibility_notes")
         hgs_payload = dict(
-            NOA_attached=enum_from_value(YesNo, noa_attached),
-            medicare_or_PMKeys_ID_held=enum_from_value(YesNo, id_held),
-            deposit_requirements_met=enum_from_value(YesNo, deposit_met),
-            first_home_buyer=enum_from_value(YesNo, fhb),
-            home_buyer_declaration_attached=enum_from_value(YesNo, buyer_decl),
-            is_property_regional=enum_from_value(YesNo, regional),
-            evidence_of_living_regionally=enum_from_value(YesNo, evidence_reg),
-            currently_own_property=enum_from_value(YesNo, own_property),
-            single_parent_evidence=enum_from_value(YesNo, single_parent_ev),
+            NOA_attached=noa_attached,
+            medicare_or_PMKeys_ID_held=id_held,
+            deposit_requirements_met=deposit_met,
+            first_home_buyer=fhb,
+            home_buyer_declaration_attached=buyer_decl,
+            is_property_regional=regional,
+            evidence_of_living_regionally=evidence_reg,
+            currently_own_property=own_property,
+            single_parent_evidence=single_parent_ev,
             retain_savings_notes=retain_notes,
             scheme_eligibility_notes=scheme_notes,
         )
 
     lmi_payload = None
     if lmi_enabled:
+        p = "lmi_block."
         st.markdown("**Lenders Mortgage Insurance (LMI)**")
         l1, l2, l3 = st.columns(3)
         with l1:
-            lmi_app = st.text_input("LMI applicable")
-            lmi_calc = st.text_input("LMI calculation")
+            lmi_app = text_field("LMI applicable", p + "lmi_applicable")
+            lmi_calc = text_field("LMI calculation", p + "lmi_calculation")
         with l2:
-            lmi_provider = st.text_input("LMI provider")
-            existing_lmi = st.selectbox("Existing LMI", enum_options(YesNo), index=1)
+            lmi_provider = text_field("LMI provider", p + "lmi_provider")
+            existing_lmi = yes_no_field("Existing LMI", p + "existing_LMI")
         with l3:
-            waiver_ahpra = st.selectbox("Waiver – medical practitioners (AHPRA)", enum_options(YesNo), index=1)
-            waiver_prof = st.selectbox("Waiver – professional services registration", enum_options(YesNo), index=1)
-        waiver_other = st.text_input("Waiver – other (broker notes)")
+            waiver_ahpra = yes_no_field("Waiver – medical practitioners (AHPRA)", p + "waiver_medical_practitioners_AHPRA")
+            waiver_prof = yes_no_field("Waiver – professional services registration", p + "waiver_professional_services_registration")
+        waiver_other = text_field("Waiver – other (broker notes)", p + "waiver_other_broker_notes")
         lmi_payload = dict(
             lmi_applicable=lmi_app,
             lmi_calculation=lmi_calc,
             lmi_provider=lmi_provider,
-            existing_LMI=enum_from_value(YesNo, existing_lmi),
-            waiver_medical_practitioners_AHPRA=enum_from_value(YesNo, waiver_ahpra),
-            waiver_professional_services_registration=enum_from_value(YesNo, waiver_prof),
+            existing_LMI=existing_lmi,
+            waiver_medical_practitioners_AHPRA=waiver_ahpra,
+            waiver_professional_services_registration=waiver_prof,
             waiver_other_broker_notes=waiver_other,
         )
+    save_section("conditional_blocks", dict(hgs_block=hgs_payload, lmi_block=lmi_payload))
+
+@st.cache_resource(show_spinner=False)
+def deal_store() -> DealStore:
+    return DealStore()
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def lmi_table(path: str, mtime_ns: int) -> PremiumTable:
+    # Keyed by mtime, so an updated rate table is picked up on the next submit.
+    return load_premium_table(path)
+
+def current_lmi_table() -> Optional[PremiumTable]:
+    try:
+        return lmi_table(LMI_TABLE_PATH, os.stat(LMI_TABLE_PATH).st_mtime_ns)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        st.warning(f"Could not load the LMI premium table {LMI_TABLE_PATH}: {e}")
+        return None
+
+@st.cache_resource(show_spinner=False)
+def enricher() -> Enricher:
+    # One per server: sessions share its lookup cache, in-flight requests and limits.
+    try:
+        return Enricher(load_stubs())
+    except (OSError, ValueError) as e:
+        st.warning(f"Could not load the enrichment stubs: {e}")
+        return Enricher(load_stubs(None))
+
+@st.cache_resource(show_spinner=False)
+def draft_journal() -> DraftJournal:
+    return DraftJournal()
+
+def restore_draft(ref: DraftRef) -> None:
+    raw = to_json_bytes(snapshot_data(draft_journal().load(ref)), compact=True)
+    activate_prefill(f"draft:{ref.draft_id}:{ref.saved_at}", f"draft {ref.label}", lambda: raw)
+    # Carry on under the recovered draft's ID so further edits update it.
+    st.session_state["session_id"] = ref.draft_id
+
+@st.cache_resource(max_entries=32, show_spinner=False)
+def cached_import(digest: str, section: str, list_key: str, _prefill: PrefillIndex,
+                  _read: Callable[[], bytes], _reader: Callable[[bytes], List[Any]]) -> PrefillIndex:
+    # The section's own scalar fields (e.g. its summary notes) carry over from the loaded prefill.
+    prefix = section + "."
+    data = {k[len(prefix):]: v for k, v in _prefill.values.items() if k.startswith(prefix) and "." not in k[len(prefix):]}
+    data[list_key] = [line.model_dump(mode="json") for line in _reader(_read())]
+    return PrefillIndex({section: data}, digest=digest)
+
+MAX_FILE_MATCHES = 500
+
+@st.cache_resource(max_entries=8, show_spinner="Indexing deals in file…")
+def uploaded_deals(file_id: str, _file: BinaryIO) -> List[DealRecord]:
+    # One streaming pass per upload; picking a deal then reads only its bytes.
+    with metrics().stage("upload_index", payload_bytes=_file.seek(0, 2)) as fields:
+        _file.seek(0)
+        records = index_deals(_file)
+        fields["records"] = len(records)
+    return records
+
+@st.cache_resource(max_entries=32, show_spinner=False)
+def cached_prefill(digest: str, _read: Callable[[], bytes]) -> PrefillIndex:
+    # Only cache misses are timed: that's when the file is actually parsed.
+    raw = _read()
+    with metrics().stage("prefill_parse", payload_bytes=len(raw)) as fields:
+        prefill = load_prefill(raw, digest)
+        fields["fields"] = len(prefill.values)
+    return prefill
+
+def activate_prefill(source_id: str, label: str, read: Callable[[], bytes]) -> None:
+    # Each source (an upload or a stored deal) is read and hashed once; later
+    # reruns reuse the digest and the cached index.
+    active = st.session_state.get("prefill_source")
+    if active is None or active["id"] != source_id:
+        st.session_state["prefill_source"] = dict(id=source_id, label=label, digest=content_digest(read()), read=read)
+        st.session_state.pop("draft_digests", None)   # the loaded values are the new autosave baseline
+
+def active_prefill() -> PrefillIndex:
+    source = st.session_state.get("prefill_source")
+    if source is None:
+        return EMPTY_PREFILL
+    return cached_prefill(source["digest"], source["read"])
+
+def build_snapshot() -> DealSnapshotForm:
+    # Unchanged sections come straight from the validator's cache.
+    return section_validator().assemble({name: load_section(name) for name in SECTION_NAMES})
+
+# ===========================
+# Streamlit App
+# ===========================
+st.set_page_config(page_title="Deal Snapshot Form", layout="wide")
+st.title("Deal Snapshot – Streamlit Form")
 
-    submitted = st.form_submit_button("Validate & Generate JSON")
+with st.sidebar:
+    st.header("Import / Export")
+    uploaded = st.file_uploader("Load existing JSON, or a multi-deal JSON array / NDJSON file",
+                                type=["json", "ndjson", "jsonl"])
+    upload_choice = None
+    if uploaded:
+        try:
+            records = uploaded_deals(uploaded.file_id, uploaded)
+        except DealFileError as e:
+            st.error(f"Invalid JSON: {e}")
+            records = []
+        if len(records) == 1:
+            upload_choice = (f"upload:{uploaded.file_id}", uploaded.name, partial(read_deal, uploaded, records[0]))
+        elif records:
+            file_query = st.text_input(f"Find in file ({len(records):,} deals)", key=f"find:{uploaded.file_id}",
+                                       placeholder="Lender ID, applicant or submission date")
+            hits = find_deals(records, file_query, limit=MAX_FILE_MATCHES)
+            chosen = st.selectbox(
+                "Deal to load", hits, format_func=lambda r: r.label, key=f"pick:{uploaded.file_id}",
+                help=f"Showing the first {MAX_FILE_MATCHES} matches." if len(hits) == MAX_FILE_MATCHES else None,
+            )
+            if chosen is not None:
+                upload_choice = (f"upload:{uploaded.file_id}:{chosen.number}", f"{uploaded.name} {chosen.label}",
+                                 partial(read_deal, uploaded, chosen))
+    if upload_choice and upload_choice[0] != st.session_state.get("seen_upload"):
+        st.session_state["seen_upload"] = upload_choice[0]
+        activate_prefill(*upload_choice)
+    elif not uploaded and st.session_state.get("seen_upload"):
+        st.session_state["seen_upload"] = None
+        if st.session_state.get("prefill_source", {}).get("id", "").startswith("upload:"):
+            del st.session_state["prefill_source"]
+
+    st.header("Saved Deals")
+    deal_query = st.text_input("Find by lender ID, applicant, broker or customer no.")
+    if deal_query:
+        matches = deal_store().search(deal_query)
+        if matches:
+            chosen = st.selectbox("Matching deals", matches, format_func=lambda ref: ref.label)
+            if st.button("Open deal"):
+                activate_prefill(
+                    f"deal:{chosen.deal_id}:{chosen.saved_at}", chosen.label,
+                    partial(deal_store().get_bytes, chosen.deal_id),
+                )
+        else:
+            st.caption("No saved deals match.")
+
+    st.header("Search Notes")
+    note_query = st.text_input(
+        "Search narratives, flags and commentary",
+        help='Words must all match. Use "quotes" for phrases, field:word to search one field '
+             f"({'; '.join(f'{name}: {label}' for name, (label, _) in TEXT_FIELDS.items())}), word* for prefixes, "
+             "OR for either, -word to exclude.",
+    )
+    if note_query:
+        try:
+            with metrics().stage("search_text"):
+                hits = deal_store().search_text(note_query)
+        except SearchQueryError as e:
+            st.caption(str(e))
+            hits = []
+        if hits:
+            chosen_hit = st.selectbox("Best matches", hits,
+                                      format_func=lambda hit: f"{hit.label} · {hit.snippet.replace('**', '')}")
+            st.caption(chosen_hit.snippet)
+            if st.button("Open deal", key="open_text_hit"):
+                activate_prefill(
+                    f"deal:{chosen_hit.deal_id}:{chosen_hit.saved_at}", chosen_hit.label,
+                    partial(deal_store().get_bytes, chosen_hit.deal_id),
+                )
+        elif note_query.strip():
+            st.caption("No saved deals match.")
+
+    st.header("Recover Draft")
+    st.caption(f"Edits are autosaved as draft `{session_id()}`.")
+    draft_query = st.text_input("Find a draft by session or lender ID")
+    drafts = draft_journal().find(draft_query, limit=20)
+    if drafts:
+        chosen_draft = st.selectbox("Drafts (newest first)", drafts,
+                                    format_func=lambda ref: f"{ref.draft_id} · {ref.label}")
+        if st.button("Restore draft"):
+            try:
+                restore_draft(chosen_draft)
+            except KeyError:
+                st.warning("That draft was submitted or discarded in the meantime.")
+    elif draft_query:
+        st.caption("No drafts match.")
+
+    prefill = EMPTY_PREFILL
+    if "prefill_source" in st.session_state:
+        try:
+            prefill = active_prefill()
+            st.success(f"Loaded {st.session_state['prefill_source']['label']}. Values will pre-fill where applicable.")
+            if prefill.errors:
+                with st.expander(f"{len(prefill.errors)} field(s) need attention"):
+                    for err in prefill.errors:
+                        st.caption(f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}")
+        except ValueError as e:
+            st.error(f"Invalid JSON: {e}")
+    compact_json = st.toggle("Compact JSON (no indentation)", value=False)
+    st.caption("On submit, the deal is saved locally and a validated JSON download will be provided.")
+
+render_application_summary(prefill)
+render_loan_section(prefill)
+render_applicant_section(prefill)
+render_income_section(prefill)
+render_expense_section(prefill)
+render_asset_liability_section(prefill)
+render_security_section(prefill)
+render_conditional_blocks(prefill)
+
+submitted = st.button("Validate & Generate JSON", type="primary")
 
 # ---- Validate + Output ----
 if submitted:
     try:
-        payload = DealSnapshotForm(
-            application_summary=ApplicationSummary(
-                submission_date=submission_date,
-                budget_surplus=budget_surplus,
-                PAT=pat,
-                lender_id=lender_id,
-                LVR=lvr,
-                broker_name=broker_name,
-                broker_phone_no=broker_phone_no,
-                aggregated_lending=enum_from_value(YesNoNA, aggregated_lending),
-                lmi_required=enum_from_value(YesNo, lm_required),
-                broker_or_MRU=enum_from_value(BrokerOrMRU, broker_or_mru),
-                cas_decision=cas_decision,
-                government_guarantee_scheme=government_guarantee_scheme,
-            ),
-            loan_section=LoanSection(
-                number_of_loans=NumberOfLoans(number_of_loans),
-                loans=[LoanDetail(**ld) for ld in loan_details],
-                loan_purpose_notes=loan_purpose_notes
-            ),
-            applicant_section=ApplicantSection(
-                number_of_applicants=num_applicants,
-                number_of_guarantors=num_guarantors,
-                applicants=[Applicant(**a) for a in applicants_payload],
-                guarantors=[Guarantor(**g) for g in guarantors_payload],
-                alerts_narratives_details=alerts_narratives,
-            ),
-            income_section=IncomeSection(
-                number_of_incomes=num_incomes,
-                incomes=[IncomeLine(**il) for il in incomes_payload],
-                income_summary=income_summary,
-            ),
-            expense_section=ExpenseSection(
-                number_of_households=num_households,
-                households=[ExpenseLine(**el) for el in expenses_payload],
-                expenses_notes_summary=expenses_summary,
-            ),
-            asset_liability_section=AssetLiabilitySection(
-                ccr_complete=ccr_complete,
-                refinance_payment_history_verified=refinance_hist,
-                transaction_report_check_complete=txn_report,
-                genuine_savings_type=genuine_savings_type,
-                genuine_savings_docs_verified=genuine_savings_docs,
-                commentary=commentary_al,
-                existing_homeloan_repayments_validated=repayments_validated,
-                imminent_retirement_docs_verified=retire_docs,
-                assets_liabilities_notes_summary=al_summary,
-            ),
-            security_section=SecuritySection(
-                securities=[SecurityDetail(**s) for s in securities_payload]
-            ),
-            hgs_block=HGSBlock(**hgs_payload) if hgs_payload else None,
-            lmi_block=LMIBlock(**lmi_payload) if lmi_payload else None,
-        )
+        session = session_id()
+        with metrics().stage("submit:assemble", session=session):
+            payload = build_snapshot()
+        with metrics().stage("submit:lmi", session=session):
+            premium_table = current_lmi_table()
+            quote = quote_deal(payload, premium_table)
+            payload = with_derived_lmi(payload, quote)
+        shape = deal_shape(payload)
+        st.session_state["metrics_shape"] = shape
 
         st.success("Validation successful.")
-        render_submission_summary(payload)
-        json_data = json.loads(payload.model_dump_json())
-        st.json(json_data)
+        with metrics().stage("submit:summary", session=session, **shape):
+            render_submission_summary(payload)
+            render_lmi_quote(payload, quote, premium_table)
+        with metrics().stage("submit:policy", session=session):
+            breaches = check_deal(payload)
+        render_policy_breaches(breaches)
+        with metrics().stage("submit:enrichment", session=session):
+            try:
+                findings: Optional[List[Finding]] = enricher().enrich_sync(payload)
+            except TimeoutError:
+                findings = None
+        render_enrichment(findings)
+        with metrics().stage("submit:serialize", session=session, **shape) as fields:
+            canonical = snapshot_to_bytes(payload, compact=compact_json)
+            fields["payload_bytes"] = len(canonical)
+        metrics().record_shape(shape, payload_bytes=len(canonical))
+        st.json(canonical.decode("utf-8"))
         st.download_button(
             "Download JSON",
-            data=to_json_bytes(json_data),
+            data=canonical,
             file_name="deal_snapshot.json",
             mime="application/json",
         )
-    except ValidationError as ve:
+        with metrics().stage("submit:report", session=session, **shape):
+            pack = report_bytes(payload, deal_id_for(payload), premium_table)
+        st.download_button(
+            "Download deal pack (HTML)",
+            data=pack,
+            file_name=f"deal_pack_{payload.application_summary.lender_id}.html",
+            mime="text/html",
+            help="Printable committee pack: open it and print, or save as PDF.",
+        )
+        try:
+            with metrics().stage("submit:store", session=session, payload_bytes=len(canonical)):
+                deal_id = deal_store().upsert(payload, canonical)
+            draft_journal().discard(session)
+            st.caption(f"Saved to the local deal store as `{deal_id}`.")
+            with metrics().stage("submit:duplicates", session=session):
+                matches = deal_store().find_duplicates(payload)
+            if matches:
+                st.warning(
+                    "Possible duplicate of a stored deal (same applicants / security, e.g. also submitted via "
+                    "Broker and MRU):\n"
+                    + "\n".join(
+                        f"- {m.ref.label} · {m.broker_or_MRU or 'channel not set'} · {m.score:.0%} similar"
+                        for m in matches
+                    )
+                )
+        except sqlite3.Error as e:
+            st.warning(f"Could not save to the local deal store: {e}")
+    except SnapshotValidationError as ve:
         st.error("Validation failed. See details below.")
         st.code(ve.json(), language="json")
     except Exception as e:
         st.error(f"Unexpected error: {e}")
+
+with st.sidebar:
+    if st.toggle("Show timings", value=False, help="Per-stage render, validation and submit timings for this server."):
+        render_metrics_panel()
+metrics().flush()
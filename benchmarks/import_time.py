@@ -0,0 +1,77 @@
+# benchmarks/import_time.py
+# ----------------------------- #
+# Cold-start import time of the model package
+# ----------------------------- #
+#
+#   python benchmarks/import_time.py [--runs 15] [--budget-ms 75]
+#
+# Each sample is a fresh interpreter so nothing is served from sys.modules.
+# `import pydantic` is measured separately so the package's own overhead is visible.
+# Exits 1 when the median model import, net of Pydantic's median, exceeds the
+# budget; Pydantic's own import cost is outside this tree's control.
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+TARGETS = {
+    "pydantic": "import pydantic; from pydantic import BaseModel",
+    "dealsnap.models": "import dealsnap.models",
+    "dealsnap.summary": "import dealsnap.summary",
+    "streamlit (for reference)": "import streamlit",
+}
+
+PROBE = (
+    "import time, sys; t = time.perf_counter(); exec(sys.argv[1]); "
+    "print((time.perf_counter() - t) * 1000); "
+    "print(int('streamlit' in sys.modules))"
+)
+
+def sample(stmt: str) -> Dict[str, float]:
+    out = subprocess.run(
+        [sys.executable, "-c", PROBE, stmt],
+        cwd=REPO_ROOT, capture_output=True, text=True, check=True,
+    ).stdout.split()
+    return {"ms": float(out[0]), "streamlit_loaded": bool(int(out[1]))}
+
+def measure(runs: int) -> Dict[str, Dict[str, float]]:
+    results = {}
+    for name, stmt in TARGETS.items():
+        samples: List[Dict[str, float]] = [sample(stmt) for _ in range(runs)]
+        times = sorted(s["ms"] for s in samples)
+        results[name] = {
+            "median_ms": round(statistics.median(times), 1),
+            "min_ms": round(times[0], 1),
+            "max_ms": round(times[-1], 1),
+            "streamlit_loaded": any(s["streamlit_loaded"] for s in samples),
+        }
+    return results
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Time cold-start imports of the model package in fresh interpreters.")
+    parser.add_argument("--runs", type=int, default=15)
+    parser.add_argument("--budget-ms", type=float, default=75.0)
+    args = parser.parse_args()
+
+    results = measure(args.runs)
+    print(json.dumps(results, indent=2))
+
+    models = results["dealsnap.models"]
+    if models["streamlit_loaded"]:
+        print("dealsnap.models pulled in streamlit", file=sys.stderr)
+        return 1
+    own_ms = round(models["median_ms"] - results["pydantic"]["median_ms"], 1)
+    if own_ms > args.budget_ms:
+        print(f"dealsnap.models adds {own_ms} ms over pydantic, exceeding {args.budget_ms} ms", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
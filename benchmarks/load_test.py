@@ -0,0 +1,211 @@
+# benchmarks/load_test.py
+# ----------------------------- #
+# Concurrent sessions: rerun/submit latency and memory
+# ----------------------------- #
+#
+#   python benchmarks/load_test.py [--concurrency 1 4 8 16] [--edits 5] [--seed 0] [-o load.json]
+#
+# Each simulated user is a headless app session (Streamlit's AppTest) in its own
+# thread, which is how `streamlit run` serves sessions: one process, one script
+# thread per session, shared st.cache_resource. A session loads a synthetic deal
+# of a randomly drawn realistic shape, makes --edits grid edits (one rerun
+# each) and submits. For every concurrency level the report gives p50/p95/p99
+# rerun and submit latency, process RSS before, at peak and with every session
+# still open (per-session RSS is that growth divided by the session count), and
+# RSS once the sessions are dropped, so state that outlives its session shows up
+# as a rising baseline from one level to the next. One unreported session runs
+# first to warm imports and caches.
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import os
+import random
+import resource
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+from unittest.mock import MagicMock
+
+import numpy as np
+from streamlit import config
+from streamlit.runtime import Runtime
+from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+from streamlit.runtime.media_file_manager import MediaFileManager
+from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+from streamlit.testing.v1 import AppTest
+
+from synthetic import make_deal
+from suite import REPO_ROOT, environment, load_deal, scratch_dir
+
+from dealsnap.prefill import content_digest
+
+# (weight, shape) - mostly one or two applicants with a handful of lines, and a
+# tail of large multi-security deals with long income schedules.
+DEAL_SHAPES: List[Tuple[float, Dict[str, int]]] = [
+    (0.45, dict(loans=1, applicants=2, guarantors=0, incomes=3, expenses=2, securities=1)),
+    (0.30, dict(loans=2, applicants=2, guarantors=0, incomes=6, expenses=4, securities=1)),
+    (0.15, dict(loans=3, applicants=3, guarantors=1, incomes=12, expenses=6, securities=2)),
+    (0.10, dict(loans=4, applicants=4, guarantors=2, incomes=40, expenses=10, securities=5)),
+]
+
+def rss_mb() -> float:
+    # Current resident set (Linux); elsewhere falls back to the peak so far.
+    try:
+        with open("/proc/self/status", encoding="ascii") as fh:
+            for line in fh:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if os.uname().sysname == "Darwin" else peak / 1024
+
+class PeakSampler(threading.Thread):
+    def __init__(self, interval_s: float = 0.05):
+        super().__init__(daemon=True)
+        self.interval_s = interval_s
+        self.peak_mb = rss_mb()
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self.interval_s):
+            self.peak_mb = max(self.peak_mb, rss_mb())
+
+    def stop(self) -> float:
+        self._stop_event.set()
+        self.join()
+        return max(self.peak_mb, rss_mb())
+
+def share_runtime() -> None:
+    # AppTest assumes one session at a time: each run installs a fresh mock
+    # Runtime, flips the global.appTest option and compiles the script, then
+    # clears them all, which breaks any other session mid-run. `streamlit run`
+    # has one Runtime, one config and one compiled script per process, so pin
+    # one of each for every session here.
+    runtime = MagicMock(spec=Runtime)
+    runtime.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    runtime.cache_storage_manager = MemoryCacheStorageManager()
+    Runtime.instance = classmethod(lambda cls: runtime)
+    Runtime.exists = classmethod(lambda cls: True)
+    config.set_option("global.appTest", True)
+
+    # A fresh ScriptCache per run also means concurrent compiles, which trip a
+    # CPython 3.11 ast.parse bug.
+    shared = ScriptCache()
+    lock = threading.Lock()
+    get_bytecode = ScriptCache.get_bytecode
+
+    def shared_bytecode(self: ScriptCache, script_path: str) -> Any:
+        with lock:
+            return get_bytecode(shared, script_path)
+
+    ScriptCache.get_bytecode = shared_bytecode
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    if not samples:
+        return {}
+    p50, p95, p99 = (float(p) for p in np.percentile(samples, [50, 95, 99]))
+    return {"n": len(samples), "p50_ms": round(p50, 2), "p95_ms": round(p95, 2), "p99_ms": round(p99, 2),
+            "max_ms": round(max(samples), 2)}
+
+def draw_shape(rng: random.Random) -> Dict[str, int]:
+    weights, shapes = zip(*DEAL_SHAPES)
+    return rng.choices(shapes, weights=weights)[0]
+
+def run_session(seed: int, edits: int) -> Dict[str, Any]:
+    rng = random.Random(seed)
+    shape = draw_shape(rng)
+    raw = json.dumps(make_deal(rng, **shape)).encode("utf-8")
+    at = AppTest.from_file(str(REPO_ROOT / "app.py"), default_timeout=300)
+    load_deal(at, raw)
+
+    def timed_run(step: AppTest) -> float:
+        start = time.perf_counter()
+        step.run()
+        elapsed = (time.perf_counter() - start) * 1000
+        if step.exception:
+            raise RuntimeError(step.exception[0].value)
+        return elapsed
+
+    first_ms = timed_run(at)
+    # Grid keys are the model path namespaced by the loaded file's digest.
+    income_key = f"{content_digest(raw)[:12]}:income_section.incomes"
+    reruns = []
+    for _ in range(edits):
+        row = rng.randrange(shape["incomes"])
+        at.session_state[income_key] = {
+            "edited_rows": {row: {"annual_amount": float(rng.randrange(20, 200) * 1000)}},
+            "added_rows": [], "deleted_rows": [],
+        }
+        reruns.append(timed_run(at))
+    submit = [b for b in at.button if b.label == "Validate & Generate JSON"][0]
+    submit.click()
+    submit_ms = timed_run(at)
+    # Policy breaches are shown with st.error too, so only a missing success
+    # message (or an exception) means the submit failed.
+    if not at.success or at.exception:
+        raise RuntimeError(f"submit failed: {[e.value for e in at.error]}")
+    return {"at": at, "shape": shape, "prefill_bytes": len(raw), "first_ms": first_ms,
+            "rerun_ms": reruns, "submit_ms": submit_ms}
+
+def run_level(sessions: int, edits: int, seed: int) -> Dict[str, Any]:
+    gc.collect()
+    before = rss_mb()
+    sampler = PeakSampler()
+    sampler.start()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions) as pool:
+        results = list(pool.map(lambda i: run_session(seed + i, edits), range(sessions)))
+    wall_s = time.perf_counter() - start
+    peak = sampler.stop()
+    gc.collect()
+    held = rss_mb()  # every session (AppTest + its session state) still open
+    level = {
+        "sessions": sessions,
+        "wall_s": round(wall_s, 2),
+        "first_run": percentiles([r["first_ms"] for r in results]),
+        "rerun": percentiles([ms for r in results for ms in r["rerun_ms"]]),
+        "submit": percentiles([r["submit_ms"] for r in results]),
+        "prefill_bytes": sum(r["prefill_bytes"] for r in results),
+        "incomes": sum(r["shape"]["incomes"] for r in results),
+    }
+    del results
+    gc.collect()
+    level["rss_mb"] = {
+        "before": round(before, 1), "peak": round(peak, 1), "held": round(held, 1),
+        "per_session": round((held - before) / sessions, 2), "released": round(rss_mb(), 1),
+    }
+    return level
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Simulate concurrent form sessions; report latency and RSS.")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8, 16])
+    parser.add_argument("--edits", type=int, default=5, help="grid edits (reruns) per session before submit")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", help="write results JSON here (default: stdout)")
+    args = parser.parse_args()
+
+    share_runtime()
+    levels = []
+    scratch_dir("dealsnap-load-")
+    # Imports, compiled script and model schemas are paid once per server,
+    # not per session; keep them out of the first level's numbers.
+    run_session(args.seed - 1, 1)
+    for n in args.concurrency:
+        levels.append(run_level(n, args.edits, args.seed))
+        print(f"{n} sessions: rerun {levels[-1]['rerun']}, submit {levels[-1]['submit']}, "
+              f"rss {levels[-1]['rss_mb']}", file=sys.stderr, flush=True)
+    report = {"environment": environment(), "edits": args.edits, "levels": levels}
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    print(text)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+# benchmarks/portfolio_bench.py
+# ----------------------------- #
+# Portfolio engine: bulk build, incremental add, group-by + sensitivity reads
+# ----------------------------- #
+#
+#   python benchmarks/portfolio_bench.py --deals 500000 [--adds 1000]
+#
+# Rows are generated directly in the DealRow/LoanRow shape so the timings cover
+# the engine, not model validation or SQLite extraction.
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import statistics
+import time
+from datetime import date, timedelta
+
+import numpy as np
+from synthetic import BROKERS
+
+from dealsnap.models import LoanProduct
+from dealsnap.portfolio import GROUP_KEYS, Portfolio
+
+PRODUCTS = [p.value for p in LoanProduct]
+REPAYMENT_TYPES = ["Principal & Interest", "Interest Only"]
+
+def make_rows(count: int, seed: int, lenders: int):
+    rng = random.Random(seed)
+    deals, loans = [], []
+    for i in range(count):
+        deal_id = f"{seed}-{i}"
+        amounts = [rng.randrange(100, 1500) * 1000.0 for _ in range(rng.randint(1, 3))]
+        submitted = date(2020, 1, 1) + timedelta(days=rng.randrange(6 * 365))
+        deals.append((
+            deal_id, f"LND-{rng.randrange(lenders):05d}", rng.choice(BROKERS), submitted.isoformat(),
+            sum(amounts), rng.randrange(60, 400) * 1000.0, rng.randrange(2, 9) * 500.0,
+        ))
+        loans.extend(
+            (deal_id, rng.choice(PRODUCTS), amount, round(rng.uniform(5.0, 7.5), 2), rng.choice([20, 25, 30]),
+             rng.choice(REPAYMENT_TYPES))
+            for amount in amounts
+        )
+    return deals, loans
+
+def ms(start: float) -> float:
+    return round((time.perf_counter() - start) * 1000, 2)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Time the vectorized portfolio engine.")
+    parser.add_argument("--deals", type=int, default=500_000)
+    parser.add_argument("--adds", type=int, default=1000)
+    parser.add_argument("--lenders", type=int, default=20_000)
+    args = parser.parse_args()
+
+    deals, loans = make_rows(args.deals, seed=1, lenders=args.lenders)
+    start = time.perf_counter()
+    portfolio = Portfolio.from_rows(deals, loans)
+    build_ms = ms(start)
+
+    # One deal at a time, as app.py submissions arrive; half are resubmissions.
+    new_deals, new_loans = make_rows(args.adds, seed=2, lenders=args.lenders)
+    replaced = [(deals[i][0],) + new_deals[i][1:] for i in range(0, args.adds, 2)]
+    samples = []
+    for deal in new_deals[1::2] + replaced:
+        deal_loans = [(deal[0], PRODUCTS[0], deal[4], 6.0, 30, REPAYMENT_TYPES[0])]
+        t = time.perf_counter()
+        portfolio.add_rows([deal], deal_loans)
+        samples.append((time.perf_counter() - t) * 1000)
+
+    reads = {}
+    for key in GROUP_KEYS:
+        t = time.perf_counter()
+        table = portfolio.group_by(key)
+        reads[key] = {"groups": len(table[key]), "ms": ms(t)}
+        assert np.allclose(portfolio._sums[key], portfolio.recompute(key))
+    t = time.perf_counter()
+    portfolio.totals()
+    totals_ms = ms(t)
+    t = time.perf_counter()
+    grid = portfolio.sensitivity()
+    sensitivity_ms = ms(t)
+
+    print(json.dumps({
+        "deals": portfolio.deal_count,
+        "bulk_build_ms": build_ms,
+        "incremental_add": {
+            "count": len(samples),
+            "median_ms": round(statistics.median(samples), 3),
+            "max_ms": round(max(samples), 3),
+        },
+        "totals_ms": totals_ms,
+        "sensitivity": {
+            "cells": grid["serviceable_share"].size,
+            "ms": sensitivity_ms,
+            "serviceable_share_at_+3%": [round(x, 3) for x in grid["serviceable_share"][-1]],
+        },
+        "group_by": reads,
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
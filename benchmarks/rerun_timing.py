@@ -0,0 +1,118 @@
+# benchmarks/rerun_timing.py
+# ----------------------------- #
+# Rerun latency: full script vs per-section fragment
+# ----------------------------- #
+#
+#   python benchmarks/rerun_timing.py [--loans 4 --incomes 10 --securities 5] [--runs 10]
+#   python benchmarks/rerun_timing.py --script /tmp/app_before.py   # e.g. `git show <rev>:app.py`
+#
+# Full reruns are timed with Streamlit's AppTest harness. AppTest cannot trigger a
+# fragment-only rerun, so `st.fragment` is wrapped to time each section body; a
+# fragment rerun costs the runner's fixed overhead (timed on an empty script) plus
+# that section's body.
+from __future__ import annotations
+
+import argparse
+import functools
+import json
+import statistics
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))  # `streamlit run` does this for app.py; AppTest does not
+
+section_times: Dict[str, List[float]] = defaultdict(list)
+
+def install_fragment_timer() -> None:
+    original = st.fragment
+
+    def timed_fragment(func: Callable[..., Any] = None, **kwargs: Any):
+        if func is None:
+            return lambda f: timed_fragment(f, **kwargs)
+        fragment = original(func, **kwargs)
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kw: Any) -> Any:
+            start = time.perf_counter()
+            try:
+                return fragment(*args, **kw)
+            finally:
+                section_times[func.__name__].append((time.perf_counter() - start) * 1000)
+        return wrapper
+
+    st.fragment = timed_fragment
+
+def set_number(at: AppTest, label: str, value: int) -> None:
+    for widget in list(at.number_input) + list(at.select_slider):
+        if widget.label == label:
+            widget.set_value(value)
+            return
+    raise LookupError(f"no widget labelled {label!r}")
+
+def add_grid_rows(at: AppTest, path: str, rows: int, row: Dict[str, Any]) -> None:
+    # Repeated sections are st.data_editor grids keyed by their model path (no
+    # prefill loaded, so no digest prefix); rows are added through widget state.
+    at.session_state[f":{path}"] = {"edited_rows": {}, "added_rows": [dict(row) for _ in range(rows)], "deleted_rows": []}
+
+def timed_runs(at: AppTest, runs: int) -> List[float]:
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        at.run()
+        samples.append((time.perf_counter() - start) * 1000)
+        if at.exception:
+            raise RuntimeError(at.exception[0].value)
+    return samples
+
+def stats(samples: List[float]) -> Dict[str, float]:
+    return {"median_ms": round(statistics.median(samples), 2), "min_ms": round(min(samples), 2)}
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Time app.py reruns for a given deal shape.")
+    parser.add_argument("--script", default=str(REPO_ROOT / "app.py"))
+    parser.add_argument("--loans", type=int, default=4)
+    parser.add_argument("--incomes", type=int, default=10)
+    parser.add_argument("--securities", type=int, default=5)
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    install_fragment_timer()
+
+    with tempfile.NamedTemporaryFile("w", suffix=".py", delete=False) as empty:
+        empty.write("import streamlit as st\nst.write('')\n")
+    overhead = stats(timed_runs(AppTest.from_file(empty.name, default_timeout=60), args.runs))
+
+    at = AppTest.from_file(args.script, default_timeout=60).run()
+    set_number(at, "Number of loans", args.loans)
+    add_grid_rows(at, "income_section.incomes", args.incomes, {"applicant": "Ann Lee", "annual_amount": 1000.0})
+    add_grid_rows(at, "security_section.securities", args.securities, {"address": "1 Main St"})
+    at.run()
+    section_times.clear()
+    full = stats(timed_runs(at, args.runs))
+
+    fragments = {}
+    for name, samples in section_times.items():
+        body = statistics.median(samples)
+        fragments[name] = {
+            "body_median_ms": round(body, 2),
+            "est_rerun_ms": round(body + overhead["median_ms"], 2),
+        }
+
+    print(json.dumps({
+        "script": args.script,
+        "shape": {"loans": args.loans, "incomes": args.incomes, "securities": args.securities},
+        "runner_overhead": overhead,
+        "full_rerun": full,
+        "fragment_rerun": fragments,
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# benchmarks/search_bench.py
+# ----------------------------- #
+# Narrative full-text search latency
+# ----------------------------- #
+#
+#   python benchmarks/search_bench.py --count 1000000 --path /tmp/search.sqlite3
+#
+# Synthetic narratives are fixed strings, so each deal's narrative fields are
+# rewritten from a phrase pool first: common words then match about half the
+# deals, phrases and field-scoped terms far fewer.
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import statistics
+import time
+from typing import Any, Dict, Iterator
+
+from synthetic import iter_deals
+
+from dealsnap.models import DealSnapshotForm
+from dealsnap.store import DealStore
+
+PHRASES = [
+    "no adverse credit history", "stable employment confirmed by payslips", "casual under 12 months",
+    "overtime included", "ATO payment plan in place", "tax debt cleared before settlement", "gambling transactions noted",
+    "hardship arrangement in 2021", "default judgement satisfied", "arrears on personal loan", "bridging finance required",
+    "construction loan progress payments", "high density postcode", "mining town exposure", "flood zone",
+    "cladding report outstanding", "strata levies in arrears", "refinance of existing debts", "declared below HEM",
+    "bonus income averaged over two years",
+]
+
+QUERIES = [
+    "arrears", "gambling", '"tax debt"', "valuation:cladding", 'alerts:"payment plan"', "hardship OR default -bonus",
+    "payslip*", "flood zone",
+]
+
+def narrative(rng: random.Random) -> str:
+    return "; ".join(rng.sample(PHRASES, rng.randint(1, 3))) + "."
+
+def iter_varied(count: int, seed: int) -> Iterator[DealSnapshotForm]:
+    rng = random.Random(seed)
+    for deal in iter_deals(count, seed):
+        deal["applicant_section"]["alerts_narratives_details"] = narrative(rng)
+        deal["loan_section"]["loan_purpose_notes"] = narrative(rng)
+        for line in deal["income_section"]["incomes"]:
+            line["flags"] = rng.choice(PHRASES) if rng.random() < 0.3 else ""
+        for line in deal["expense_section"]["households"]:
+            line["commentary"] = rng.choice(PHRASES) if rng.random() < 0.3 else ""
+        for security in deal["security_section"]["securities"]:
+            security["valuation_risk_alerts"] = rng.choice(PHRASES) if rng.random() < 0.2 else ""
+        yield DealSnapshotForm.model_validate(deal)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Bulk-load synthetic deals and time narrative search.")
+    parser.add_argument("--count", type=int, default=1_000_000)
+    parser.add_argument("--path", default="bench_search.sqlite3")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--reuse", action="store_true", help="Query an existing --path instead of reloading it")
+    args = parser.parse_args()
+
+    if not args.reuse and os.path.exists(args.path):
+        os.remove(args.path)
+    store = DealStore(args.path)
+    load_s = None
+    if not args.reuse:
+        start = time.perf_counter()
+        store.upsert_many(iter_varied(args.count, seed=3))
+        load_s = round(time.perf_counter() - start, 1)
+
+    timings: Dict[str, Any] = {}
+    for query in QUERIES:
+        samples = []
+        for _ in range(args.repeat):
+            t = time.perf_counter()
+            hits = store.search_text(query, limit=20)
+            samples.append((time.perf_counter() - t) * 1000)
+        samples.sort()
+        timings[query] = {
+            "hits": len(hits),
+            "median_ms": round(statistics.median(samples), 1),
+            "max_ms": round(samples[-1], 1),
+        }
+
+    print(json.dumps({"deals": store.count(), "load_seconds": load_s, "queries": timings}, indent=2))
+
+if __name__ == "__main__":
+    main()
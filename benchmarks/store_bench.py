@@ -0,0 +1,67 @@
+# benchmarks/store_bench.py
+# ----------------------------- #
+# Deal store bulk load + indexed lookup latency
+# ----------------------------- #
+#
+#   python benchmarks/store_bench.py --count 1000000 --path /tmp/deals.sqlite3
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import time
+
+from synthetic import iter_snapshots
+
+from dealsnap.store import DealStore
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Bulk-load synthetic snapshots and time indexed lookups.")
+    parser.add_argument("--count", type=int, default=1_000_000)
+    parser.add_argument("--path", default="bench_deals.sqlite3")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--lookups", type=int, default=200)
+    args = parser.parse_args()
+
+    if os.path.exists(args.path):
+        os.remove(args.path)
+    store = DealStore(args.path)
+
+    start = time.perf_counter()
+    snapshots = list(iter_snapshots(args.lookups, seed=1))
+    store.upsert_many(iter_snapshots(args.count - args.lookups, seed=2), batch_size=args.batch_size)
+    store.upsert_many(snapshots, batch_size=args.batch_size)
+    load_s = time.perf_counter() - start
+
+    timings = {}
+    probes = {
+        "lender_id": lambda s: store.find(lender_id=s.application_summary.lender_id),
+        "customer_number": lambda s: store.find(customer_number=s.applicant_section.applicants[0].customer_number),
+        "applicant_name": lambda s: store.find(applicant_name=s.applicant_section.applicants[0].name, limit=20),
+        "broker_name+date": lambda s: store.find(
+            broker_name=s.application_summary.broker_name, submitted_from=s.application_summary.submission_date,
+            submitted_to=s.application_summary.submission_date,
+        ),
+    }
+    for name, probe in probes.items():
+        samples = []
+        for snapshot in snapshots:
+            t = time.perf_counter()
+            assert probe(snapshot)
+            samples.append((time.perf_counter() - t) * 1000)
+        samples.sort()
+        timings[name] = {
+            "median_ms": round(statistics.median(samples), 3),
+            "p99_ms": round(samples[int(len(samples) * 0.99) - 1], 3),
+        }
+
+    print(json.dumps({
+        "deals": store.count(),
+        "load_seconds": round(load_s, 1),
+        "deals_per_second": round(args.count / load_s),
+        "lookups": timings,
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
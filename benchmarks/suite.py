@@ -0,0 +1,233 @@
+# benchmarks/suite.py
+# ----------------------------- #
+# Benchmark suite: reruns, validation, serialization, summary
+# ----------------------------- #
+#
+#   python benchmarks/suite.py [--loans 4 --applicants 2 --guarantors 1 --incomes 40
+#                               --expenses 10 --securities 5] [--runs 10] [--batch 2000]
+#                              [-o results.json] [--compare baseline.json]
+#
+# Every timing is the median (and min) of --runs samples, in milliseconds, for
+# one synthetic deal of the given shape (batch figures use --batch deals).
+# Results are written as JSON together with the versions and git revision they
+# were taken at; --compare prints each metric's ratio against an earlier run.
+from __future__ import annotations
+
+import argparse
+import atexit
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+import pydantic
+import streamlit as st
+from pydantic import TypeAdapter
+from streamlit.testing.v1 import AppTest
+
+from synthetic import iter_deals, make_deal
+
+from dealsnap.helpers import to_json_bytes
+from dealsnap.models import DealSnapshotForm
+from dealsnap.prefill import content_digest
+from dealsnap.sections import SECTION_NAMES, SectionValidator
+from dealsnap.serialization import snapshot_to_bytes
+from dealsnap.summary import summarize_submission
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+APP_BANNER = "# Streamlit App"
+
+def timed(func: Callable[[], Any], runs: int) -> Dict[str, float]:
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {"median_ms": round(statistics.median(samples), 3), "min_ms": round(min(samples), 3)}
+
+def throughput(func: Callable[[], Any], items: int, runs: int) -> Dict[str, float]:
+    result = timed(func, runs)
+    result["per_sec"] = round(items / (result["median_ms"] / 1000)) if result["median_ms"] else None
+    return result
+
+# ---- app reruns (AppTest) ----
+def load_deal(at: AppTest, raw: bytes) -> None:
+    # Same state activate_prefill() leaves behind after an upload.
+    at.session_state["prefill_source"] = dict(
+        id="upload:bench", label="bench.json", digest=content_digest(raw), read=lambda: raw,
+    )
+
+def bench_app(raw: bytes, runs: int) -> Dict[str, Any]:
+    script = str(REPO_ROOT / "app.py")
+    at = AppTest.from_file(script, default_timeout=120)
+    load_deal(at, raw)
+    start = time.perf_counter()
+    at.run()
+    first_ms = (time.perf_counter() - start) * 1000
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+
+    def submit() -> None:
+        [b for b in at.button if b.label == "Validate & Generate JSON"][0].click().run()
+
+    rerun = timed(at.run, runs)
+    submit_run = timed(submit, runs)
+    if not at.success or at.exception:
+        raise RuntimeError(f"submit failed: {[e.value for e in at.error]}")
+    return {"first_run_ms": round(first_ms, 3), "rerun": rerun, "submit_rerun": submit_run}
+
+def bench_render_summary(raw: bytes, runs: int) -> Dict[str, float]:
+    # app.py's definitions (everything above the "Streamlit App" banner) are
+    # executed inside an AppTest script so st calls have a script context.
+    def script(path: str, raw: bytes, runs: int, banner: str) -> None:
+        import statistics, time
+        import streamlit as st
+        from dealsnap.models import DealSnapshotForm
+        source = open(path, encoding="utf-8").read()
+        namespace: dict = {"__name__": "app_definitions"}
+        exec(compile(source[: source.index(banner)], path, "exec"), namespace)
+        payload = DealSnapshotForm.model_validate_json(raw)
+        samples = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            namespace["render_submission_summary"](payload)
+            samples.append((time.perf_counter() - start) * 1000)
+        st.session_state["bench"] = {"median_ms": round(statistics.median(samples), 3), "min_ms": round(min(samples), 3)}
+
+    at = AppTest.from_function(script, args=(str(REPO_ROOT / "app.py"), raw, runs, APP_BANNER), default_timeout=120)
+    at.run()
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+    return at.session_state["bench"]
+
+# ---- validation / serialization ----
+def section_inputs(deal: Dict[str, Any]) -> Dict[str, Any]:
+    sections = {name: deal[name] for name in SECTION_NAMES if name != "conditional_blocks"}
+    sections["conditional_blocks"] = {"hgs_block": deal.get("hgs_block"), "lmi_block": deal.get("lmi_block")}
+    return sections
+
+def bench_validation(deal: Dict[str, Any], raw: bytes, batch: List[Dict[str, Any]], runs: int) -> Dict[str, Any]:
+    adapter = TypeAdapter(List[DealSnapshotForm])
+    batch_raw = [json.dumps(d).encode("utf-8") for d in batch]
+    sections = section_inputs(deal)
+    cold_validator = lambda: SectionValidator().assemble(sections)  # noqa: E731
+    warm = SectionValidator()
+    warm.assemble(sections)
+    return {
+        "single_python": throughput(lambda: DealSnapshotForm.model_validate(deal), 1, runs),
+        "single_json": throughput(lambda: DealSnapshotForm.model_validate_json(raw), 1, runs),
+        "batch_python": throughput(lambda: adapter.validate_python(batch), len(batch), max(runs // 2, 1)),
+        "batch_json_loop": throughput(
+            lambda: [DealSnapshotForm.model_validate_json(r) for r in batch_raw], len(batch), max(runs // 2, 1),
+        ),
+        "sections_cold": timed(cold_validator, runs),
+        "sections_warm": timed(lambda: warm.assemble(sections), runs),
+    }
+
+def bench_serialization(payload: DealSnapshotForm, runs: int) -> Dict[str, Any]:
+    return {
+        "model_dump_json": timed(lambda: payload.model_dump_json(indent=2), runs),
+        "model_dump_json_compact": timed(payload.model_dump_json, runs),
+        "snapshot_to_bytes": timed(lambda: snapshot_to_bytes(payload), runs),
+        "to_json_bytes(model_dump)": timed(lambda: to_json_bytes(payload.model_dump(mode="json")), runs),
+        "payload_bytes": len(snapshot_to_bytes(payload)),
+    }
+
+def scratch_dir(prefix: str) -> str:
+    # The app's deal store and draft journal go to a temp dir, so benchmark
+    # sessions never touch the operator's files (synthetic drafts would show
+    # up under "Recover Draft"). The dir is removed at exit: registered before
+    # the app's journal registers its own atexit close, it outlives the
+    # journal's final flush.
+    tmp = tempfile.mkdtemp(prefix=prefix)
+    atexit.register(shutil.rmtree, tmp, True)
+    os.environ["DEALSNAP_STORE"] = os.path.join(tmp, "deals.sqlite3")
+    os.environ["DEALSNAP_DRAFTS"] = os.path.join(tmp, "drafts.ndjson")
+    return tmp
+
+# ---- results ----
+def environment() -> Dict[str, Any]:
+    try:
+        rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                             capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        rev = None
+    return {
+        "git_rev": rev,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pydantic": pydantic.VERSION,
+        "streamlit": st.__version__,
+        "machine": platform.machine(),
+    }
+
+def flatten_ms(results: Dict[str, Any], prefix: str = "") -> Dict[str, float]:
+    flat = {}
+    for key, value in results.items():
+        if isinstance(value, dict):
+            flat.update(flatten_ms(value, f"{prefix}{key}."))
+        elif key.endswith("_ms") and isinstance(value, (int, float)):
+            flat[prefix + key] = value
+    return flat
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any]) -> Dict[str, float]:
+    # metric -> new / old (above 1.0 is slower); median timings only.
+    new, old = flatten_ms(results["results"]), flatten_ms(baseline["results"])
+    return {k: round(new[k] / old[k], 3) for k in new if k.endswith("median_ms") and old.get(k)}
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark reruns, validation, serialization and summary rendering.")
+    parser.add_argument("--loans", type=int, default=4)
+    parser.add_argument("--applicants", type=int, default=2)
+    parser.add_argument("--guarantors", type=int, default=1)
+    parser.add_argument("--incomes", type=int, default=40)
+    parser.add_argument("--expenses", type=int, default=10)
+    parser.add_argument("--securities", type=int, default=5)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--batch", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--skip-app", action="store_true", help="skip the AppTest benchmarks")
+    parser.add_argument("-o", "--output", help="write results JSON here (default: stdout)")
+    parser.add_argument("--compare", help="earlier results JSON to compare against")
+    args = parser.parse_args()
+
+    shape = dict(loans=args.loans, applicants=args.applicants, guarantors=args.guarantors,
+                 incomes=args.incomes, expenses=args.expenses, securities=args.securities)
+    deal = make_deal(random.Random(args.seed), **shape)
+    raw = json.dumps(deal).encode("utf-8")
+    payload = DealSnapshotForm.model_validate(deal)
+    batch = list(iter_deals(args.batch, seed=args.seed + 1, **shape))
+
+    results: Dict[str, Any] = {
+        "validation": bench_validation(deal, raw, batch, args.runs),
+        "serialization": bench_serialization(payload, args.runs),
+        "summarize_submission": timed(lambda: summarize_submission(payload), args.runs),
+    }
+    if not args.skip_app:
+        scratch_dir("dealsnap-bench-")
+        results["render_submission_summary"] = bench_render_summary(raw, args.runs)
+        results["app"] = bench_app(raw, args.runs)
+
+    report: Dict[str, Any] = {"environment": environment(), "shape": shape, "runs": args.runs,
+                              "batch": args.batch, "results": results}
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as fh:
+            baseline = json.load(fh)
+        report["compare"] = {"baseline": args.compare, "ratios": compare(report, baseline)}
+        if (baseline.get("shape"), baseline.get("batch")) != (shape, args.batch):
+            report["compare"]["warning"] = "baseline was taken with a different shape or batch size"
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    print(text)
+
+if __name__ == "__main__":
+    main()
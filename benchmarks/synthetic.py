@@ -0,0 +1,128 @@
+# benchmarks/synthetic.py
+# ----------------------------- #
+# Reproducible synthetic deal generator
+# ----------------------------- #
+from __future__ import annotations
+
+import random
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterator
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from dealsnap.models import CitizenshipStatus, CustomerStatus, DealSnapshotForm, LoanProduct, YesNo
+
+FIRST_NAMES = ["Ann", "Bob", "Chen", "Dana", "Eli", "Fatima", "Grace", "Hiro", "Ivan", "Jade", "Kofi", "Lena"]
+LAST_NAMES = ["Lee", "Nguyen", "Smith", "Patel", "Kowalski", "Rossi", "Okafor", "Tanaka", "Brown", "Garcia"]
+BROKERS = ["Acme Finance", "Harbour Lending", "Summit Brokers", "Northside Mortgages", "MRU Desk"]
+STREETS = ["Main St", "High St", "George St", "Station Rd", "Beach Rd", "Park Ave"]
+SUBURBS = ["Parramatta NSW", "Fitzroy VIC", "Toowong QLD", "Subiaco WA", "Glenelg SA"]
+FREQUENCIES = ["Annual", "Monthly", "Fortnightly", "Weekly"]
+EXPENSE_CATEGORIES = ["Living", "Childcare", "Transport", "Insurance", "Education"]
+
+def make_deal(
+    rng: random.Random,
+    loans: int = 1,
+    applicants: int = 2,
+    guarantors: int = 0,
+    incomes: int = 2,
+    expenses: int = 1,
+    securities: int = 1,
+) -> Dict[str, Any]:
+    people = [f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}" for _ in range(applicants)]
+    submitted = date(2020, 1, 1) + timedelta(days=rng.randrange(6 * 365))
+    return {
+        "application_summary": {
+            "submission_date": submitted.isoformat(),
+            "lender_id": f"LND-{rng.randrange(10**7):07d}",
+            "LVR": round(rng.uniform(0.5, 0.95), 2),
+            "broker_name": rng.choice(BROKERS),
+            "lmi_required": rng.choice(["Yes", "No"]),
+            "broker_or_MRU": rng.choice(["Broker", "MRU"]),
+        },
+        "loan_section": {
+            "number_of_loans": loans,
+            "loans": [
+                {
+                    "loan_amount": float(rng.randrange(100, 1500) * 1000),
+                    "loan_product": rng.choice(list(LoanProduct)).value,
+                    "repayment_type": rng.choice(["Principal & Interest", "Interest Only"]),
+                    "loan_term_years": rng.choice([20, 25, 30]),
+                    "interest_rate": round(rng.uniform(5.0, 7.5), 2),
+                }
+                for _ in range(loans)
+            ],
+            "loan_purpose_notes": "Purchase of owner-occupied residence with refinance of existing debts.",
+        },
+        "applicant_section": {
+            "number_of_applicants": applicants,
+            "number_of_guarantors": guarantors,
+            "applicants": [
+                {
+                    "name": name,
+                    "customer_number": f"C{rng.randrange(10**8):08d}",
+                    "dob": (date(1960, 1, 1) + timedelta(days=rng.randrange(40 * 365))).isoformat(),
+                    "customer_status": rng.choice(list(CustomerStatus)).value,
+                    "citizenship_status": rng.choice(list(CitizenshipStatus)).value,
+                    "vevo_check_completed": rng.choice(list(YesNo)).value,
+                    "number_of_dependents": rng.randrange(4),
+                }
+                for name in people
+            ],
+            "guarantors": [
+                {"name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"} for _ in range(guarantors)
+            ],
+            "alerts_narratives_details": "No adverse credit history; stable employment confirmed by payslips.",
+        },
+        "income_section": {
+            "number_of_incomes": incomes,
+            "incomes": [
+                {
+                    "applicant": rng.choice(people) if people else "",
+                    "income_type": rng.choice(["Salary", "Rental", "Self-employed", "Bonus"]),
+                    "income_frequency": rng.choice(FREQUENCIES),
+                    "annual_amount": float(rng.randrange(20, 250) * 1000),
+                    "flags": rng.choice(["", "Casual under 12 months", "Overtime included"]),
+                }
+                for _ in range(incomes)
+            ],
+            "income_summary": "Base salary verified against two recent payslips and employer letter.",
+        },
+        "expense_section": {
+            "number_of_households": expenses,
+            "households": [
+                {
+                    "expense_category": rng.choice(EXPENSE_CATEGORIES),
+                    "monthly_amount": float(rng.randrange(500, 6000)),
+                    "commentary": rng.choice(["", "Declared below HEM; HEM applied"]),
+                }
+                for _ in range(expenses)
+            ],
+        },
+        "asset_liability_section": {"ccr_complete": "Yes", "commentary": "Credit card limit to be reduced."},
+        "security_section": {
+            "securities": [
+                {
+                    "address": f"{rng.randrange(1, 300)} {rng.choice(STREETS)}, {rng.choice(SUBURBS)}",
+                    "property_purpose": rng.choice(["Owner Occupied", "Investment"]),
+                    "purchase_price": float(rng.randrange(300, 2500) * 1000),
+                    "valuation_amount": float(rng.randrange(300, 2500) * 1000),
+                    "valuation_risk_alerts": rng.choice(["", "High density postcode"]),
+                }
+                for _ in range(securities)
+            ],
+        },
+        "hgs_block": {"first_home_buyer": rng.choice(["Yes", "No"])} if rng.random() < 0.2 else None,
+        "lmi_block": {"lmi_provider": "Helia", "lmi_calculation": "4120.00"} if rng.random() < 0.3 else None,
+    }
+
+def iter_deals(count: int, seed: int = 0, **shape: int) -> Iterator[Dict[str, Any]]:
+    rng = random.Random(seed)
+    for _ in range(count):
+        yield make_deal(rng, **shape)
+
+def iter_snapshots(count: int, seed: int = 0, **shape: int) -> Iterator[DealSnapshotForm]:
+    for deal in iter_deals(count, seed, **shape):
+        yield DealSnapshotForm.model_validate(deal)
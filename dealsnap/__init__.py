@@ -0,0 +1,4 @@
+# dealsnap/__init__.py
+# ----------------------------- #
+# Deal snapshot models and tooling
+# ----------------------------- #
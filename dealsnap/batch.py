@@ -0,0 +1,132 @@
+# dealsnap/batch.py
+# ----------------------------- #
+# Headless batch validation CLI
+# ----------------------------- #
+#
+#   python -m dealsnap.batch archive/                  # every *.json under a directory
+#   python -m dealsnap.batch "exports/2024-*/*.json"   # a glob
+#   python -m dealsnap.batch backbook.ndjson -j 16     # one snapshot per line
+#
+# One NDJSON result per record is streamed to stdout (or --output), in input order.
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, TextIO, Tuple
+
+from pydantic import ValidationError
+
+from dealsnap import migrations
+from dealsnap.sources import Task, chunked, expand_sources, iter_tasks
+
+# ===========================
+# Worker side
+# ===========================
+def validate_task(task: Task) -> Dict[str, Any]:
+    source, line_no, raw = task
+    result: Dict[str, Any] = {"source": source}
+    if line_no is not None:
+        result["line"] = line_no
+    try:
+        if raw is None:
+            with open(source, "rb") as fh:
+                raw = fh.read()
+        migrations.validate_json(raw)
+    except ValidationError as ve:
+        result["ok"] = False
+        result["errors"] = ve.errors(include_url=False, include_context=False)
+    except migrations.StepError as e:
+        result["ok"] = False
+        result["errors"] = [{"type": "value_error", "loc": list(e.loc), "msg": str(e)}]
+    except migrations.MigrationError as e:
+        result["ok"] = False
+        result["errors"] = [{"type": "schema_version", "loc": [], "msg": str(e)}]
+    except UnicodeDecodeError as e:
+        result["ok"] = False
+        result["errors"] = [{"type": "encoding_error", "loc": [], "msg": f"not UTF-8 JSON: {e}"}]
+    except ValueError as e:
+        result["ok"] = False
+        result["errors"] = [{"type": "json_invalid", "loc": [], "msg": str(e)}]
+    except OSError as e:
+        result["ok"] = False
+        result["errors"] = [{"type": "io_error", "loc": [], "msg": str(e)}]
+    else:
+        result["ok"] = True
+    return result
+
+def validate_chunk(chunk: List[Task]) -> List[Tuple[bool, str]]:
+    # Results are encoded in the worker so the parent only has to write lines.
+    out = []
+    for task in chunk:
+        result = validate_task(task)
+        out.append((result["ok"], json.dumps(result, ensure_ascii=False, default=str)))
+    return out
+
+# ===========================
+# Driver
+# ===========================
+def run_batch(tasks: Iterable[Task], workers: int = 0, chunksize: int = 256) -> Iterator[Tuple[bool, str]]:
+    workers = workers or os.cpu_count() or 1
+    chunks = chunked(tasks, chunksize)
+    if workers == 1:
+        for chunk in chunks:
+            yield from validate_chunk(chunk)
+        return
+
+    # Keep a bounded window of in-flight chunks so memory stays flat on huge inputs
+    # while results still come back in input order.
+    max_pending = workers * 4
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending: deque = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(validate_chunk, chunk))
+            if len(pending) >= max_pending:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+def write_results(results: Iterable[Tuple[bool, str]], out: TextIO) -> Tuple[int, int]:
+    total = failed = 0
+    for ok, line in results:
+        total += 1
+        if not ok:
+            failed += 1
+        out.write(line)
+        out.write("\n")
+    out.flush()
+    return total, failed
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m dealsnap.batch",
+        description="Validate deal snapshots against DealSnapshotForm and stream NDJSON results.",
+    )
+    parser.add_argument("sources", nargs="+", help="Directories, globs, .json files or .ndjson/.jsonl files")
+    parser.add_argument("-o", "--output", help="Write NDJSON results here instead of stdout")
+    parser.add_argument("-j", "--workers", type=int, default=0, help="Worker processes (default: CPU count)")
+    parser.add_argument("--chunksize", type=int, default=256, help="Records per worker task (default: 256)")
+    return parser
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.workers < 0 or args.chunksize < 1:
+        print("--workers must be >= 0 and --chunksize >= 1", file=sys.stderr)
+        return 2
+
+    tasks = iter_tasks(expand_sources(args.sources))
+    results = run_batch(tasks, workers=args.workers, chunksize=args.chunksize)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as out:
+            total, failed = write_results(results, out)
+    else:
+        total, failed = write_results(results, sys.stdout)
+
+    print(f"validated {total} record(s): {total - failed} passed, {failed} failed", file=sys.stderr)
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
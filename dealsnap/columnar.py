@@ -0,0 +1,441 @@
+# dealsnap/columnar.py
+# ----------------------------- #
+# Columnar export (Arrow IPC) + memory-mapped reader
+# ----------------------------- #
+#
+#   python -m dealsnap.columnar --store dealsnap.sqlite3 -o analytics/
+#   python -m dealsnap.columnar archive/ backbook.ndjson -o analytics/
+#
+# Snapshots are flattened into one parent table and one table per repeated
+# section, all keyed by deal_id:
+#
+#   deals        one row per deal: every scalar field, as "section.field" columns
+#   loans, applicants, guarantors, incomes, households, securities
+#                one row per list item: deal_id, position, then the item's fields
+#
+# Columns and types come from the Pydantic models, so a new model field is a new
+# column. Each table is a directory of uncompressed Arrow IPC files
+# (<out>/<table>/part-000001.arrow); an export only ever adds part files, and
+# manifest.json (replaced atomically, last) lists the committed ones, so a
+# crashed export leaves the previous state readable. Uncompressed IPC files are
+# read through a memory map without copying: a column scan touches only that
+# column's pages.
+#
+# Runs are incremental: from a store, deals written since the last export (by
+# the store's change sequence); from files, files that are new or changed since
+# they were exported. Each part records a fingerprint of every table's schema;
+# parts written under an older model are conformed to the current columns when
+# read (added columns come back null). A deal that is
+# exported again (a resubmission) supersedes its earlier rows, which the
+# reader drops unless asked for every version. Deals deleted from the store
+# stay in the export.
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import typing
+from datetime import datetime, timezone
+from enum import Enum
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from dealsnap.models import DealSnapshotForm, SnapshotBaseModel
+
+MANIFEST = "manifest.json"
+PART_DEALS = 50_000           # deals per part file (bounds memory while exporting)
+BATCH_ROWS = 65_536           # rows per record batch inside a part
+
+class ColumnarExportError(ValueError):
+    pass
+
+# ===========================
+# Schema (from the models)
+# ===========================
+def _arrow_type(annotation: Any) -> pa.DataType:
+    args = [a for a in typing.get_args(annotation) if a is not type(None)]
+    if typing.get_origin(annotation) is typing.Union:
+        if len(args) > 1:
+            return pa.float64()     # Union[str, float] (LVR, LMI calculation): numeric or null
+        annotation = args[0]
+    if isinstance(annotation, type) and issubclass(annotation, Enum):
+        return pa.int64() if issubclass(annotation, int) else pa.string()
+    return {bool: pa.bool_(), int: pa.int64(), float: pa.float64()}.get(annotation, pa.string())
+
+def _model_of(annotation: Any) -> Optional[type]:
+    for candidate in (annotation, *typing.get_args(annotation)):
+        if isinstance(candidate, type) and issubclass(candidate, SnapshotBaseModel):
+            return candidate
+    return None
+
+def _build_schemas() -> Tuple[Dict[str, pa.Schema], Dict[str, Tuple[str, str]]]:
+    # -> ({table: schema}, {child table: (section, list field)})
+    parent = [pa.field("deal_id", pa.string(), nullable=False), pa.field("saved_at", pa.string()),
+              pa.field("schema_version", pa.int64())]
+    children: Dict[str, pa.Schema] = {}
+    child_paths: Dict[str, Tuple[str, str]] = {}
+    for section, info in DealSnapshotForm.model_fields.items():
+        model = _model_of(info.annotation)
+        if model is None:
+            continue
+        for name, field in model.model_fields.items():
+            if typing.get_origin(field.annotation) in (list, List):
+                item = typing.get_args(field.annotation)[0]
+                children[name] = pa.schema(
+                    [pa.field("deal_id", pa.string(), nullable=False), pa.field("position", pa.int32(), nullable=False)]
+                    + [pa.field(k, _arrow_type(f.annotation)) for k, f in item.model_fields.items()]
+                )
+                child_paths[name] = (section, name)
+            else:
+                parent.append(pa.field(f"{section}.{name}", _arrow_type(field.annotation)))
+    return {"deals": pa.schema(parent), **children}, child_paths
+
+def schema_fingerprint(schema: pa.Schema) -> str:
+    fields = [[field.name, str(field.type), field.nullable] for field in schema]
+    return hashlib.sha1(json.dumps(fields).encode("utf-8")).hexdigest()[:16]
+
+SCHEMAS, CHILD_PATHS = _build_schemas()
+TABLES = tuple(SCHEMAS)
+FINGERPRINTS = {table: schema_fingerprint(schema) for table, schema in SCHEMAS.items()}
+
+def _to_float(value: Any) -> Optional[float]:
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(str(value).replace(",", ""))
+    except ValueError:
+        return None
+
+def _to_int(value: Any) -> Optional[int]:
+    number = _to_float(value)
+    return int(number) if number is not None and number.is_integer() else None
+
+def _to_str(value: Any) -> Optional[str]:
+    return None if value is None else value if isinstance(value, str) else json.dumps(value)
+
+def _to_bool(value: Any) -> Optional[bool]:
+    return value if isinstance(value, bool) else None
+
+_CONVERT: Dict[pa.DataType, Callable[[Any], Any]] = {
+    pa.float64(): _to_float, pa.int64(): _to_int, pa.int32(): _to_int, pa.string(): _to_str, pa.bool_(): _to_bool,
+}
+
+# ===========================
+# Flattening
+# ===========================
+class _Builder:
+    # Column lists for every table, filled one deal at a time.
+    def __init__(self):
+        self.deals = 0
+        self.columns: Dict[str, Dict[str, List[Any]]] = {
+            table: {name: [] for name in schema.names} for table, schema in SCHEMAS.items()
+        }
+        self._parent = [
+            (name.split(".", 1), _CONVERT[SCHEMAS["deals"].field(name).type], values)
+            for name, values in self.columns["deals"].items() if "." in name
+        ]
+        self._children = [
+            (CHILD_PATHS[table], [(name, _CONVERT[schema.field(name).type], self.columns[table][name])
+                                  for name in schema.names[2:]], self.columns[table])
+            for table, schema in SCHEMAS.items() if table != "deals"
+        ]
+
+    def add(self, deal_id: str, saved_at: Optional[str], data: Dict[str, Any]) -> None:
+        self.deals += 1
+        columns = self.columns["deals"]
+        columns["deal_id"].append(deal_id)
+        columns["saved_at"].append(saved_at)
+        columns["schema_version"].append(_to_int(data.get("schema_version")))
+        for (section, name), convert, values in self._parent:
+            values.append(convert((data.get(section) or {}).get(name)))
+        for (section, name), fields, columns in self._children:
+            items = (data.get(section) or {}).get(name) or []
+            for position, item in enumerate(items):
+                if not isinstance(item, dict):
+                    continue
+                columns["deal_id"].append(deal_id)
+                columns["position"].append(position)
+                for field, convert, values in fields:
+                    values.append(convert(item.get(field)))
+
+    def tables(self) -> Dict[str, pa.Table]:
+        return {
+            table: pa.table({name: pa.array(values, type=SCHEMAS[table].field(name).type)
+                             for name, values in columns.items()}, schema=SCHEMAS[table])
+            for table, columns in self.columns.items()
+        }
+
+# ===========================
+# Writing
+# ===========================
+def _part_path(root: str, table: str, part: int) -> str:
+    return os.path.join(root, table, f"part-{part:06d}.arrow")
+
+def _write_atomic(path: str, write: Callable[[str], None]) -> None:
+    tmp = path + ".tmp"
+    write(tmp)
+    os.replace(tmp, path)
+
+def _write_table(path: str, table: pa.Table) -> None:
+    def write(tmp: str) -> None:
+        with pa.OSFile(tmp, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table, max_chunksize=BATCH_ROWS)
+    _write_atomic(path, write)
+
+class ColumnarExport:
+    # Appends part files to an export directory and commits them in its
+    # manifest. Records are buffered PART_DEALS deals at a time; a deal seen
+    # twice before a flush keeps its last version.
+    def __init__(self, root: str, part_deals: int = PART_DEALS):
+        self.root = root
+        self.part_deals = part_deals
+        self.manifest = read_manifest(root)
+        self._pending: Dict[str, Tuple[Optional[str], Dict[str, Any]]] = {}
+        self.written = 0
+
+    def add(self, deal_id: str, saved_at: Optional[str], data: Dict[str, Any]) -> None:
+        self._pending.pop(deal_id, None)
+        self._pending[deal_id] = (saved_at, data)
+        if len(self._pending) >= self.part_deals:
+            self.flush()
+
+    def flush(self) -> None:
+        # Writes the buffered deals as the next part of every table, then the
+        # manifest. Also commits manifest-only changes (watermark, files).
+        if self._pending:
+            builder = _Builder()
+            for deal_id, (saved_at, data) in self._pending.items():
+                builder.add(deal_id, saved_at, data)
+            part = self.manifest["parts"][-1]["part"] + 1 if self.manifest["parts"] else 1
+            tables = builder.tables()
+            for table, data in tables.items():
+                os.makedirs(os.path.join(self.root, table), exist_ok=True)
+                _write_table(_part_path(self.root, table, part), data)
+            self.manifest["parts"].append({
+                "part": part,
+                "rows": {table: data.num_rows for table, data in tables.items()},
+                "schemas": dict(FINGERPRINTS),
+                "written_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            })
+            self.written += builder.deals
+            self._pending = {}
+        write_manifest(self.root, self.manifest)
+
+def read_manifest(root: str) -> Dict[str, Any]:
+    try:
+        with open(os.path.join(root, MANIFEST), encoding="utf-8") as fh:
+            manifest = json.load(fh)
+    except FileNotFoundError:
+        return {"tables": list(TABLES), "parts": [], "watermark": None, "files": {}}
+    if not isinstance(manifest, dict) or not isinstance(manifest.get("parts"), list):
+        raise ColumnarExportError(f"{root}/{MANIFEST} is not a columnar export manifest")
+    # Tables and columns may have changed since earlier parts were written;
+    # each part carries its own schema fingerprints and the reader conforms it.
+    manifest["tables"] = list(TABLES)
+    return manifest
+
+def write_manifest(root: str, manifest: Dict[str, Any]) -> None:
+    os.makedirs(root, exist_ok=True)
+
+    def write(tmp: str) -> None:
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(manifest, fh, indent=1)
+    _write_atomic(os.path.join(root, MANIFEST), write)
+
+# ===========================
+# Sources
+# ===========================
+def export_store(store, root: str, part_deals: int = PART_DEALS) -> int:
+    # Deals written since the last store export. The watermark is the store's
+    # change sequence (DealStore.change_seq), which every write batch bumps,
+    # so deals saved in the same second as the last export are never lost.
+    # An older saved_at watermark can't be mapped onto it: such an export is
+    # topped up with every deal once (the re-exported rows supersede the old).
+    from dealsnap.migrations import migrate
+
+    export = ColumnarExport(root, part_deals)
+    since = (export.manifest.get("watermark") or {}).get("change_seq")
+    latest = since
+    for deal_id, seq, saved_at, payload in store.payloads(since=since):
+        export.add(deal_id, saved_at, migrate(json.loads(payload)))
+        latest = seq
+    export.manifest["watermark"] = {"change_seq": latest} if latest is not None else None
+    export.flush()
+    return export.written
+
+def export_files(sources: Sequence[str], root: str, part_deals: int = PART_DEALS) -> Tuple[int, int]:
+    # New or changed files (by size and mtime); each record is migrated and
+    # validated first. Returns (deals exported, records skipped as invalid).
+    from pydantic import ValidationError
+
+    from dealsnap.sources import expand_sources, iter_tasks
+    from dealsnap.migrations import migrate_json
+    from dealsnap.store import deal_id_for
+
+    export = ColumnarExport(root, part_deals)
+    done: Dict[str, List[int]] = export.manifest.setdefault("files", {})
+    skipped = 0
+    for path in expand_sources(sources):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            skipped += 1
+            continue
+        key = os.path.abspath(path)
+        if done.get(key) == [stat.st_size, stat.st_mtime_ns]:
+            continue
+        for source, _, raw in iter_tasks([path]):
+            try:
+                if raw is None:
+                    with open(source, "rb") as fh:
+                        raw = fh.read()
+                snapshot = DealSnapshotForm.model_validate(migrate_json(raw))
+            except (ValidationError, ValueError, OSError):
+                skipped += 1
+                continue
+            export.add(deal_id_for(snapshot), None, snapshot.model_dump(mode="json"))
+        # Marked done with the next flush, so a crash before it re-exports the file.
+        done[key] = [stat.st_size, stat.st_mtime_ns]
+    export.flush()
+    return export.written, skipped
+
+# ===========================
+# Reading (memory-mapped)
+# ===========================
+def read_part(path: str, columns: Optional[Sequence[str]] = None) -> pa.Table:
+    # Zero-copy: the table's buffers point into the memory map.
+    source = pa.memory_map(path, "r")
+    table = pa.ipc.open_file(source).read_all()
+    return table.select(list(columns)) if columns is not None else table
+
+def conform_part(path: Optional[str], table: str, columns: Sequence[str]) -> pa.Table:
+    # A part written under an older schema, as the current schema's `columns`:
+    # columns it lacks come back null, and ones whose type changed are cast
+    # (a cast that can't be made safely is an error). path=None is a table
+    # that didn't exist yet when the part was written.
+    schema = pa.schema([SCHEMAS[table].field(name) for name in columns])
+    if path is None:
+        return schema.empty_table()
+    part = read_part(path)
+    arrays = []
+    for field in schema:
+        if field.name not in part.column_names:
+            arrays.append(pa.nulls(part.num_rows, field.type))
+            continue
+        column = part.column(field.name)
+        try:
+            arrays.append(column if column.type == field.type else column.cast(field.type))
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError) as e:
+            raise ColumnarExportError(
+                f"{path}: column {field.name!r} is {column.type}, which can't be read as {field.type} ({e})"
+            ) from e
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+class ColumnarArchive:
+    # Read side of an export directory. Tables are assembled from the parts
+    # listed in the manifest without copying; with latest=True (the default)
+    # rows of superseded deal versions are filtered out.
+    def __init__(self, root: str):
+        self.root = root
+        self.manifest = read_manifest(root)
+        self.parts = [p["part"] for p in self.manifest["parts"]]
+        self._schemas = [p.get("schemas") or {} for p in self.manifest["parts"]]
+        self._tables = [set(p.get("rows") or TABLES) for p in self.manifest["parts"]]
+        self._superseded: Optional[List[Optional[pa.Array]]] = None
+
+    @property
+    def tables(self) -> Tuple[str, ...]:
+        return TABLES
+
+    def schema(self, table: str) -> pa.Schema:
+        return SCHEMAS[table]
+
+    def superseded(self) -> List[Optional[pa.Array]]:
+        # Per part: deal IDs exported again in a later part (None when none are).
+        if self._superseded is None:
+            later: Set[str] = set()
+            out: List[Optional[pa.Array]] = []
+            for part in reversed(self.parts):
+                ids = read_part(_part_path(self.root, "deals", part), ["deal_id"]).column(0).to_pylist()
+                dropped = later.intersection(ids)
+                out.append(pa.array(sorted(dropped), pa.string()) if dropped else None)
+                later.update(ids)
+            self._superseded = out[::-1]
+        return self._superseded
+
+    def _read(self, index: int, name: str, columns: Optional[List[str]]) -> pa.Table:
+        # Parts written under the current schema are read as-is (zero-copy);
+        # older ones are conformed to it.
+        part = self.parts[index]
+        if self._schemas[index].get(name) == FINGERPRINTS[name]:
+            return read_part(_part_path(self.root, name, part), columns)
+        path = _part_path(self.root, name, part) if name in self._tables[index] else None
+        return conform_part(path, name, columns if columns is not None else SCHEMAS[name].names)
+
+    def table(self, name: str, columns: Optional[Sequence[str]] = None, latest: bool = True) -> pa.Table:
+        if name not in SCHEMAS:
+            raise ColumnarExportError(f"unknown table {name!r} (use {', '.join(TABLES)})")
+        wanted = list(columns) if columns is not None else None
+        unknown = [c for c in wanted or () if c not in SCHEMAS[name].names]
+        if unknown:
+            raise ColumnarExportError(f"table {name!r} has no column(s) {', '.join(unknown)}")
+        read = wanted if wanted is None or "deal_id" in wanted or not latest else ["deal_id", *wanted]
+        pieces = []
+        for index, dropped in enumerate(self.superseded() if latest else [None] * len(self.parts)):
+            piece = self._read(index, name, read)
+            if dropped is not None:
+                piece = piece.filter(pc.invert(pc.is_in(piece.column("deal_id"), value_set=dropped)))
+            pieces.append(piece.select(wanted) if wanted is not None else piece)
+        if not pieces:
+            schema = SCHEMAS[name]
+            return schema.empty_table().select(wanted) if wanted is not None else schema.empty_table()
+        return pa.concat_tables(pieces)
+
+    def deal_count(self) -> int:
+        return self.table("deals", ["deal_id"]).num_rows
+
+# ===========================
+# CLI
+# ===========================
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m dealsnap.columnar",
+        description="Export deals to columnar Arrow tables (deals + one table per repeated section), incrementally.",
+    )
+    parser.add_argument("sources", nargs="*", help="Directories, globs, .json files or .ndjson/.jsonl files")
+    parser.add_argument("--store", help="Export the deals in this deal store instead of files")
+    parser.add_argument("-o", "--output", required=True, help="Export directory (created or appended to)")
+    parser.add_argument("--part-deals", type=int, default=PART_DEALS,
+                        help=f"Deals per part file (default: {PART_DEALS})")
+    return parser
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    if bool(args.store) == bool(args.sources):
+        print("give either --store or file sources", file=sys.stderr)
+        return 2
+    try:
+        if args.store:
+            from dealsnap.store import DealStore
+
+            store = DealStore(args.store)
+            written, skipped = export_store(store, args.output, args.part_deals), 0
+            store.close()
+        else:
+            written, skipped = export_files(args.sources, args.output, args.part_deals)
+    except ColumnarExportError as e:
+        print(str(e), file=sys.stderr)
+        return 2
+    archive = ColumnarArchive(args.output)
+    print(f"exported {written} deal(s) ({skipped} invalid record(s) skipped); "
+          f"{len(archive.parts)} part(s), {archive.deal_count()} deal(s) in {args.output}", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
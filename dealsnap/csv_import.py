@@ -0,0 +1,134 @@
+# dealsnap/csv_import.py
+# ----------------------------- #
+# Bulk CSV import of income and expense lines (no UI)
+# ----------------------------- #
+# Columns are matched to IncomeLine / ExpenseLine field names, ignoring case,
+# spaces and dashes ("Annual Amount" -> annual_amount). Amount columns are
+# parsed and frequency-normalized column-wise:
+#   income:  `amount` (or `annual_amount`) at `income_frequency` (or `frequency`);
+#            stored as stated, frequency canonicalized ("wk" rows stay weekly).
+#   expense: `monthly_amount`, or `amount` at `frequency`, converted to monthly.
+from __future__ import annotations
+
+import csv
+import io
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from pydantic import ValidationError
+
+from dealsnap.frequency import FREQUENCIES, canonical_frequency, is_known_frequency, to_monthly
+from dealsnap.models import ExpenseLine, IncomeLine
+
+class CSVImportError(ValueError):
+    # Raised with every problem found, one per line, "line N: ..." where N is the
+    # row's line number in the file (the header is usually line 1; blank lines
+    # count, so N matches what a spreadsheet or editor shows).
+    def __init__(self, problems: Sequence[str]):
+        self.problems = list(problems)
+        super().__init__("\n".join(self.problems))
+
+def normalize_header(name: str) -> str:
+    return "_".join(name.strip().lower().replace("-", " ").split())
+
+def read_columns(raw: bytes | str) -> Tuple[Dict[str, List[str]], List[int]]:
+    # CSV -> ({normalized header: column of raw strings}, line number of each
+    # data row). Blank rows are dropped after numbering, so error messages
+    # point at the right line.
+    text = raw.decode("utf-8-sig") if isinstance(raw, bytes) else raw
+    reader = csv.reader(io.StringIO(text))
+    rows, line_nos, start = [], [], 1
+    for row in reader:
+        if any(cell.strip() for cell in row):
+            rows.append(row)
+            line_nos.append(start)
+        start = reader.line_num + 1      # a quoted cell can span lines
+    if not rows:
+        raise CSVImportError(["empty CSV: expected a header row"])
+    header = [normalize_header(h) for h in rows[0]]
+    body = rows[1:]
+    width = len(header)
+    columns = list(zip(*(row[:width] + [""] * (width - len(row)) for row in body))) if body else [()] * width
+    return {name: list(col) for name, col in zip(header, columns) if name}, line_nos[1:]
+
+def parse_amounts(values: Sequence[str], column: str, line_nos: Sequence[int]) -> np.ndarray:
+    # "$1,234.50" -> 1234.5, "" -> 0; the whole column in one astype.
+    cleaned = np.char.strip(np.asarray(values, dtype=str))
+    for junk in ("$", ",", " "):
+        cleaned = np.char.replace(cleaned, junk, "")
+    cleaned = np.where(cleaned == "", "0", cleaned)
+    try:
+        amounts = cleaned.astype(float)
+    except ValueError:
+        bad = []
+        for i, value in enumerate(cleaned):
+            try:
+                float(value)
+            except ValueError:
+                bad.append(f"line {line_nos[i]}: {column} {values[i]!r} is not a number")
+        raise CSVImportError(bad) from None
+    # float() also reads "nan" and "inf".
+    infinite = np.flatnonzero(~np.isfinite(amounts))
+    if len(infinite):
+        raise CSVImportError([f"line {line_nos[i]}: {column} {values[i]!r} is not a number" for i in infinite])
+    return amounts
+
+def check_frequencies(values: Sequence[str], column: str, line_nos: Sequence[int]) -> None:
+    # An unrecognised frequency is an error, not silently Annual.
+    bad = [
+        f"line {line_nos[i]}: {column} {value!r} is not a frequency (use {', '.join(FREQUENCIES)})"
+        for i, value in enumerate(values) if not is_known_frequency(value)
+    ]
+    if bad:
+        raise CSVImportError(bad)
+
+def build_lines(model, columns: Dict[str, List[str]], line_nos: Sequence[int], overrides: Dict[str, Sequence]) -> List:
+    fields = [name for name in model.model_fields if name in columns and name not in overrides]
+    lines, problems = [], []
+    for i, line_no in enumerate(line_nos):
+        data = {name: columns[name][i].strip() or None for name in fields}
+        data.update({name: column[i] for name, column in overrides.items()})
+        try:
+            lines.append(model.model_validate(data))
+        except ValidationError as ve:
+            for err in ve.errors(include_url=False):
+                problems.append(f"line {line_no}: {'.'.join(map(str, err['loc']))}: {err['msg']}")
+    if problems:
+        raise CSVImportError(problems)
+    return lines
+
+def first_column(columns: Dict[str, List[str]], *names: str) -> Tuple[Optional[str], Optional[List[str]]]:
+    for name in names:
+        if name in columns:
+            return name, columns[name]
+    return None, None
+
+def read_income_csv(raw: bytes | str) -> List[IncomeLine]:
+    columns, line_nos = read_columns(raw)
+    if "applicant" not in columns:
+        raise CSVImportError(["missing required column: applicant"])
+    amount_name, amount_values = first_column(columns, "amount", "annual_amount")
+    if amount_name is None:
+        raise CSVImportError(["missing amount column: expected amount or annual_amount"])
+    frequency_name, frequencies = first_column(columns, "income_frequency", "frequency")
+    frequencies = frequencies or [""] * len(line_nos)
+    check_frequencies(frequencies, frequency_name or "income_frequency", line_nos)
+    amounts = parse_amounts(amount_values, amount_name, line_nos)
+    return build_lines(IncomeLine, columns, line_nos, {
+        "annual_amount": amounts.tolist(),
+        "income_frequency": [canonical_frequency(f) for f in frequencies],
+    })
+
+def read_expense_csv(raw: bytes | str) -> List[ExpenseLine]:
+    columns, line_nos = read_columns(raw)
+    if "monthly_amount" in columns:
+        monthly = parse_amounts(columns["monthly_amount"], "monthly_amount", line_nos)
+    elif "amount" in columns:
+        frequency_name, frequencies = first_column(columns, "frequency", "expense_frequency")
+        if frequencies:
+            check_frequencies(frequencies, frequency_name, line_nos)
+        frequencies = [f.strip() or "Monthly" for f in frequencies] if frequencies else ["Monthly"] * len(line_nos)
+        monthly = to_monthly(parse_amounts(columns["amount"], "amount", line_nos), frequencies)
+    else:
+        raise CSVImportError(["missing amount column: expected monthly_amount, or amount with frequency"])
+    return build_lines(ExpenseLine, columns, line_nos, {"monthly_amount": np.round(monthly, 2).tolist()})
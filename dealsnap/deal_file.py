@@ -0,0 +1,149 @@
+# dealsnap/deal_file.py
+# ----------------------------- #
+# Multi-deal files: streaming record index (no UI)
+# ----------------------------- #
+# Broker batches arrive as NDJSON (one snapshot per line) or as a JSON array of
+# snapshots, often hundreds of MB. index_deals() reads the file in chunks,
+# decodes one record at a time and keeps only its byte span and a few lookup
+# keys, so memory is one chunk plus one record whatever the file size. A
+# single plain snapshot file comes back as a one-record index. read_deal()
+# later seeks straight to the chosen record's bytes.
+from __future__ import annotations
+
+import codecs
+import json
+from typing import Any, BinaryIO, Iterator, List, NamedTuple, Optional, Tuple
+
+CHUNK_SIZE = 1 << 20
+MAX_RECORD_CHARS = 64 << 20    # a record this big is treated as malformed
+WHITESPACE = " \t\r\n"
+
+class DealFileError(ValueError):
+    pass
+
+class DealRecord(NamedTuple):
+    number: int             # 1-based position in the file
+    offset: int             # byte span of the record in the file
+    length: int
+    lender_id: str
+    submission_date: str
+    applicants: Tuple[str, ...]
+
+    @property
+    def label(self) -> str:
+        names = ", ".join(self.applicants) or "no applicants"
+        return f"#{self.number} · {self.lender_id or '?'} · {self.submission_date or '?'} · {names}"
+
+def _keys(data: Any) -> Tuple[str, str, Tuple[str, ...]]:
+    if not isinstance(data, dict):
+        return "", "", ()
+    summary = data.get("application_summary") or {}
+    people = (data.get("applicant_section") or {}).get("applicants") or []
+    names = tuple(p["name"] for p in people if isinstance(p, dict) and p.get("name"))
+    return str(summary.get("lender_id") or ""), str(summary.get("submission_date") or ""), names
+
+def iter_records(fh: BinaryIO, chunk_size: int = CHUNK_SIZE) -> Iterator[Tuple[int, int, Any]]:
+    # Yields (byte offset, byte length, decoded object) per top-level record of
+    # an NDJSON stream, a JSON array, or a lone JSON object. A record that isn't
+    # an object, or anything but whitespace after the array, is a
+    # DealFileError. Text is decoded
+    # incrementally and `base` (the byte offset of buf[pos]) is advanced by
+    # re-encoding only the text each record consumed, so the scan stays linear.
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    head = fh.read(len(codecs.BOM_UTF8))
+    base = len(codecs.BOM_UTF8) if head == codecs.BOM_UTF8 else 0
+    buf, pos, eof = utf8.decode(head[base:]), 0, False
+
+    def fill() -> bool:
+        # Keeps the unconsumed tail and at least doubles it, so retrying a
+        # record that spans chunks costs O(record size) overall.
+        nonlocal buf, pos, eof
+        if eof:
+            return False
+        chunk = fh.read(max(chunk_size, len(buf) - pos))
+        eof = not chunk
+        buf = buf[pos:] + utf8.decode(chunk, final=eof)
+        pos = 0
+        return True
+
+    def skip(chars: str) -> None:
+        # `chars` are all ASCII, so each one skipped is one byte.
+        nonlocal pos, base
+        while True:
+            start = pos
+            while pos < len(buf) and buf[pos] in chars:
+                pos += 1
+            base += pos - start
+            if pos < len(buf) or not fill():
+                return
+
+    skip(WHITESPACE)
+    if pos >= len(buf):
+        return
+    in_array = buf[pos] == "["
+    if in_array:
+        pos += 1
+        base += 1
+    separators = WHITESPACE + ("," if in_array else "")
+    while True:
+        skip(separators)
+        if pos >= len(buf):
+            if in_array:
+                raise DealFileError("JSON array is not closed")
+            return
+        if in_array and buf[pos] == "]":
+            pos += 1
+            base += 1
+            skip(WHITESPACE)
+            if pos < len(buf):
+                raise DealFileError(f"unexpected content after the JSON array at byte {base}")
+            return
+        while True:
+            try:
+                value, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError as e:
+                if len(buf) - pos < MAX_RECORD_CHARS and fill():
+                    continue
+                raise DealFileError(f"malformed record at byte {base}: {e.msg}") from None
+            # A number or literal can stop early at a chunk edge; only trust a
+            # record that ends before the buffer does (or at end of file).
+            if end == len(buf) and fill():
+                continue
+            break
+        if not isinstance(value, dict):
+            raise DealFileError(f"record at byte {base} is not a JSON object")
+        length = len(buf[pos:end].encode("utf-8"))
+        yield base, length, value
+        base += length
+        pos = end
+
+def index_deals(fh: BinaryIO, chunk_size: int = CHUNK_SIZE) -> List[DealRecord]:
+    records = []
+    for number, (offset, length, value) in enumerate(iter_records(fh, chunk_size), start=1):
+        records.append(DealRecord(number, offset, length, *_keys(value)))
+    return records
+
+def read_deal(fh: BinaryIO, record: DealRecord) -> bytes:
+    fh.seek(record.offset)
+    raw = fh.read(record.length)
+    if len(raw) != record.length:
+        raise DealFileError(f"record #{record.number} is truncated")
+    return raw
+
+def index_deal_file(path: str, chunk_size: int = CHUNK_SIZE) -> List[DealRecord]:
+    with open(path, "rb") as fh:
+        return index_deals(fh, chunk_size)
+
+def read_deal_file(path: str, record: DealRecord) -> bytes:
+    with open(path, "rb") as fh:
+        return read_deal(fh, record)
+
+def find_deals(records: List[DealRecord], text: str, limit: Optional[int] = None) -> List[DealRecord]:
+    # Case-insensitive match on lender ID, submission date or an applicant name.
+    text = text.strip().lower()
+    if not text:
+        return records[:limit]
+    hits = [r for r in records
+            if text in r.lender_id.lower() or text in r.submission_date or any(text in n.lower() for n in r.applicants)]
+    return hits[:limit]
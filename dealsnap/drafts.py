@@ -0,0 +1,198 @@
+# dealsnap/drafts.py
+# ----------------------------- #
+# Draft autosave journal (append-only, write-behind) (no UI)
+# ----------------------------- #
+# In-progress forms are kept in an append-only NDJSON journal, one line per
+# saved draft state, keyed by a draft ID (the browser session). save() only
+# records the latest state in memory; a background thread appends whatever
+# changed every `interval_s` in one write, so rapid edits collapse into a
+# single line and the render path never touches the disk. The newest line per
+# draft wins; a submitted or discarded draft gets a tombstone line. Once dead
+# lines outweigh live ones the journal is rewritten with only the latest
+# state of each open draft.
+from __future__ import annotations
+
+import atexit
+import json
+import os
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Mapping, NamedTuple, Optional
+
+DEFAULT_DRAFTS_PATH = os.environ.get("DEALSNAP_DRAFTS", "dealsnap_drafts.ndjson")
+
+class DraftRef(NamedTuple):
+    draft_id: str
+    lender_id: str
+    saved_at: str
+    offset: int
+    length: int
+
+    @property
+    def label(self) -> str:
+        return f"{self.lender_id or 'no lender ID'} · saved {self.saved_at[:19].replace('T', ' ')} UTC"
+
+def snapshot_data(sections: Mapping[str, Mapping[str, Any]]) -> Dict[str, Any]:
+    # Draft sections -> DealSnapshotForm-shaped dict (prefill input).
+    data = {name: dict(fields) for name, fields in sections.items() if name != "conditional_blocks"}
+    data.update(sections.get("conditional_blocks") or {})
+    return data
+
+class DraftJournal:
+    def __init__(self, path: str = DEFAULT_DRAFTS_PATH, interval_s: float = 2.0, compact_min_bytes: int = 1 << 20):
+        self.path = path
+        self.interval_s = interval_s
+        self.compact_min_bytes = compact_min_bytes
+        self._lock = threading.Lock()           # guards _pending and _index
+        self._io_lock = threading.Lock()        # one writer/compactor at a time
+        self._pending: Dict[str, Optional[Dict[str, Any]]] = {}   # None = tombstone
+        self._index: Dict[str, DraftRef] = {}
+        self._size = 0
+        self._wake = threading.Event()
+        self._closed = False
+        self._load_index()
+        self._writer = threading.Thread(target=self._run, name="draft-journal", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    # ---- render path (memory only) ----
+    def save(self, draft_id: str, sections: Mapping[str, Mapping[str, Any]]) -> None:
+        lender_id = str((sections.get("application_summary") or {}).get("lender_id") or "")
+        with self._lock:
+            self._pending[draft_id] = {"draft_id": draft_id, "lender_id": lender_id, "sections": dict(sections)}
+
+    def discard(self, draft_id: str) -> None:
+        with self._lock:
+            if draft_id in self._index or draft_id in self._pending:
+                self._pending[draft_id] = None
+
+    # ---- lookups ----
+    def latest(self, draft_id: str) -> Optional[DraftRef]:
+        with self._lock:
+            return self._index.get(draft_id)
+
+    def find(self, text: str = "", limit: int = 20) -> List[DraftRef]:
+        # Open drafts, newest first; `text` matches a draft ID or lender ID.
+        text = text.strip().lower()
+        with self._lock:
+            refs = [r for r in self._index.values()
+                    if not text or r.draft_id.lower().startswith(text) or text in r.lender_id.lower()]
+        return sorted(refs, key=lambda r: r.saved_at, reverse=True)[:limit]
+
+    def load(self, ref: DraftRef) -> Dict[str, Any]:
+        # Raises KeyError if the draft was compacted away since `ref` was taken.
+        with self._io_lock:
+            current = self.latest(ref.draft_id)
+            if current is None:
+                raise KeyError(ref.draft_id)
+            with open(self.path, "rb") as fh:
+                fh.seek(current.offset)
+                entry = json.loads(fh.read(current.length))
+        return entry["sections"]
+
+    # ---- writer thread ----
+    def flush(self) -> None:
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        saved_at = datetime.now(timezone.utc).isoformat(timespec="milliseconds")
+        with self._io_lock:
+            lines, refs, offset = [], {}, self._size
+            for draft_id, entry in pending.items():
+                record = {"draft_id": draft_id, "deleted": True} if entry is None else {**entry, "saved_at": saved_at}
+                line = json.dumps(record, separators=(",", ":"), ensure_ascii=False, default=str).encode("utf-8")
+                refs[draft_id] = None if entry is None else DraftRef(draft_id, entry["lender_id"], saved_at, offset, len(line))
+                lines.append(line)
+                offset += len(line) + 1
+            try:
+                with open(self.path, "ab") as fh:
+                    fh.write(b"\n".join(lines) + b"\n")
+                    fh.flush()
+                    os.fsync(fh.fileno())
+            except OSError:
+                # Put them back unless a newer state was queued meanwhile.
+                with self._lock:
+                    for draft_id, entry in pending.items():
+                        self._pending.setdefault(draft_id, entry)
+                raise
+            self._size = offset
+            with self._lock:
+                for draft_id, ref in refs.items():
+                    if ref is None:
+                        self._index.pop(draft_id, None)
+                    else:
+                        self._index[draft_id] = ref
+        if self._size > max(self.compact_min_bytes, 2 * self._live_bytes()):
+            self.compact()
+
+    def compact(self) -> None:
+        # Rewrites the journal with the latest line of each open draft.
+        with self._io_lock:
+            with self._lock:
+                live = sorted(self._index.values(), key=lambda r: r.offset)
+            tmp = f"{self.path}.tmp"
+            index, offset = {}, 0
+            with open(self.path, "rb") as src, open(tmp, "wb") as dst:
+                for ref in live:
+                    src.seek(ref.offset)
+                    dst.write(src.read(ref.length) + b"\n")
+                    index[ref.draft_id] = ref._replace(offset=offset)
+                    offset += ref.length + 1
+                dst.flush()
+                os.fsync(dst.fileno())
+            os.replace(tmp, self.path)
+            self._size = offset
+            with self._lock:
+                self._index = index
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        self._writer.join()
+        self.flush()
+
+    def _live_bytes(self) -> int:
+        with self._lock:
+            return sum(r.length + 1 for r in self._index.values())
+
+    def _run(self) -> None:
+        while not self._closed:
+            self._wake.wait(self.interval_s)
+            try:
+                self.flush()
+            except OSError:
+                pass    # retried on the next tick
+
+    def _load_index(self) -> None:
+        # Lines that don't parse (e.g. one torn by a crash mid-append) are skipped.
+        if not os.path.exists(self.path):
+            return
+        offset, torn = 0, False
+        with open(self.path, "rb") as fh:
+            for line in fh:
+                body = line.rstrip(b"\r\n")
+                try:
+                    entry = json.loads(body) if body.strip() else None
+                except ValueError:
+                    entry = None
+                self._apply(entry, offset, len(body))
+                offset += len(line)
+                torn = not line.endswith(b"\n")
+        if torn:
+            with open(self.path, "ab") as fh:
+                fh.write(b"\n")
+            offset += 1
+        self._size = offset
+
+    def _apply(self, entry: Any, offset: int, length: int) -> None:
+        if not isinstance(entry, dict) or "draft_id" not in entry:
+            return
+        if entry.get("deleted"):
+            self._index.pop(entry["draft_id"], None)
+        else:
+            self._index[entry["draft_id"]] = DraftRef(
+                entry["draft_id"], entry.get("lender_id") or "", entry.get("saved_at") or "", offset, length,
+            )
@@ -0,0 +1,231 @@
+# dealsnap/duplicates.py
+# ----------------------------- #
+# Near-duplicate deal detection (MinHash + LSH)
+# ----------------------------- #
+#
+#   python -m dealsnap.duplicates --store dealsnap.sqlite3 [--threshold 0.7] [-o clusters.ndjson]
+#   python -m dealsnap.duplicates archive/ backbook.ndjson
+#
+# A deal is reduced to a set of tokens: character trigrams of each applicant's
+# and guarantor's normalized name, their DOB and customer number, and trigrams
+# of each normalized security address (DOB and customer number are repeated
+# ID_WEIGHT times, so an exact identifier outweighs a common surname or
+# suburb). Two submissions of the same deal (e.g.
+# once via a broker and once via MRU) share most tokens even when a name or
+# street is spelt differently. Each set is summarized as a MinHash signature
+# (NUM_PERM minima, so the share of equal positions estimates Jaccard
+# similarity) and split into BANDS bands; deals sharing any band hash are
+# candidates, and only candidates are compared. The deal store keeps the band
+# hashes indexed, so a lookup is a handful of index probes.
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import re
+import sys
+import zlib
+from collections import defaultdict
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from dealsnap.models import DealSnapshotForm
+
+NUM_PERM = 64
+BANDS = 16                      # 16 bands x 4 rows: 99% of 0.7-similar pairs share a band, 12% of 0.3-similar
+ROWS = NUM_PERM // BANDS
+DEFAULT_THRESHOLD = 0.6
+MAX_BUCKET = 500                # larger buckets are generic (e.g. a shared DOB) and skipped in clustering
+ID_WEIGHT = 8                   # DOB / customer number count as this many tokens each
+_PRIME = np.uint64((1 << 31) - 1)
+_rng = np.random.default_rng(20240601)
+_A = _rng.integers(1, int(_PRIME), size=(NUM_PERM, 1), dtype=np.uint64)
+_B = _rng.integers(0, int(_PRIME), size=(NUM_PERM, 1), dtype=np.uint64)
+
+# Address words folded onto one spelling before shingling.
+ADDRESS_WORDS = {
+    "st": "street", "str": "street", "rd": "road", "ave": "avenue", "av": "avenue", "dr": "drive",
+    "ct": "court", "cres": "crescent", "cr": "crescent", "pl": "place", "hwy": "highway", "ln": "lane",
+    "pde": "parade", "tce": "terrace", "blvd": "boulevard", "cl": "close", "sq": "square",
+    "apt": "unit", "u": "unit", "flat": "unit", "lvl": "level",
+}
+
+# ===========================
+# Tokens + signatures
+# ===========================
+def normalize_name(name: Optional[str]) -> str:
+    return " ".join(re.sub(r"[^a-z ]+", " ", (name or "").lower()).split())
+
+def normalize_address(address: Optional[str]) -> str:
+    words = re.sub(r"[^a-z0-9 ]+", " ", (address or "").lower()).split()
+    return " ".join(ADDRESS_WORDS.get(w, w) for w in words)
+
+def _trigrams(prefix: str, text: str) -> Iterator[str]:
+    padded = f" {text} "
+    for i in range(len(padded) - 2):
+        yield prefix + padded[i:i + 3]
+
+def tokens(people: Iterable[Tuple[Optional[str], Optional[str], Optional[str]]],
+           addresses: Iterable[Optional[str]]) -> Set[str]:
+    # people: (name, dob, customer_number)
+    out: Set[str] = set()
+    for name, dob, customer_number in people:
+        name = normalize_name(name)
+        if name:
+            out.update(_trigrams("n:", name))
+        if dob and dob.strip():
+            out.update(f"d{k}:{dob.strip()}" for k in range(ID_WEIGHT))
+        if customer_number and customer_number.strip():
+            out.update(f"c{k}:{customer_number.strip().lower()}" for k in range(ID_WEIGHT))
+    for address in addresses:
+        address = normalize_address(address)
+        if address:
+            out.update(_trigrams("a:", address))
+    return out
+
+def snapshot_tokens(snapshot: DealSnapshotForm) -> Set[str]:
+    section = snapshot.applicant_section
+    people = [(p.name, p.dob, p.customer_number) for p in [*section.applicants, *section.guarantors]]
+    return tokens(people, (s.address for s in snapshot.security_section.securities))
+
+def payload_tokens(data: Mapping[str, Any]) -> Set[str]:
+    # Same as snapshot_tokens on parsed JSON, for archives and stored payloads.
+    section = data.get("applicant_section") or {}
+    people = [
+        (p.get("name"), p.get("dob"), p.get("customer_number"))
+        for p in [*(section.get("applicants") or []), *(section.get("guarantors") or [])] if isinstance(p, dict)
+    ]
+    securities = (data.get("security_section") or {}).get("securities") or []
+    return tokens(people, (s.get("address") for s in securities if isinstance(s, dict)))
+
+def signature(token_set: Iterable[str]) -> Optional[np.ndarray]:
+    # NUM_PERM uint32 minima of (a*h + b) mod p over the token hashes; None
+    # for an empty set, which can't be compared.
+    hashes = np.fromiter((zlib.crc32(t.encode("utf-8")) for t in token_set), dtype=np.uint64)
+    if not len(hashes):
+        return None
+    return ((_A * hashes + _B) % _PRIME).min(axis=1).astype(np.uint32)
+
+def band_keys(sig: np.ndarray) -> List[int]:
+    # One signed 64-bit key per band (fits an SQLite INTEGER).
+    rows = sig.reshape(BANDS, ROWS)
+    return [
+        int.from_bytes(hashlib.blake2b(band.tobytes(), digest_size=8, person=bytes([i])).digest(), "big", signed=True)
+        for i, band in enumerate(rows)
+    ]
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    return float(np.count_nonzero(a == b)) / NUM_PERM
+
+def signature_bytes(sig: np.ndarray) -> bytes:
+    return sig.astype("<u4").tobytes()
+
+def signature_from_bytes(raw: bytes) -> np.ndarray:
+    return np.frombuffer(raw, dtype="<u4")
+
+# ===========================
+# Batch clustering
+# ===========================
+def cluster(signatures: Iterable[Tuple[str, Optional[np.ndarray]]],
+            threshold: float = DEFAULT_THRESHOLD) -> List[List[Tuple[str, float]]]:
+    # Groups of likely duplicates (each a list of (deal_id, best score to the
+    # group)), largest first. Work is linear in the number of deals plus the
+    # candidate pairs that share a band; buckets over MAX_BUCKET are skipped.
+    ids: List[str] = []
+    sigs: List[np.ndarray] = []
+    buckets: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+    for deal_id, sig in signatures:
+        if sig is None:
+            continue
+        n = len(ids)
+        ids.append(deal_id)
+        sigs.append(sig)
+        for band, key in enumerate(band_keys(sig)):
+            buckets[(band, key)].append(n)
+
+    parent = list(range(len(ids)))
+
+    def root(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    best = [0.0] * len(ids)
+    checked: Set[Tuple[int, int]] = set()
+    for members in buckets.values():
+        if len(members) < 2 or len(members) > MAX_BUCKET:
+            continue
+        block = np.stack([sigs[m] for m in members])
+        scores = (block[:, None, :] == block[None, :, :]).sum(axis=2) / NUM_PERM
+        for i, j in zip(*np.nonzero(np.triu(scores >= threshold, k=1))):
+            a, b = members[i], members[j]
+            if (a, b) in checked:
+                continue
+            checked.add((a, b))
+            best[a] = max(best[a], float(scores[i, j]))
+            best[b] = max(best[b], float(scores[i, j]))
+            parent[root(a)] = root(b)
+
+    groups: Dict[int, List[Tuple[str, float]]] = defaultdict(list)
+    for i, deal_id in enumerate(ids):
+        if best[i]:
+            groups[root(i)].append((deal_id, round(best[i], 3)))
+    return sorted(groups.values(), key=len, reverse=True)
+
+def iter_archive(sources: Sequence[str]) -> Iterator[Tuple[str, Optional[np.ndarray]]]:
+    # (record id, signature) per snapshot in files; ids are "path" or "path:line".
+    from dealsnap.sources import expand_sources, iter_tasks
+
+    for source, line_no, raw in iter_tasks(expand_sources(sources)):
+        try:
+            if raw is None:
+                with open(source, "rb") as fh:
+                    raw = fh.read()
+            data = json.loads(raw)
+        except (OSError, ValueError):
+            continue
+        if isinstance(data, dict):
+            yield (source if line_no is None else f"{source}:{line_no}"), signature(payload_tokens(data))
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m dealsnap.duplicates",
+        description="Cluster likely duplicate deals (same applicants / securities, spelt differently).",
+    )
+    parser.add_argument("sources", nargs="*", help="Directories, globs, .json files or .ndjson/.jsonl files")
+    parser.add_argument("--store", help="Cluster the deals in this deal store instead of files")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help=f"Minimum estimated similarity (default: {DEFAULT_THRESHOLD})")
+    parser.add_argument("-o", "--output", help="Write one NDJSON line per cluster here instead of stdout")
+    return parser
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    if bool(args.store) == bool(args.sources):
+        print("give either --store or file sources", file=sys.stderr)
+        return 2
+    if args.store:
+        from dealsnap.store import DealStore
+
+        store = DealStore(args.store)
+        indexed = store.index_duplicates()
+        if indexed:
+            print(f"indexed {indexed} deal(s) saved before duplicate detection", file=sys.stderr)
+        clusters = cluster(store.duplicate_signatures(), args.threshold)
+        store.close()
+    else:
+        clusters = cluster(iter_archive(args.sources), args.threshold)
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        for members in clusters:
+            out.write(json.dumps({"size": len(members), "deals": [{"id": i, "score": s} for i, s in members]}) + "\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(f"{len(clusters)} cluster(s), {sum(map(len, clusters))} deal(s)", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
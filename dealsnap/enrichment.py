@@ -0,0 +1,294 @@
+# dealsnap/enrichment.py
+# ----------------------------- #
+# Concurrent deal enrichment (asyncio) (no UI)
+# ----------------------------- #
+# Checks hand-typed identifiers against lookup services when a deal is
+# validated:
+#
+#   lender      lender_id in the lender registry
+#   customer    each applicant's / guarantor's customer_number in the customer
+#               master (and whether the name on file matches)
+#   address     each security address, standardized
+#   valuation   an automated valuation for each security address (vs. the
+#               entered valuation)
+#
+# Each service is a Backend; the Stub* backends answer locally (from a JSON
+# file, DEALSNAP_ENRICHMENT_STUBS, optionally with simulated latency) until
+# real clients are plugged in. All of a deal's lookups are started at once on
+# one event loop, so a deal with 4 applicants and 5 securities takes about as
+# long as its slowest lookup. Per backend, results (including "not found") are
+# kept in a bounded TTL/LRU cache, concurrent lookups of the same key share one
+# request, and a semaphore caps requests in flight. The Enricher runs its own
+# loop on a daemon thread, so Streamlit sessions (threads) share the cache,
+# the in-flight requests and the limits.
+from __future__ import annotations
+
+import abc
+import asyncio
+import atexit
+import json
+import os
+import re
+import threading
+from collections import Counter
+from typing import Any, Awaitable, Dict, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+from cachetools import TTLCache
+
+from dealsnap.duplicates import normalize_address, normalize_name
+from dealsnap.models import DealSnapshotForm
+
+DEFAULT_STUBS_PATH = os.environ.get("DEALSNAP_ENRICHMENT_STUBS")
+STUB_DELAY_S = float(os.environ.get("DEALSNAP_ENRICHMENT_DELAY_MS", "0")) / 1000
+CACHE_SIZE = 10_000           # entries per backend
+ENRICH_TIMEOUT_S = 5.0        # whole deal, from the app
+VALUATION_TOLERANCE = 0.15    # entered valuation further than this from the estimate is flagged
+_MISSING = object()
+
+class Lookup(NamedTuple):
+    kind: str                           # backend name
+    key: str                            # normalized key
+    value: Optional[Dict[str, Any]]     # None = not found
+    error: Optional[str] = None         # set when the backend failed or timed out (not cached)
+
+class Finding(NamedTuple):
+    kind: str
+    item: str                           # e.g. "applicants 2", "securities 1", "application summary"
+    status: str                         # ok | not_found | mismatch | error
+    message: str
+
+    @property
+    def label(self) -> str:
+        return f"{self.item}: {self.message}"
+
+# ===========================
+# Backends
+# ===========================
+class Backend(abc.ABC):
+    # One lookup service. fetch() returns the record for a key, or None when
+    # there is none; raising (or exceeding `timeout`) is reported as an error.
+    name = "backend"
+    concurrency = 8                     # requests in flight
+    ttl = 300.0                         # seconds a result stays cached
+    timeout = 2.0
+
+    def normalize(self, key: str) -> str:
+        return key.strip().lower()
+
+    @abc.abstractmethod
+    async def fetch(self, key: str) -> Optional[Dict[str, Any]]:
+        ...
+
+class StubBackend(Backend):
+    # Answers from a dict keyed by normalized key, after `delay` seconds.
+    def __init__(self, name: str, records: Mapping[str, Dict[str, Any]], delay: float = STUB_DELAY_S,
+                 concurrency: int = 8, ttl: float = 300.0):
+        self.name = name
+        self.delay = delay
+        self.concurrency = concurrency
+        self.ttl = ttl
+        self.records = {self.normalize(k): dict(v) for k, v in records.items()}
+
+    async def fetch(self, key: str) -> Optional[Dict[str, Any]]:
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        return self.records.get(key)
+
+class StubValuations(StubBackend):
+    def normalize(self, key: str) -> str:
+        return normalize_address(key)
+
+_STATES = ("act", "nsw", "nt", "qld", "sa", "tas", "vic", "wa")
+_POSTCODE = re.compile(r"\b(\d{4})$")
+
+class StubAddresses(Backend):
+    # Local address standardization: abbreviations expanded (as for duplicate
+    # detection), state and postcode picked out of the tail.
+    name = "address"
+    ttl = 86_400.0
+
+    def __init__(self, delay: float = STUB_DELAY_S):
+        self.delay = delay
+
+    def normalize(self, key: str) -> str:
+        return normalize_address(key)
+
+    async def fetch(self, key: str) -> Optional[Dict[str, Any]]:
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if not key:
+            return None
+        words = key.split()
+        postcode = _POSTCODE.search(key)
+        state = next((w for w in reversed(words) if w in _STATES), None)
+        standard = " ".join(w.upper() if w in _STATES else w.title() for w in words)
+        return {"standardized": standard, "state": state.upper() if state else None,
+                "postcode": postcode.group(1) if postcode else None}
+
+def load_stubs(path: Optional[str] = DEFAULT_STUBS_PATH, delay: float = STUB_DELAY_S) -> List[Backend]:
+    # Address standardization always runs; lender, customer and valuation
+    # stubs only when a stub file provides their records:
+    #   {"lenders": {"LND-1": {"name": ...}}, "customers": {"C123": {"name": ..., "dob": ...}},
+    #    "valuations": {"12 Smith St ...": {"estimate": 750000, "as_at": "2024-05-01"}}}
+    backends: List[Backend] = [StubAddresses(delay)]
+    if not path:
+        return backends
+    with open(path, encoding="utf-8") as fh:
+        stubs = json.load(fh)
+    if "lenders" in stubs:
+        backends.append(StubBackend("lender", stubs["lenders"], delay, ttl=3600.0))
+    if "customers" in stubs:
+        backends.append(StubBackend("customer", stubs["customers"], delay))
+    if "valuations" in stubs:
+        backends.append(StubValuations("valuation", stubs["valuations"], delay, ttl=3600.0))
+    return backends
+
+# ===========================
+# Enricher
+# ===========================
+class Enricher:
+    def __init__(self, backends: Sequence[Backend], cache_size: int = CACHE_SIZE):
+        self.backends = {b.name: b for b in backends}
+        self.stats: Counter = Counter()     # requests / hits / coalesced / errors
+        self._caches = {b.name: TTLCache(cache_size, b.ttl) for b in backends}
+        # Semaphores and in-flight futures belong to one event loop.
+        self._limits: Dict[Any, Dict[str, asyncio.Semaphore]] = {}
+        self._inflight: Dict[Tuple[Any, str, str], asyncio.Future] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    # ---- lookups (on the event loop) ----
+    async def lookup(self, kind: str, key: str) -> Lookup:
+        backend = self.backends[kind]
+        key = backend.normalize(key)
+        cache = self._caches[kind]
+        # One get(): a membership test then a read could straddle the TTL expiry.
+        cached = cache.get(key, _MISSING)
+        if cached is not _MISSING:
+            self.stats["hits"] += 1
+            return cached
+        loop = asyncio.get_running_loop()
+        future = self._inflight.get((loop, kind, key))
+        if future is None:
+            future = loop.create_task(self._fetch(backend, key))
+            self._inflight[(loop, kind, key)] = future
+            future.add_done_callback(lambda _: self._inflight.pop((loop, kind, key), None))
+        else:
+            self.stats["coalesced"] += 1
+        # shield: one caller giving up doesn't cancel the request for the others.
+        return await asyncio.shield(future)
+
+    async def _fetch(self, backend: Backend, key: str) -> Lookup:
+        limits = self._limits.setdefault(asyncio.get_running_loop(), {})
+        limit = limits.get(backend.name) or limits.setdefault(backend.name, asyncio.Semaphore(backend.concurrency))
+        async with limit:
+            self.stats["requests"] += 1
+            try:
+                value = await asyncio.wait_for(backend.fetch(key), backend.timeout)
+            except asyncio.TimeoutError:
+                self.stats["errors"] += 1
+                return Lookup(backend.name, key, None, f"{backend.name} lookup timed out")
+            except Exception as e:
+                self.stats["errors"] += 1
+                return Lookup(backend.name, key, None, f"{backend.name} lookup failed: {e}")
+        result = Lookup(backend.name, key, value)
+        self._caches[backend.name][key] = result
+        return result
+
+    async def enrich(self, snapshot: DealSnapshotForm) -> List[Finding]:
+        # Every lookup for the deal at once; findings in form order.
+        checks: List[Awaitable[Optional[Finding]]] = []
+        summary = snapshot.application_summary
+        if "lender" in self.backends and summary.lender_id.strip():
+            checks.append(self._check_lender(summary.lender_id))
+        section = snapshot.applicant_section
+        if "customer" in self.backends:
+            for role, people in (("applicants", section.applicants), ("guarantors", section.guarantors)):
+                for i, person in enumerate(people, start=1):
+                    if person.customer_number and person.customer_number.strip():
+                        checks.append(self._check_customer(f"{role} {i}", person.name, person.customer_number))
+        for i, security in enumerate(snapshot.security_section.securities, start=1):
+            if not (security.address and security.address.strip()):
+                continue
+            if "address" in self.backends:
+                checks.append(self._check_address(f"securities {i}", security.address))
+            if "valuation" in self.backends:
+                checks.append(self._check_valuation(f"securities {i}", security.address, security.valuation_amount))
+        return [f for f in await asyncio.gather(*checks) if f is not None]
+
+    async def _check_lender(self, lender_id: str) -> Finding:
+        found = await self.lookup("lender", lender_id)
+        if found.error:
+            return Finding("lender", "application summary", "error", found.error)
+        if found.value is None:
+            return Finding("lender", "application summary", "not_found", f"lender ID {lender_id} is not in the lender registry")
+        return Finding("lender", "application summary", "ok", f"lender {found.value.get('name') or lender_id}")
+
+    async def _check_customer(self, item: str, name: str, customer_number: str) -> Finding:
+        found = await self.lookup("customer", customer_number)
+        if found.error:
+            return Finding("customer", item, "error", found.error)
+        if found.value is None:
+            return Finding("customer", item, "not_found", f"customer number {customer_number} not found")
+        on_file = found.value.get("name") or ""
+        if on_file and normalize_name(on_file) != normalize_name(name):
+            return Finding("customer", item, "mismatch", f"customer number {customer_number} is on file as {on_file}")
+        return Finding("customer", item, "ok", f"customer number {customer_number} matches")
+
+    async def _check_address(self, item: str, address: str) -> Optional[Finding]:
+        found = await self.lookup("address", address)
+        if found.error:
+            return Finding("address", item, "error", found.error)
+        if found.value is None:
+            return None
+        return Finding("address", item, "ok", f"standardized as {found.value['standardized']}")
+
+    async def _check_valuation(self, item: str, address: str, entered: Optional[float]) -> Finding:
+        found = await self.lookup("valuation", address)
+        if found.error:
+            return Finding("valuation", item, "error", found.error)
+        if found.value is None:
+            return Finding("valuation", item, "not_found", "no automated valuation for this address")
+        estimate = float(found.value.get("estimate") or 0.0)
+        text = f"automated valuation ${estimate:,.0f}" + (f" as at {found.value['as_at']}" if found.value.get("as_at") else "")
+        if entered and estimate and abs(entered - estimate) / estimate > VALUATION_TOLERANCE:
+            return Finding("valuation", item, "mismatch", f"entered valuation ${entered:,.0f} vs {text}")
+        return Finding("valuation", item, "ok", text)
+
+    # ---- sync entry point (background loop) ----
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._start_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, name="deal-enrichment", daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+            return self._loop
+
+    def enrich_sync(self, snapshot: DealSnapshotForm, timeout: float = ENRICH_TIMEOUT_S) -> List[Finding]:
+        # For threaded callers (Streamlit). Raises TimeoutError if the deal
+        # isn't enriched within `timeout`; its lookups still finish and are cached.
+        future = asyncio.run_coroutine_threadsafe(self.enrich(snapshot), self._ensure_loop())
+        return future.result(timeout)
+
+    def close(self) -> None:
+        # Cancels lookups still in flight, then stops the loop thread.
+        with self._start_lock:
+            loop, self._loop = self._loop, None
+        if loop is None:
+            return
+
+        async def cancel_pending() -> None:
+            tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        try:
+            asyncio.run_coroutine_threadsafe(cancel_pending(), loop).result(timeout=1.0)
+        except TimeoutError:
+            pass
+        loop.call_soon_threadsafe(loop.stop)
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
@@ -0,0 +1,64 @@
+# dealsnap/frequency.py
+# ----------------------------- #
+# Income/expense frequency normalization (no UI)
+# ----------------------------- #
+# IncomeLine.annual_amount holds the amount as stated at income_frequency
+# (a weekly wage is entered as the weekly figure). Everything that totals
+# income annualizes it here, column-wise, so a deal with hundreds of lines
+# costs one NumPy gather rather than a Python branch per line.
+from __future__ import annotations
+
+from typing import Iterable, Optional, Sequence
+
+import numpy as np
+
+from dealsnap.models import IncomeLine
+
+FREQUENCIES = ("Annual", "Monthly", "Fortnightly", "Weekly")
+PERIODS_PER_YEAR = {"annual": 1.0, "monthly": 12.0, "fortnightly": 26.0, "weekly": 52.0}
+# Spellings seen in broker exports, folded onto the canonical names.
+FREQUENCY_ALIASES = {
+    "yearly": "annual", "annually": "annual", "year": "annual", "pa": "annual", "p.a.": "annual",
+    "month": "monthly", "pm": "monthly", "fortnight": "fortnightly", "week": "weekly", "wk": "weekly", "pw": "weekly",
+}
+
+def frequency_key(frequency: Optional[str]) -> str:
+    # Lower-case canonical key; blank or unknown frequencies count as annual.
+    key = (frequency or "").strip().lower()
+    key = FREQUENCY_ALIASES.get(key, key)
+    return key if key in PERIODS_PER_YEAR else "annual"
+
+def is_known_frequency(frequency: Optional[str]) -> bool:
+    # Blank (the default applies) or a recognised spelling; "Quarterly" is not.
+    key = (frequency or "").strip().lower()
+    return not key or FREQUENCY_ALIASES.get(key, key) in PERIODS_PER_YEAR
+
+def canonical_frequency(frequency: Optional[str]) -> str:
+    return frequency_key(frequency).capitalize()
+
+def periods_per_year(frequencies: Sequence[Optional[str]]) -> np.ndarray:
+    # Only the distinct spellings go through Python; the rest is a gather.
+    distinct, inverse = np.unique(np.asarray([f or "" for f in frequencies], dtype=str), return_inverse=True)
+    factors = np.fromiter((PERIODS_PER_YEAR[frequency_key(f)] for f in distinct), dtype=float, count=len(distinct))
+    return factors[inverse.ravel()]
+
+def annualize(amounts: Sequence[Optional[float]], frequencies: Sequence[Optional[str]]) -> np.ndarray:
+    amounts = np.asarray([0.0 if a is None else a for a in amounts], dtype=float)
+    if not len(amounts):
+        return amounts
+    return amounts * periods_per_year(frequencies)
+
+def to_monthly(amounts: Sequence[Optional[float]], frequencies: Sequence[Optional[str]]) -> np.ndarray:
+    return annualize(amounts, frequencies) / 12.0
+
+def annual_income(incomes: Iterable[IncomeLine]) -> float:
+    incomes = list(incomes)
+    return float(annualize([i.annual_amount for i in incomes], [i.income_frequency for i in incomes]).sum())
+
+def periods_per_year_sql(column: str) -> str:
+    # The same mapping as a SQLite expression, for totals computed in the store.
+    spellings = {**{k: k for k in PERIODS_PER_YEAR}, **FREQUENCY_ALIASES}
+    cases = " ".join(
+        f"WHEN '{spelling}' THEN {PERIODS_PER_YEAR[key]:g}" for spelling, key in spellings.items()
+    )
+    return f"(CASE lower(trim(coalesce({column}, ''))) {cases} ELSE 1 END)"
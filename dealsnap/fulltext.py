@@ -0,0 +1,118 @@
+# dealsnap/fulltext.py
+# ----------------------------- #
+# Full-text search over narrative fields (SQLite FTS5)
+# ----------------------------- #
+# The deal store keeps one FTS5 row per deal (rowid = the deal's rowid), with
+# one column per narrative field. Text is pulled out of the stored JSON inside
+# SQLite, so indexing a saved deal or backfilling an old store never builds
+# models. Queries use a small, forgiving syntax that is compiled to FTS5:
+#
+#   gambling                     word (stemmed: "gamble", "gambling" match)
+#   "tax debt"                   phrase
+#   valuation:cladding           word in one field (see TEXT_FIELDS)
+#   alerts:"payment plan"        phrase in one field
+#   arrear*                      prefix
+#   hardship OR arrears          either (words are otherwise all required)
+#   -refinance                   exclude
+from __future__ import annotations
+
+import re
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+# field name -> (label, SQL expression over the deal row `d`)
+def _scalar(path: str) -> str:
+    return f"json_extract(CAST(d.payload AS TEXT), '$.{path}')"
+
+def _each(path: str, field: str) -> str:
+    return (f"(SELECT group_concat(json_extract(value, '$.{field}'), ' ')"
+            f" FROM json_each(CAST(d.payload AS TEXT), '$.{path}'))")
+
+TEXT_FIELDS: Dict[str, Tuple[str, str]] = {
+    "alerts": ("Alerts / narratives", _scalar("applicant_section.alerts_narratives_details")),
+    "purpose": ("Loan purpose notes", _scalar("loan_section.loan_purpose_notes")),
+    "income": ("Income flags", _each("income_section.incomes", "flags")),
+    "expenses": ("Expense commentary", _each("expense_section.households", "commentary")),
+    "assets": ("Asset / liability commentary", _scalar("asset_liability_section.commentary")),
+    "valuation": ("Valuation risk alerts", _each("security_section.securities", "valuation_risk_alerts")),
+    "hgs": ("HGS scheme eligibility notes", _scalar("hgs_block.scheme_eligibility_notes")),
+    "lmi": ("LMI waiver / broker notes", _scalar("lmi_block.waiver_other_broker_notes")),
+}
+
+# Bump when TEXT_FIELDS or the tokenizer change; the store then rebuilds the index.
+TEXT_INDEX_VERSION = 1
+
+TEXT_SCHEMA = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS deal_text USING fts5({', '.join(TEXT_FIELDS)},"
+    " tokenize = 'porter unicode61 remove_diacritics 2')"
+)
+
+# executemany() with one deal_id per row; also used (without the WHERE) to backfill.
+INDEX_TEXT = (
+    f"INSERT INTO deal_text (rowid, {', '.join(TEXT_FIELDS)})"
+    f" SELECT d.rowid, {', '.join(sql for _, sql in TEXT_FIELDS.values())} FROM deals d"
+)
+UNINDEX_TEXT = "DELETE FROM deal_text WHERE rowid = (SELECT rowid FROM deals WHERE deal_id = ?)"
+
+# Common words match most deals; ranking every match is what makes such a query
+# slow, so only the newest MAX_RANKED matches are ranked (all of them, for
+# anything more specific).
+MAX_RANKED = 20000
+
+class SearchQueryError(ValueError):
+    pass
+
+class TextHit(NamedTuple):
+    deal_id: str
+    lender_id: str
+    submission_date: str
+    saved_at: str
+    score: float            # bm25, higher is better
+    snippet: str            # best-matching field, matches in **bold**
+
+    @property
+    def label(self) -> str:
+        return f"{self.lender_id} · {self.submission_date}"
+
+_TOKEN = re.compile(r'(-?)(?:(\w+):)?(?:"([^"]*)"?|(\S+))')
+
+def _quote(text: str) -> str:
+    return '"' + text.replace('"', '""') + '"'
+
+def compile_query(text: str) -> Optional[str]:
+    # -> an FTS5 MATCH expression, or None for a blank query. Raises
+    # SearchQueryError for an unknown field or a query that only excludes.
+    include: List[str] = []
+    exclude: List[str] = []
+    join_or = False
+    for match in _TOKEN.finditer(text.strip()):
+        negate, field, phrase, word = match.groups()
+        if phrase is None and word == "OR" and not negate and not field:
+            join_or = bool(include)
+            continue
+        if phrase is not None:
+            body = _quote(phrase) if phrase.strip() else None
+        else:
+            prefix = word.endswith("*")
+            word = word.rstrip("*")
+            if not re.search(r"\w", word):
+                continue
+            body = _quote(word) + (" *" if prefix else "")
+        if body is None:
+            continue
+        if field:
+            if field.lower() not in TEXT_FIELDS:
+                raise SearchQueryError(f"unknown field {field!r} (use {', '.join(TEXT_FIELDS)})")
+            body = f"{field.lower()} : {body}"
+        if negate:
+            exclude.append(body)
+        elif join_or:
+            include[-1] = f"{include[-1]} OR {body}"
+        else:
+            include.append(body)
+        join_or = False
+    if not include:
+        if exclude:
+            raise SearchQueryError("add at least one word to search for")
+        return None
+    expr = " AND ".join(f"({clause})" for clause in include)
+    return expr + "".join(f" NOT {clause}" for clause in exclude)
@@ -0,0 +1,133 @@
+# dealsnap/grid.py
+# ----------------------------- #
+# Grid columns for repeated sections (no UI)
+# ----------------------------- #
+# A List[Model] section (incomes, expenses, securities, people) is edited as one
+# table. Column kinds and dropdown options come from the Pydantic field types
+# and enums, so the grid and the schema can't drift apart. Tables are columnar
+# ({column: [values]}) in the shape st.data_editor takes and returns.
+from __future__ import annotations
+
+import math
+import re
+import typing
+from enum import Enum
+from typing import Any, Dict, List, Mapping, NamedTuple, Optional, Sequence, Tuple, Type
+
+from pydantic import BaseModel
+
+from dealsnap.frequency import canonical_frequency, is_known_frequency
+from dealsnap.helpers import enum_options
+from dealsnap.prefill import PrefillIndex
+
+ISO_DATE_PATTERN = r"^\d{4}-\d{2}-\d{2}$"
+Table = Dict[str, List[Any]]
+
+class GridColumn(NamedTuple):
+    name: str
+    label: str
+    kind: str                       # "text" | "number" | "integer" | "select"
+    options: Tuple[str, ...] = ()
+    required: bool = False
+    pattern: Optional[str] = None
+
+def _base_type(annotation: Any) -> Any:
+    # Optional[X] -> X
+    if typing.get_origin(annotation) is typing.Union:
+        args = [a for a in typing.get_args(annotation) if a is not type(None)]
+        return args[0] if len(args) == 1 else str
+    return annotation
+
+def grid_columns(
+    model: Type[BaseModel],
+    labels: Optional[Mapping[str, str]] = None,
+    options: Optional[Mapping[str, Sequence[str]]] = None,
+) -> List[GridColumn]:
+    # `options` turns free-text fields into dropdowns (e.g. income_frequency).
+    labels, options = labels or {}, options or {}
+    columns = []
+    for name, field in model.model_fields.items():
+        base = _base_type(field.annotation)
+        choices: Tuple[str, ...] = ()
+        if name in options:
+            kind, choices = "select", tuple(options[name])
+        elif isinstance(base, type) and issubclass(base, Enum):
+            kind, choices = "select", tuple(enum_options(base))
+        elif base is int:
+            kind = "integer"
+        elif base is float:
+            kind = "number"
+        else:
+            kind = "text"
+        pattern = ISO_DATE_PATTERN if kind == "text" and (name == "dob" or name.endswith("_date")) else None
+        label = labels.get(name) or name.replace("_", " ").capitalize()
+        columns.append(GridColumn(name, label, kind, choices, field.is_required(), pattern))
+    return columns
+
+def _option(column: GridColumn, value: str) -> Optional[str]:
+    # The dropdown option a prefilled value means: as spelled, ignoring case
+    # and spaces, or a frequency alias ("wk", "Fortnight") folded onto its name.
+    if value in column.options:
+        return value
+    key = value.strip().lower()
+    for option in column.options:
+        if option.lower() == key:
+            return option
+    if key and is_known_frequency(key) and canonical_frequency(key) in column.options:
+        return canonical_frequency(key)
+    return None
+
+def _cell(column: GridColumn, value: Any) -> Any:
+    # Prefill/JSON value -> grid cell; anything the column can't show becomes blank.
+    if value is None:
+        return None
+    if column.kind == "select":
+        return _option(column, value.value if isinstance(value, Enum) else str(value))
+    if column.kind in ("number", "integer"):
+        try:
+            return int(value) if column.kind == "integer" else float(value)
+        except (TypeError, ValueError):
+            return None
+    return str(value)
+
+def table_from_prefill(prefill: PrefillIndex, path: str, columns: Sequence[GridColumn], min_rows: int = 0) -> Table:
+    rows = max(prefill.count(path), min_rows)
+    return {
+        c.name: [_cell(c, prefill.get(f"{path}.{i}.{c.name}")) for i in range(rows)]
+        for c in columns
+    }
+
+def _blank(value: Any) -> bool:
+    return value is None or (isinstance(value, float) and math.isnan(value)) or (isinstance(value, str) and not value.strip())
+
+def records_from_table(table: Mapping[str, Sequence[Any]], columns: Sequence[GridColumn]) -> List[Dict[str, Any]]:
+    # Grid -> model kwargs, one dict per row. Rows left entirely blank (e.g. a
+    # freshly added row) are dropped; required text stays "" so validation
+    # reports it the same way the single-field inputs did.
+    rows = len(next(iter(table.values()), []))
+    records = []
+    for i in range(rows):
+        record: Dict[str, Any] = {}
+        for c in columns:
+            value = table.get(c.name, [None] * rows)[i]
+            if _blank(value):
+                record[c.name] = "" if c.required and c.kind == "text" else None
+            elif c.kind == "integer":
+                record[c.name] = int(value)
+            elif c.kind == "number":
+                record[c.name] = float(value)
+            else:
+                record[c.name] = str(value).strip()
+        if any(not _blank(v) for v in record.values()):
+            records.append(record)
+    return records
+
+def invalid_cells(records: Sequence[Mapping[str, Any]], columns: Sequence[GridColumn]) -> List[str]:
+    # Pattern problems the grid can flag but not block ("row 2: Dob").
+    problems = []
+    for i, record in enumerate(records, start=1):
+        for c in columns:
+            value = record.get(c.name)
+            if c.pattern and value and not re.match(c.pattern, value):
+                problems.append(f"row {i}: {c.label}")
+    return problems
@@ -0,0 +1,67 @@
+# dealsnap/helpers.py
+# ----------------------------- #
+# Enum + serialization helpers (no UI)
+# ----------------------------- #
+from __future__ import annotations
+
+import json
+from typing import Any, Dict
+
+def enum_options(enum_cls):
+    return [e.value if hasattr(e, "value") else e.name for e in enum_cls]
+
+def enum_from_value(enum_cls, value):
+    if value is None or value == "":
+        return None
+    for e in enum_cls:
+        if (hasattr(e, "value") and e.value == value) or e.name == value:
+            return e
+    return None
+
+def to_json_bytes(payload: Dict[str, Any], compact: bool = False) -> bytes:
+    if compact:
+        return json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return json.dumps(payload, indent=2, ensure_ascii=False).encode("utf-8")
+
+# A bare number up to MAX_LVR is a fraction (1.05 is a 105% LVR); one from
+# MIN_LVR_PERCENT up is a percentage. Anything in between could be either.
+MAX_LVR = 2.0
+MIN_LVR_PERCENT = 10.0
+
+class LVRError(ValueError):
+    pass
+
+def lvr_fraction(value: Any) -> Any:
+    # "80%", "80" and 80 -> 0.8; "0.8", 0.8 and 1.05 -> as is; blank -> None;
+    # other text is kept as entered. A bare number that could be either (e.g.
+    # 5) or an LVR outside 0-200% (e.g. -0.2, 250, 250%) raises LVRError
+    # rather than being guessed.
+    if value is None or isinstance(value, bool):
+        return value
+    percent = False
+    if isinstance(value, (int, float)):
+        number = float(value)
+    else:
+        text = str(value).strip()
+        if not text:
+            return None
+        percent = text.endswith("%")
+        try:
+            number = float(text.rstrip("%").strip())
+        except ValueError:
+            return value
+    if percent or number >= MIN_LVR_PERCENT:
+        fraction = number / 100
+    elif number > MAX_LVR:
+        raise LVRError(f"LVR {value!r} is ambiguous: enter a fraction (0.8) or a percentage (80%)")
+    else:
+        fraction = number
+    if not 0 <= fraction <= MAX_LVR:
+        raise LVRError(f"LVR {value!r} is out of range: expected 0% to {MAX_LVR:.0%}")
+    return fraction
+
+def format_currency(value: float) -> str:
+    return f"${value:,.2f}"
+
+def option_index(options, value, default: int = 0) -> int:
+    return options.index(value) if value in options else default
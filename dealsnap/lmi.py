@@ -0,0 +1,264 @@
+# dealsnap/lmi.py
+# ----------------------------- #
+# Derived LVR + LMI premium pricing (no UI)
+# ----------------------------- #
+#
+#   python -m dealsnap.lmi --store dealsnap.sqlite3 --table lmi_premium_rates.csv [--previous old_rates.csv] [-o premiums.csv]
+#
+# LVR is derived as total loan amount / total security value, where a
+# security's value is the lesser of its valuation and purchase price
+# (whichever is captured). Premiums come from a premium rate table (CSV):
+#
+#   max_loan,80.01%,85%,90%,95%
+#   300000,0.47,1.05,1.97,3.07
+#   500000,0.65,1.34,2.34,3.56
+#
+# Rows are loan-amount tiers (upper bounds), columns are LVR points, and each
+# cell is the premium as a % of the loan amount. A deal is placed in its tier
+# with searchsorted and its rate is interpolated linearly between the two
+# surrounding LVR points (flat below the first point; nothing at or below
+# FREE_LVR). Deals above the last tier or LVR point can't be priced (NaN).
+# Every function takes arrays, so repricing a whole portfolio against a new
+# table is a handful of NumPy operations.
+from __future__ import annotations
+
+import argparse
+import csv
+import os
+import sys
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from dealsnap.csv_import import parse_amounts, read_columns
+from dealsnap.helpers import lvr_fraction
+from dealsnap.models import DealSnapshotForm
+
+DEFAULT_TABLE_PATH = os.environ.get("DEALSNAP_LMI_TABLE", "lmi_premium_rates.csv")
+FREE_LVR = 0.8          # no LMI at or below this LVR
+LVR_TOLERANCE = 0.005   # an entered LVR further than this from the derived one is flagged
+
+class PremiumTableError(ValueError):
+    pass
+
+class PremiumTable(NamedTuple):
+    name: str
+    loan_tiers: np.ndarray      # (tiers,) ascending upper bounds
+    lvr_points: np.ndarray      # (points,) ascending fractions
+    rates: np.ndarray           # (tiers, points) premium % of the loan amount
+
+class LMIQuote(NamedTuple):
+    loan_total: float
+    security_value: float
+    lvr: Optional[float]        # None without a security value
+    rate: Optional[float]       # premium %; None if the table doesn't cover the deal
+    premium: Optional[float]
+
+# ===========================
+# Tables
+# ===========================
+def premium_table(loan_tiers: Sequence[float], lvr_points: Sequence[float], rates: Any, name: str = "") -> PremiumTable:
+    tiers = np.asarray(loan_tiers, dtype=float)
+    points = np.asarray(lvr_points, dtype=float)
+    grid = np.asarray(rates, dtype=float)
+    if len(points) < 2 or not len(tiers):
+        raise PremiumTableError("a premium table needs at least one loan tier and two LVR points")
+    if grid.shape != (len(tiers), len(points)):
+        raise PremiumTableError(f"rates are {grid.shape}, expected {(len(tiers), len(points))}")
+    if np.any(np.diff(tiers) <= 0) or np.any(np.diff(points) <= 0):
+        raise PremiumTableError("loan tiers and LVR points must be strictly ascending")
+    if not np.all(np.isfinite(grid)) or np.any(grid < 0):
+        raise PremiumTableError("rates must be non-negative numbers")
+    return PremiumTable(name, tiers, points, grid)
+
+def read_premium_table(raw: bytes | str, name: str = "") -> PremiumTable:
+    columns, line_nos = read_columns(raw)
+    if "max_loan" not in columns or len(columns) < 3:
+        raise PremiumTableError("expected a max_loan column followed by one column per LVR point")
+    points = []
+    for header in columns:
+        if header != "max_loan":
+            try:
+                point = lvr_fraction(header)
+            except ValueError as e:
+                raise PremiumTableError(f"column {header!r}: {e}") from None
+            if not isinstance(point, float):
+                raise PremiumTableError(f"column {header!r} is not an LVR (e.g. 0.9 or 90%)")
+            points.append(point)
+    try:
+        tiers = parse_amounts(columns["max_loan"], "max_loan", line_nos)
+        rates = np.column_stack([parse_amounts(col, header, line_nos) for header, col in columns.items() if header != "max_loan"])
+    except ValueError as e:
+        raise PremiumTableError(str(e)) from None
+    return premium_table(tiers, points, rates, name=name)
+
+def load_premium_table(path: str) -> PremiumTable:
+    with open(path, "rb") as fh:
+        return read_premium_table(fh.read(), name=os.path.basename(path))
+
+# ===========================
+# Pricing (vectorized)
+# ===========================
+def security_values(valuation: Any, purchase_price: Any) -> np.ndarray:
+    # Lesser of the two where both are captured; missing (NaN) or zero is ignored.
+    valuation = np.asarray(valuation, dtype=float)
+    purchase_price = np.asarray(purchase_price, dtype=float)
+    with np.errstate(invalid="ignore"):
+        value = np.fmin(np.where(valuation > 0, valuation, np.nan), np.where(purchase_price > 0, purchase_price, np.nan))
+    return np.nan_to_num(value, nan=0.0)
+
+def derive_lvr(loan_total: Any, security_value: Any) -> np.ndarray:
+    loan_total = np.asarray(loan_total, dtype=float)
+    security_value = np.asarray(security_value, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(security_value > 0, loan_total / security_value, np.nan)
+
+def premium_rates(table: PremiumTable, lvr: Any, loan_amount: Any) -> np.ndarray:
+    # Premium % per deal: tier by searchsorted on loan amount, then a linear
+    # blend of that tier's rates at the LVR points either side.
+    lvr, amount = np.broadcast_arrays(np.asarray(lvr, dtype=float), np.asarray(loan_amount, dtype=float))
+    points, tiers = table.lvr_points, table.loan_tiers
+    tier = np.searchsorted(tiers, amount, side="left")
+    row = np.minimum(tier, len(tiers) - 1)
+    hi = np.clip(np.searchsorted(points, lvr, side="left"), 1, len(points) - 1)
+    lo = hi - 1
+    with np.errstate(invalid="ignore"):
+        weight = np.clip((lvr - points[lo]) / (points[hi] - points[lo]), 0.0, 1.0)
+        rate = table.rates[row, lo] + weight * (table.rates[row, hi] - table.rates[row, lo])
+        unpriced = (tier >= len(tiers)) | (lvr > points[-1]) | np.isnan(lvr) | np.isnan(amount)
+        rate = np.where(unpriced, np.nan, rate)
+        return np.where(lvr <= FREE_LVR, 0.0, rate)
+
+def premiums(table: PremiumTable, lvr: Any, loan_amount: Any) -> np.ndarray:
+    return premium_rates(table, lvr, loan_amount) / 100.0 * np.asarray(loan_amount, dtype=float)
+
+# ===========================
+# One deal
+# ===========================
+def quote_deal(snapshot: DealSnapshotForm, table: Optional[PremiumTable] = None) -> LMIQuote:
+    loan_total = sum((loan.loan_amount or 0.0) for loan in snapshot.loan_section.loans)
+    securities = snapshot.security_section.securities
+    security_value = float(security_values(
+        [s.valuation_amount or np.nan for s in securities], [s.purchase_price or np.nan for s in securities],
+    ).sum())
+    lvr = float(derive_lvr(loan_total, security_value))
+    if np.isnan(lvr):
+        return LMIQuote(loan_total, security_value, None, None, None)
+    if table is None:
+        return LMIQuote(loan_total, security_value, lvr, None, None)
+    rate = float(premium_rates(table, lvr, loan_total))
+    if np.isnan(rate):
+        return LMIQuote(loan_total, security_value, lvr, None, None)
+    return LMIQuote(loan_total, security_value, lvr, rate, round(rate / 100.0 * loan_total, 2))
+
+def with_derived_lmi(snapshot: DealSnapshotForm, quote: LMIQuote) -> DealSnapshotForm:
+    # Fills a blank LVR with the derived one and a blank LMI calculation (when
+    # the LMI block is included) with the quoted premium; entered values win.
+    summary = snapshot.application_summary
+    update: Dict[str, Any] = {}
+    if quote.lvr is not None and summary.LVR in (None, ""):
+        update["application_summary"] = summary.model_copy(update={"LVR": round(quote.lvr, 4)})
+    block = snapshot.lmi_block
+    if block is not None and quote.premium is not None and block.lmi_calculation in (None, ""):
+        update["lmi_block"] = block.model_copy(update={"lmi_calculation": quote.premium})
+    return snapshot.model_copy(update=update) if update else snapshot
+
+def entered_lvr_mismatch(snapshot: DealSnapshotForm, quote: LMIQuote) -> Optional[float]:
+    # The entered LVR when it disagrees with the derived one, else None.
+    try:
+        entered = lvr_fraction(snapshot.application_summary.LVR)
+    except ValueError:
+        return None
+    if quote.lvr is None or not isinstance(entered, float):
+        return None
+    return entered if abs(entered - quote.lvr) > LVR_TOLERANCE else None
+
+# ===========================
+# Portfolio
+# ===========================
+class LMIBook:
+    # Loan and security totals for every stored deal; reprice() prices all of
+    # them against a table in one pass.
+    def __init__(self, deal_ids: Sequence[str], loan_total: Any, security_value: Any):
+        self.deal_ids = list(deal_ids)
+        self.loan_total = np.asarray(loan_total, dtype=float)
+        self.security_value = np.asarray(security_value, dtype=float)
+        self.lvr = derive_lvr(self.loan_total, self.security_value)
+
+    @classmethod
+    def from_store(cls, store) -> "LMIBook":
+        rows = store.lmi_rows()
+        if not rows:
+            return cls([], [], [])
+        deal_ids, loan_total, security_value = zip(*rows)
+        return cls(deal_ids, loan_total, security_value)
+
+    def __len__(self) -> int:
+        return len(self.deal_ids)
+
+    def reprice(self, table: PremiumTable) -> np.ndarray:
+        return premiums(table, self.lvr, self.loan_total)
+
+    def summary(self, table: PremiumTable) -> Dict[str, Any]:
+        premium = self.reprice(table)
+        needs_lmi = self.lvr > FREE_LVR
+        return {
+            "table": table.name,
+            "deals": len(self),
+            "no_security_value": int(np.isnan(self.lvr).sum()),
+            "lvr_above_free": int(needs_lmi.sum()),
+            "unpriced": int((needs_lmi & np.isnan(premium)).sum()),
+            "total_premium": round(float(np.nansum(premium)), 2),
+        }
+
+# ===========================
+# CLI
+# ===========================
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m dealsnap.lmi",
+        description="Reprice LMI for every stored deal against a premium rate table.",
+    )
+    parser.add_argument("--store", required=True, help="Deal store to price")
+    parser.add_argument("--table", default=DEFAULT_TABLE_PATH, help=f"Premium rate CSV (default: {DEFAULT_TABLE_PATH})")
+    parser.add_argument("--previous", help="Earlier premium rate CSV to compare against")
+    parser.add_argument("-o", "--output", help="Write deal_id, LVR, loan total and premium(s) per deal here (CSV)")
+    return parser
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    from dealsnap.store import DealStore
+
+    try:
+        table = load_premium_table(args.table)
+        previous = load_premium_table(args.previous) if args.previous else None
+    except (OSError, ValueError) as e:
+        print(f"could not load premium table: {e}", file=sys.stderr)
+        return 2
+    store = DealStore(args.store)
+    book = LMIBook.from_store(store)
+    store.close()
+
+    premium = book.reprice(table)
+    print(book.summary(table), file=sys.stderr)
+    columns: List[Tuple[str, np.ndarray]] = [("lvr", book.lvr), ("loan_total", book.loan_total), ("premium", premium)]
+    if previous is not None:
+        before = book.reprice(previous)
+        change = premium - before
+        changed = ~np.isclose(np.nan_to_num(premium, nan=-1.0), np.nan_to_num(before, nan=-1.0))
+        print(f"vs {previous.name}: {int(changed.sum())} deal(s) changed, "
+              f"total premium {np.nansum(change):+,.2f}", file=sys.stderr)
+        columns += [("previous_premium", before), ("change", change)]
+    if args.output:
+        with open(args.output, "w", newline="", encoding="utf-8") as fh:
+            writer = csv.writer(fh)
+            writer.writerow(["deal_id", *(name for name, _ in columns)])
+            rounded = [np.round(values, 4 if name == "lvr" else 2) for name, values in columns]
+            writer.writerows(
+                [deal_id, *("" if np.isnan(v) else v for v in values)]
+                for deal_id, *values in zip(book.deal_ids, *(col.tolist() for col in rounded))
+            )
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,168 @@
+# dealsnap/metrics.py
+# ----------------------------- #
+# Stage timings + export (Prometheus text / NDJSON) (no UI)
+# ----------------------------- #
+# One recorder per process. Each timed stage keeps a bounded window of recent
+# samples for percentiles plus running totals. Observations can be appended to
+# an NDJSON log (one line per stage, with whatever deal-shape fields the caller
+# attaches), and the aggregate is written as a Prometheus text file that
+# node_exporter's textfile collector (or anything else) can scrape.
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, Mapping, Optional
+
+import numpy as np
+
+from dealsnap.models import DealSnapshotForm
+
+METRICS_PROM_PATH = os.environ.get("DEALSNAP_METRICS_PROM") or None
+METRICS_NDJSON_PATH = os.environ.get("DEALSNAP_METRICS_NDJSON") or None
+QUANTILES = (0.5, 0.9, 0.95, 0.99)
+
+log = logging.getLogger(__name__)
+
+def deal_shape(snapshot: DealSnapshotForm) -> Dict[str, int]:
+    return {
+        "loans": len(snapshot.loan_section.loans),
+        "applicants": len(snapshot.applicant_section.applicants),
+        "guarantors": len(snapshot.applicant_section.guarantors),
+        "incomes": len(snapshot.income_section.incomes),
+        "expenses": len(snapshot.expense_section.households),
+        "securities": len(snapshot.security_section.securities),
+    }
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+class _Stage:
+    def __init__(self, window: int):
+        self.samples: Deque[float] = deque(maxlen=window)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+class MetricsRecorder:
+    def __init__(self, prom_path: Optional[str] = METRICS_PROM_PATH, ndjson_path: Optional[str] = METRICS_NDJSON_PATH,
+                 window: int = 2048, prom_interval_s: float = 5.0):
+        self.prom_path = prom_path
+        self.ndjson_path = ndjson_path
+        self.prom_interval_s = prom_interval_s
+        self._window = window
+        self._stages: Dict[str, _Stage] = {}
+        self._gauges: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._log = open(ndjson_path, "a", encoding="utf-8", buffering=1) if ndjson_path else None
+        self._last_prom_write = 0.0
+        self._flush_lock = threading.Lock()
+        if prom_path:
+            atexit.register(self.flush, True)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._log:
+                self._log.close()
+                self._log = None
+
+    # ---- recording ----
+    @contextmanager
+    def stage(self, name: str, **fields: Any) -> Iterator[Dict[str, Any]]:
+        # Yields the field dict so the body can attach values it only learns
+        # while running (e.g. payload size).
+        start = time.perf_counter()
+        try:
+            yield fields
+        finally:
+            self.observe(name, (time.perf_counter() - start) * 1000, **fields)
+
+    def observe(self, name: str, ms: float, **fields: Any) -> None:
+        with self._lock:
+            stage = self._stages.get(name)
+            if stage is None:
+                stage = self._stages[name] = _Stage(self._window)
+            stage.samples.append(ms)
+            stage.count += 1
+            stage.total_ms += ms
+            stage.max_ms = max(stage.max_ms, ms)
+            if self._log:
+                record = {"ts": round(time.time(), 3), "stage": name, "ms": round(ms, 3), **fields}
+                self._log.write(json.dumps(record, default=str) + "\n")
+
+    def gauge(self, name: str, value: float, **labels: str) -> None:
+        key = name + ("{" + ",".join(f'{k}="{_label(str(v))}"' for k, v in sorted(labels.items())) + "}" if labels else "")
+        with self._lock:
+            self._gauges[key] = float(value)
+
+    def record_shape(self, shape: Mapping[str, int], payload_bytes: Optional[int] = None) -> None:
+        for kind, count in shape.items():
+            self.gauge("dealsnap_last_line_items", count, kind=kind)
+        if payload_bytes is not None:
+            self.gauge("dealsnap_last_payload_bytes", payload_bytes)
+
+    # ---- reading ----
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        # stage -> count, mean and percentiles over the recent window (ms).
+        with self._lock:
+            stages = {name: (np.fromiter(s.samples, dtype=float), s.count, s.total_ms, s.max_ms)
+                      for name, s in self._stages.items()}
+        out = {}
+        for name, (samples, count, total, peak) in sorted(stages.items()):
+            p50, p90, p95, p99 = np.percentile(samples, [q * 100 for q in QUANTILES]) if len(samples) else (0.0,) * 4
+            out[name] = {"count": count, "mean_ms": total / count if count else 0.0,
+                         "p50_ms": p50, "p90_ms": p90, "p95_ms": p95, "p99_ms": p99, "max_ms": peak}
+        return out
+
+    def prometheus_text(self) -> str:
+        lines = [
+            "# HELP dealsnap_stage_duration_ms Wall time per instrumented stage (quantiles over recent samples).",
+            "# TYPE dealsnap_stage_duration_ms summary",
+        ]
+        summary = self.summary()
+        for name, s in summary.items():
+            stage = _label(name)
+            for q, key in zip(QUANTILES, ("p50_ms", "p90_ms", "p95_ms", "p99_ms")):
+                lines.append(f'dealsnap_stage_duration_ms{{stage="{stage}",quantile="{q}"}} {s[key]:.3f}')
+            lines.append(f'dealsnap_stage_duration_ms_sum{{stage="{stage}"}} {s["mean_ms"] * s["count"]:.3f}')
+            lines.append(f'dealsnap_stage_duration_ms_count{{stage="{stage}"}} {s["count"]}')
+        with self._lock:
+            gauges = dict(self._gauges)
+        for family in sorted({key.split("{")[0] for key in gauges}):
+            lines.append(f"# TYPE {family} gauge")
+            lines.extend(f"{key} {value:g}" for key, value in sorted(gauges.items()) if key.split("{")[0] == family)
+        return "\n".join(lines) + "\n"
+
+    def flush(self, force: bool = False) -> None:
+        # Rewrites the Prometheus file at most every prom_interval_s; atomic
+        # rename so a scraper never reads half a file. Sessions flush from
+        # their own threads: one writes while the others skip (a forced flush
+        # waits its turn), and a write that fails is logged, never raised
+        # into the page that happened to trigger it.
+        if not self.prom_path or not self._flush_lock.acquire(blocking=force):
+            return
+        try:
+            now = time.monotonic()
+            if not force and now - self._last_prom_write < self.prom_interval_s:
+                return
+            self._last_prom_write = now
+            directory, name = os.path.split(os.path.abspath(self.prom_path))
+            fd, tmp = tempfile.mkstemp(prefix=f".{name}.", suffix=".tmp", dir=directory)
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as fh:
+                    fh.write(self.prometheus_text())
+                os.chmod(tmp, 0o644)     # mkstemp creates 0600; the scraper may be another user
+                os.replace(tmp, self.prom_path)
+            except BaseException:
+                os.unlink(tmp)
+                raise
+        except OSError as e:
+            log.warning("could not write metrics to %s: %s", self.prom_path, e)
+        finally:
+            self._flush_lock.release()
@@ -0,0 +1,360 @@
+# dealsnap/migrations.py
+# ----------------------------- #
+# Snapshot schema migrations (compiled, dict-level)
+# ----------------------------- #
+#
+#   python -m dealsnap.migrations archive/ backbook.ndjson -o migrated/ [-j 8]
+#
+# Snapshots carry `schema_version` (files from before versioning count as 1).
+# MIGRATIONS[v] lists the declarative steps that take version v to v + 1.
+# compile_plan() folds every step from a source version up to SCHEMA_VERSION
+# into one tree keyed by path, so applying it is a single walk that only
+# descends where some step applies; plans are compiled once per source version.
+# Migration works on the parsed JSON, never on models, so archives can be
+# rewritten at JSON-parse speed before (or without) validation.
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, NamedTuple, Optional, Sequence, Tuple, Union
+
+from pydantic import ValidationError
+
+from dealsnap.helpers import lvr_fraction
+from dealsnap.models import SCHEMA_VERSION, DealSnapshotForm
+from dealsnap.sources import GLOB_CHARS, NDJSON_SUFFIXES, chunked, expand_sources
+
+# ===========================
+# Steps
+# ===========================
+# Paths are dotted field names; "[]" after a name means "each item of this list",
+# e.g. "applicant_section.applicants[].customer_status".
+class Rename(NamedTuple):
+    path: str
+    to: str                 # new name for the last segment, same parent
+
+class Remap(NamedTuple):
+    path: str
+    values: Mapping[Any, Any]   # old value -> new value; other values are kept
+
+class Coerce(NamedTuple):
+    path: str
+    func: Callable[[Any], Any]
+
+class Default(NamedTuple):
+    path: str
+    value: Any              # set only when the field is missing
+
+class Drop(NamedTuple):
+    path: str
+
+Step = Union[Rename, Remap, Coerce, Default, Drop]
+
+PEOPLE = ("applicant_section.applicants[]", "applicant_section.guarantors[]")
+
+MIGRATIONS: Dict[int, List[Step]] = {
+    # 1 -> 2: versioned output; CustomerStatus spelling fixed; LVR stored as a fraction.
+    1: [
+        *(Remap(f"{people}.customer_status", {
+            "Exisiting": "Existing", "Exsisting": "Existing", "Existng": "Existing",
+            "existing": "Existing", "new": "New",
+        }) for people in PEOPLE),
+        Coerce("application_summary.LVR", lvr_fraction),
+    ],
+}
+
+class MigrationError(ValueError):
+    pass
+
+class StepError(MigrationError):
+    # A Coerce step's function rejected a record's value; loc is the field's
+    # path (list items without their index).
+    def __init__(self, loc: Tuple[str, ...], message: str):
+        self.loc = loc
+        super().__init__(message)
+
+# ===========================
+# Compiler
+# ===========================
+# A node is an ordered list of (kind, key, payload): "visit" descends into a
+# child node (a list of such entries, applied to a dict or each item of a list),
+# anything else is a leaf action on parent[key]. Steps are inserted in version
+# order and consecutive visits to the same key share one child, so a later
+# step sees the effect of earlier ones (e.g. a field renamed one version ago).
+Node = List[Tuple[str, str, Any]]
+
+def _segments(path: str) -> List[Tuple[str, bool]]:
+    return [(part[:-2], True) if part.endswith("[]") else (part, False) for part in path.split(".")]
+
+def _insert(root: Node, step: Step) -> None:
+    *parents, (leaf, each) = _segments(step.path)
+    if each:
+        raise MigrationError(f"{step.path}: a step must end on a field, not a list's items")
+    node = root
+    for key, is_list in parents:
+        kind = "visit_each" if is_list else "visit"
+        if node and node[-1][0] == kind and node[-1][1] == key:
+            node = node[-1][2]
+        else:
+            child: Node = []
+            node.append((kind, key, child))
+            node = child
+    node.append((type(step).__name__.lower(), leaf, step))
+
+def _compile_node(node: Node) -> Callable[[Any], None]:
+    actions = [_compile_entry(*entry) for entry in node]
+
+    def apply(data: Any) -> None:
+        if isinstance(data, dict):
+            for action in actions:
+                action(data)
+    return apply
+
+def _compile_entry(kind: str, key: str, payload: Any) -> Callable[[Dict[str, Any]], None]:
+    if kind == "visit":
+        child = _compile_node(payload)
+        return lambda d: child(d.get(key))
+    if kind == "visit_each":
+        child = _compile_node(payload)
+
+        def each(d: Dict[str, Any]) -> None:
+            items = d.get(key)
+            if isinstance(items, list):
+                for item in items:
+                    child(item)
+        return each
+    if kind == "rename":
+        to = payload.to
+
+        def rename(d: Dict[str, Any]) -> None:
+            if key in d and to not in d:
+                d[to] = d.pop(key)
+        return rename
+    if kind == "remap":
+        values = dict(payload.values)
+
+        def remap(d: Dict[str, Any]) -> None:
+            value = d.get(key)
+            if value is not None and not isinstance(value, (dict, list)) and value in values:
+                d[key] = values[value]
+        return remap
+    if kind == "coerce":
+        func = payload.func
+        loc = tuple(name for name, _ in _segments(payload.path))
+
+        def coerce(d: Dict[str, Any]) -> None:
+            if key in d:
+                try:
+                    d[key] = func(d[key])
+                except ValueError as e:
+                    raise StepError(loc, str(e)) from e
+        return coerce
+    if kind == "default":
+        value = payload.value
+        return lambda d: d.setdefault(key, value)
+    if kind == "drop":
+        return lambda d: d.pop(key, None)
+    raise MigrationError(f"unknown step kind {kind!r}")
+
+@lru_cache(maxsize=None)
+def compile_plan(from_version: int, to_version: int = SCHEMA_VERSION) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    root: Node = []
+    for version in range(from_version, to_version):
+        for step in MIGRATIONS.get(version, ()):
+            _insert(root, step)
+    walk = _compile_node(root)
+
+    def plan(data: Dict[str, Any]) -> Dict[str, Any]:
+        walk(data)
+        data["schema_version"] = to_version
+        return data
+    return plan
+
+# ===========================
+# Applying
+# ===========================
+def schema_version(data: Mapping[str, Any]) -> int:
+    version = data.get("schema_version", 1)
+    if not isinstance(version, int) or isinstance(version, bool) or version < 1:
+        raise MigrationError(f"invalid schema_version {version!r}")
+    if version > SCHEMA_VERSION:
+        raise MigrationError(f"schema_version {version} is newer than this release ({SCHEMA_VERSION})")
+    return version
+
+def migrate(data: Any) -> Any:
+    # Brings a parsed snapshot up to SCHEMA_VERSION in place (and returns it).
+    # Anything that isn't a JSON object is returned untouched for the
+    # validator to reject.
+    if not isinstance(data, dict):
+        return data
+    version = schema_version(data)
+    return data if version == SCHEMA_VERSION else compile_plan(version)(data)
+
+def migrate_json(raw: Union[bytes, str]) -> Any:
+    return migrate(json.loads(raw))
+
+# A "schema_version" key outside a string (its quote isn't escaped). It may
+# belong to a nested object, so a match is only a hint; validate_json checks
+# the validated snapshot really states it. find() scans at memchr speed,
+# several times faster than a regex search over the whole record.
+_VERSION_VALUE = re.compile(r"\s*:\s*(\d+)")
+_VERSION_VALUE_BYTES = re.compile(rb"\s*:\s*(\d+)")
+
+def stated_version(raw: Union[bytes, str]) -> Optional[int]:
+    # The schema_version a raw record appears to state, without parsing it.
+    key, value, backslash = (
+        (b'"schema_version"', _VERSION_VALUE_BYTES, 92) if isinstance(raw, bytes)
+        else ('"schema_version"', _VERSION_VALUE, "\\")
+    )
+    at = raw.find(key)
+    while at >= 0:
+        if at == 0 or raw[at - 1] != backslash:
+            match = value.match(raw, at + len(key))
+            if match:
+                return int(match.group(1))
+        at = raw.find(key, at + 1)
+    return None
+
+def validate_json(raw: Union[bytes, str]) -> DealSnapshotForm:
+    # Snapshots that state SCHEMA_VERSION take Pydantic's JSON path without
+    # building a dict. Older or unversioned ones (a missing schema_version
+    # means version 1) go straight to parse, migrate, validate; so do
+    # current-looking records that fail there, which gives the precise error.
+    if stated_version(raw) == SCHEMA_VERSION:
+        try:
+            snapshot = DealSnapshotForm.model_validate_json(raw)
+            if "schema_version" in snapshot.model_fields_set:
+                return snapshot
+        except ValidationError:
+            pass
+    return DealSnapshotForm.model_validate(migrate_json(raw))
+
+# ===========================
+# CLI: rewrite archives
+# ===========================
+# (source path, output path or None when it would fall outside the output folder, NDJSON?)
+Job = Tuple[str, Optional[str], bool]
+
+def dump(data: Any) -> str:
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+def migrate_file(job: Job) -> Tuple[int, int, List[str]]:
+    # -> (records migrated, records failed, error messages). NDJSON is
+    # streamed line by line; a bad line is reported and passed through as-is.
+    source, target, ndjson = job
+    if target is None:
+        return 0, 1, [f"{source}: output would overwrite the source or fall outside the output folder; skipped"]
+    done = failed = 0
+    errors: List[str] = []
+    Path(target).parent.mkdir(parents=True, exist_ok=True)
+    tmp = f"{target}.tmp"
+    try:
+        with open(source, "rb") as src, open(tmp, "w", encoding="utf-8") as out:
+            lines: Iterable[bytes] = src if ndjson else [src.read()]
+            for line_no, raw in enumerate(lines, start=1):
+                if ndjson and not raw.strip():
+                    continue
+                try:
+                    out.write(dump(migrate_json(raw)))
+                    done += 1
+                except ValueError as e:   # JSONDecodeError and MigrationError
+                    out.write(raw.decode("utf-8", "replace").rstrip("\r\n"))
+                    failed += 1
+                    errors.append(f"{source}{f':{line_no}' if ndjson else ''}: {e}")
+                out.write("\n")
+        os.replace(tmp, target)
+    except OSError as e:
+        return done, failed + 1, [f"{source}: {e}"]
+    return done, failed, errors
+
+def migrate_chunk(jobs: List[Job]) -> List[Tuple[int, int, List[str]]]:
+    return [migrate_file(job) for job in jobs]
+
+def glob_root(pattern: str) -> str:
+    # The leading path components of a glob that hold no wildcard.
+    parts = Path(pattern).parts
+    fixed = []
+    for part in parts[:-1]:
+        if GLOB_CHARS & set(part):
+            break
+        fixed.append(part)
+    return os.path.join(*fixed) if fixed else ""
+
+def target_path(path: str, root: str, out_dir: str) -> Optional[str]:
+    # out_dir/<path relative to root>, or None if that lands outside out_dir
+    # (or on the source itself).
+    out = os.path.realpath(out_dir)
+    target = os.path.realpath(os.path.join(out, os.path.relpath(path, root or os.curdir)))
+    if os.path.commonpath([out, target]) != out or target == os.path.realpath(path):
+        return None
+    return target
+
+def iter_jobs(sources: Sequence[str], out_dir: str) -> Iterator[Job]:
+    # Outputs mirror each file's path relative to the source it was found
+    # under (a directory, a glob's fixed prefix or a file's folder). Unlike
+    # dealsnap.batch, directories also yield their NDJSON files.
+    for source in sources:
+        if os.path.isdir(source):
+            root = source
+            paths: Iterable[str] = sorted(
+                str(p) for p in Path(source).rglob("*") if p.suffix.lower() in {".json", *NDJSON_SUFFIXES}
+            )
+        elif GLOB_CHARS & set(source):
+            root = glob_root(source)
+            paths = expand_sources([source])
+        else:
+            root = os.path.dirname(source)
+            paths = [source]
+        for path in paths:
+            yield path, target_path(path, root, out_dir), Path(path).suffix.lower() in NDJSON_SUFFIXES
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m dealsnap.migrations",
+        description=f"Rewrite archived snapshots at schema_version {SCHEMA_VERSION}.",
+    )
+    parser.add_argument("sources", nargs="+", help="Directories, globs, .json files or .ndjson/.jsonl files")
+    parser.add_argument("-o", "--output", required=True, help="Folder for migrated copies (sources are left as-is)")
+    parser.add_argument("-j", "--workers", type=int, default=0, help="Worker processes (default: CPU count)")
+    parser.add_argument("--chunksize", type=int, default=64, help="Files per worker task (default: 64)")
+    return parser
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.workers < 0 or args.chunksize < 1:
+        print("--workers must be >= 0 and --chunksize >= 1", file=sys.stderr)
+        return 2
+    chunks = chunked(iter_jobs(args.sources, args.output), args.chunksize)
+    workers = args.workers or os.cpu_count() or 1
+    done = failed = 0
+
+    def tally(results: List[Tuple[int, int, List[str]]]) -> None:
+        nonlocal done, failed
+        for migrated, bad, errors in results:
+            done += migrated
+            failed += bad
+            for error in errors:
+                print(error, file=sys.stderr)
+
+    # Bounded window of in-flight chunks, as in dealsnap.batch, so millions of
+    # files never sit in the pool's queue at once.
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending: deque = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(migrate_chunk, chunk))
+            if len(pending) >= workers * 4:
+                tally(pending.popleft().result())
+        while pending:
+            tally(pending.popleft().result())
+    print(f"migrated {done} record(s) to schema_version {SCHEMA_VERSION}; {failed} failed", file=sys.stderr)
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,230 @@
+# dealsnap/models.py
+# ----------------------------- #
+# Enums + Pydantic models
+# ----------------------------- #
+from __future__ import annotations
+
+from typing import List, Optional, Union
+from enum import Enum
+
+from pydantic import BaseModel, ConfigDict, Field
+
+# Bumped whenever saved snapshots change shape; dealsnap.migrations brings
+# older files up to it.
+SCHEMA_VERSION = 2
+
+# ===========================
+# ENUMS (Dropdown Data)
+# ===========================
+class YesNo(str, Enum):
+    Yes = "Yes"
+    No = "No"
+
+class YesNoNA(str, Enum):
+    Yes = "Yes"
+    No = "No"
+    NA = "NA"
+
+class BrokerOrMRU(str, Enum):
+    Broker = "Broker"
+    MRU = "MRU"
+
+class CustomerStatus(str, Enum):
+    New = "New"
+    Existing = "Existing"  # corrected spelling
+
+class ResidentialStatus(str, Enum):
+    Aus = "Aus"
+    Overseas = "Overseas"
+
+class CitizenshipStatus(str, Enum):
+    Aus = "Aus"
+    NZ = "NZ"
+    Other = "Other"
+
+class NumberOfLoans(int, Enum):
+    One = 1
+    Two = 2
+    Three = 3
+    Four = 4
+
+class LoanProduct(str, Enum):
+    TailoredVariable = "Tailored Home Loan - Variable"
+    TailoredFixed1 = "Tailored Home Loan - 1 year fixed"
+    TailoredFixed2 = "Tailored Home Loan - 2 year fixed"
+    TailoredFixed3 = "Tailored Home Loan - 3 year fixed"
+    TailoredFixed4 = "Tailored Home Loan - 4 year fixed"
+    TailoredFixed5 = "Tailored Home Loan - 5 year fixed"
+    ChoiceVariable = "Tailored Home Loan, Choice Package - Variable"
+    ChoiceFixed1 = "Tailored Home Loan, Choice Package - 1 year fixed"
+    ChoiceFixed2 = "Tailored Home Loan, Choice Package - 2 year fixed"
+    ChoiceFixed3 = "Tailored Home Loan, Choice Package - 3 year fixed"
+    ChoiceFixed4 = "Tailored Home Loan, Choice Package - 4 year fixed"
+    ChoiceFixed5 = "Tailored Home Loan, Choice Package - 5 year fixed"
+    BaseVariable = "Base variable rate home loan"
+    Flexiplus = "Flexiplus Mortgage"
+    FlexiplusChoice = "Flexiplus Mortgage, Choice Package"
+
+# ===========================
+# Pydantic MODELS
+# (minimal set used by UI)
+# ===========================
+class SnapshotBaseModel(BaseModel):
+    # Core schemas are built on first validation instead of at import time, so
+    # processes that only need the enums or never validate start fast.
+    model_config = ConfigDict(defer_build=True)
+
+class ApplicationSummary(SnapshotBaseModel):
+    submission_date: str = Field(..., description="ISO date string")
+    budget_surplus: Optional[float] = None
+    PAT: Optional[str] = None
+    lender_id: str
+    LVR: Optional[Union[str, float]] = None   # a fraction (0.8) from schema_version 2
+    broker_name: Optional[str] = None
+    broker_phone_no: Optional[str] = None
+    aggregated_lending: Optional[YesNoNA] = None
+    lmi_required: Optional[YesNo] = None
+    broker_or_MRU: Optional[BrokerOrMRU] = None
+    cas_decision: Optional[str] = None
+    government_guarantee_scheme: Optional[str] = None
+
+class LoanDetail(SnapshotBaseModel):
+    loan_amount: Optional[float] = None
+    loan_type: Optional[str] = None
+    loan_product: Optional[LoanProduct] = None
+    repayment_type: Optional[str] = None
+    loan_term_years: Optional[int] = None
+    upc_code: Optional[str] = None
+    pricing_docs_attached: Optional[str] = None
+    interest_rate: Optional[float] = None
+    construction: Optional[str] = None
+
+class LoanSection(SnapshotBaseModel):
+    number_of_loans: NumberOfLoans
+    loans: List[LoanDetail]
+    loan_purpose_notes: Optional[str] = None
+
+class PersonBase(SnapshotBaseModel):
+    name: str
+    customer_number: Optional[str] = None
+    dob: Optional[str] = None
+    customer_status: Optional[CustomerStatus] = None
+    residential_status: Optional[ResidentialStatus] = None
+    citizenship_status: Optional[CitizenshipStatus] = None
+    number_of_dependents: Optional[int] = None
+    marital_status: Optional[str] = None
+    vevo_check_completed: Optional[YesNo] = None
+
+class Applicant(PersonBase):
+    pass
+
+class Guarantor(PersonBase):
+    pass
+
+class ApplicantSection(SnapshotBaseModel):
+    number_of_applicants: int
+    number_of_guarantors: int
+    applicants: List[Applicant]
+    guarantors: List[Guarantor] = []
+    alerts_narratives_details: Optional[str] = None
+
+class IncomeLine(SnapshotBaseModel):
+    applicant: str
+    income_type: Optional[str] = None
+    employment_type: Optional[str] = None
+    employment_basis: Optional[str] = None
+    employment_start_date: Optional[str] = None
+    income_docs_attached: Optional[str] = None
+    allowances: Optional[YesNo] = None
+    deductions: Optional[YesNo] = None
+    verification_for_allowances: Optional[YesNo] = None
+    flags: Optional[str] = None
+    semp_proof_of_lodgement: Optional[YesNo] = None
+    semp_broker_rationale: Optional[str] = None
+    semp_company_search_verified: Optional[YesNo] = None
+    income_frequency: Optional[str] = None
+    annual_amount: Optional[float] = None
+
+class IncomeSection(SnapshotBaseModel):
+    number_of_incomes: int
+    incomes: List[IncomeLine] = []
+    income_summary: Optional[str] = None
+
+class ExpenseLine(SnapshotBaseModel):
+    financial_passport_run: Optional[str] = None
+    zero_expenses_listed: Optional[str] = None
+    discrepancies: Optional[str] = None
+    commentary: Optional[str] = None
+    expense_category: Optional[str] = None
+    monthly_amount: Optional[float] = None
+
+class ExpenseSection(SnapshotBaseModel):
+    number_of_households: int
+    households: List[ExpenseLine] = []
+    expenses_notes_summary: Optional[str] = None
+
+class AssetLiabilitySection(SnapshotBaseModel):
+    ccr_complete: Optional[str] = None
+    refinance_payment_history_verified: Optional[str] = None
+    transaction_report_check_complete: Optional[str] = None
+    genuine_savings_type: Optional[str] = None
+    genuine_savings_docs_verified: Optional[str] = None
+    commentary: Optional[str] = None
+    existing_homeloan_repayments_validated: Optional[str] = None
+    imminent_retirement_docs_verified: Optional[str] = None
+    assets_liabilities_notes_summary: Optional[str] = None
+
+class SecurityDetail(SnapshotBaseModel):
+    address: Optional[str] = None
+    property_purpose: Optional[str] = None
+    property_type: Optional[str] = None
+    transaction: Optional[str] = None
+    contract_of_sale_verified: Optional[str] = None
+    purchase_price: Optional[float] = None
+    valuation_report_verified: Optional[str] = None
+    valuation_amount: Optional[float] = None
+    valuation_risk_alerts: Optional[str] = None
+    risk_ratings: Optional[str] = None
+    title_search_verified: Optional[str] = None
+    ownership: Optional[str] = None
+    construction: Optional[str] = None
+    construction_contract_verified: Optional[str] = None
+    out_of_contract_items: Optional[str] = None
+
+class SecuritySection(SnapshotBaseModel):
+    securities: List[SecurityDetail] = []
+
+class HGSBlock(SnapshotBaseModel):
+    NOA_attached: Optional[YesNo] = None
+    medicare_or_PMKeys_ID_held: Optional[YesNo] = None
+    deposit_requirements_met: Optional[YesNo] = None
+    first_home_buyer: Optional[YesNo] = None
+    home_buyer_declaration_attached: Optional[YesNo] = None
+    is_property_regional: Optional[YesNo] = None
+    evidence_of_living_regionally: Optional[YesNo] = None
+    currently_own_property: Optional[YesNo] = None
+    single_parent_evidence: Optional[YesNo] = None
+    retain_savings_notes: Optional[str] = None
+    scheme_eligibility_notes: Optional[str] = None
+
+class LMIBlock(SnapshotBaseModel):
+    lmi_applicable: Optional[str] = None
+    lmi_calculation: Optional[Union[str, float]] = None
+    lmi_provider: Optional[str] = None
+    existing_LMI: Optional[YesNo] = None
+    waiver_medical_practitioners_AHPRA: Optional[YesNo] = None
+    waiver_professional_services_registration: Optional[YesNo] = None
+    waiver_other_broker_notes: Optional[str] = None
+
+class DealSnapshotForm(SnapshotBaseModel):
+    schema_version: int = SCHEMA_VERSION
+    application_summary: ApplicationSummary
+    loan_section: LoanSection
+    applicant_section: ApplicantSection
+    income_section: IncomeSection
+    expense_section: ExpenseSection
+    asset_liability_section: AssetLiabilitySection
+    security_section: SecuritySection
+    hgs_block: Optional[HGSBlock] = None
+    lmi_block: Optional[LMIBlock] = None
+
@@ -0,0 +1,466 @@
+# dealsnap/policy.py
+# ----------------------------- #
+# Credit-policy rules (declarative, compiled)
+# ----------------------------- #
+#
+#   python -m dealsnap.policy --store dealsnap.sqlite3 [--rules new_rules.json] [--only RULE_ID] [-o breaches.ndjson]
+#   python -m dealsnap.policy archive/ backbook.ndjson
+#
+# A Rule says that whenever one condition (`when`) holds, another (`require`)
+# must hold too. Conditions test dotted snapshot paths, written as in
+# dealsnap.migrations: "[]" means "each item of this list", and a rule that
+# uses it is checked once per item (e.g. per applicant). Rules are plain data,
+# either POLICY below or a JSON file of rule objects for the CLI (see
+# rule_from_dict). Every rule compiles two ways:
+#   - into a Python predicate over one snapshot's JSON shape, used at submit;
+#   - into a NumPy predicate over columns, used to check a whole archive.
+# Archive columns are pulled out of the stored JSON once per path and then
+# reused, so checking another rule only extracts the paths that rule adds.
+# A missing or non-numeric value never satisfies a condition.
+from __future__ import annotations
+
+import argparse
+import json
+import operator
+import sys
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, NamedTuple, Optional, Sequence, Set, Tuple, Union
+
+import numpy as np
+
+from dealsnap.models import DealSnapshotForm
+
+# ===========================
+# Rules
+# ===========================
+class Eq(NamedTuple):
+    path: str
+    value: Any
+
+class OneOf(NamedTuple):
+    path: str
+    values: Tuple[Any, ...]
+
+class Compare(NamedTuple):
+    path: str
+    op: str                 # "<", "<=", ">" or ">="
+    value: float
+
+class Present(NamedTuple):
+    path: str               # not missing, None or ""
+
+class Not(NamedTuple):
+    cond: "Condition"
+
+class AllOf(NamedTuple):
+    conds: Tuple["Condition", ...]
+
+class AnyOf(NamedTuple):
+    conds: Tuple["Condition", ...]
+
+Condition = Union[Eq, OneOf, Compare, Present, Not, AllOf, AnyOf]
+
+class Rule(NamedTuple):
+    rule_id: str
+    message: str
+    when: Condition
+    require: Optional[Condition] = None     # None: `when` on its own is the breach
+    severity: str = "error"                 # or "warning"
+
+class Breach(NamedTuple):
+    rule_id: str
+    severity: str
+    message: str
+    item: Optional[str] = None              # e.g. "applicants 2" for per-item rules
+
+    @property
+    def label(self) -> str:
+        return f"{self.message} ({self.item})" if self.item else self.message
+
+class PolicyError(ValueError):
+    pass
+
+PEOPLE = {"applicants": "applicant_section.applicants[]", "guarantors": "applicant_section.guarantors[]"}
+LVR = "application_summary.LVR"
+LMI_REQUIRED = "application_summary.lmi_required"
+LMI_WAIVED = AnyOf((
+    Eq("lmi_block.waiver_medical_practitioners_AHPRA", "Yes"),
+    Eq("lmi_block.waiver_professional_services_registration", "Yes"),
+))
+
+POLICY: List[Rule] = [
+    *(Rule(f"vevo_{role}", "VEVO check must be completed when citizenship status is Other",
+           when=Eq(f"{people}.citizenship_status", "Other"), require=Eq(f"{people}.vevo_check_completed", "Yes"))
+      for role, people in PEOPLE.items()),
+    Rule("hgs_first_home_buyer", "HGS requires a first home buyer",
+         when=Present("hgs_block"), require=Eq("hgs_block.first_home_buyer", "Yes")),
+    Rule("lmi_above_80_lvr", "LMI must be required above 80% LVR unless waived",
+         when=Compare(LVR, ">", 0.8), require=AnyOf((Eq(LMI_REQUIRED, "Yes"), LMI_WAIVED))),
+    Rule("lmi_at_or_below_80_lvr", "LMI marked as required at or below 80% LVR",
+         when=AllOf((Eq(LMI_REQUIRED, "Yes"), Compare(LVR, "<=", 0.8))), severity="warning"),
+]
+
+_OPS: Dict[str, Callable[[Any, Any], Any]] = {"<": operator.lt, "<=": operator.le, ">": operator.gt, ">=": operator.ge}
+
+def condition_from_dict(spec: Mapping[str, Any]) -> Condition:
+    # {"eq": [path, value]}, {"one_of": [path, [values]]}, {"present": path},
+    # {"<" | "<=" | ">" | ">=": [path, number]}, {"not": cond},
+    # {"all": [conds]}, {"any": [conds]}
+    if not isinstance(spec, Mapping) or len(spec) != 1:
+        raise PolicyError(f"a condition is an object with one key, got {spec!r}")
+    (kind, arg), = spec.items()
+    try:
+        if kind == "eq":
+            return Eq(*arg)
+        if kind == "one_of":
+            return OneOf(arg[0], tuple(arg[1]))
+        if kind == "present":
+            return Present(arg)
+        if kind in _OPS:
+            return Compare(arg[0], kind, float(arg[1]))
+        if kind == "not":
+            return Not(condition_from_dict(arg))
+        if kind in ("all", "any"):
+            conds = tuple(condition_from_dict(c) for c in arg)
+            return AllOf(conds) if kind == "all" else AnyOf(conds)
+    except (TypeError, ValueError, IndexError) as e:
+        raise PolicyError(f"bad {kind!r} condition {arg!r}: {e}") from None
+    raise PolicyError(f"unknown condition {kind!r}")
+
+def rule_from_dict(spec: Mapping[str, Any]) -> Rule:
+    try:
+        return Rule(
+            rule_id=str(spec["id"]), message=str(spec["message"]),
+            when=condition_from_dict(spec["when"]),
+            require=condition_from_dict(spec["require"]) if spec.get("require") is not None else None,
+            severity=str(spec.get("severity", "error")),
+        )
+    except KeyError as e:
+        raise PolicyError(f"rule is missing {e}") from None
+
+def load_rules(path: str) -> List[Rule]:
+    with open(path, "r", encoding="utf-8") as fh:
+        specs = json.load(fh)
+    return [rule_from_dict(spec) for spec in (specs if isinstance(specs, list) else [specs])]
+
+# ===========================
+# Paths
+# ===========================
+def _split(path: str) -> Tuple[Optional[str], str]:
+    # "applicant_section.applicants[].dob" -> ("applicant_section.applicants", "dob")
+    if "[]" not in path:
+        return None, path
+    list_path, _, field = path.partition("[].")
+    if not field or "[]" in field:
+        raise PolicyError(f"{path}: only one list level is supported, ending on a field")
+    return list_path, field
+
+def _conditions(cond: Condition) -> Iterator[Condition]:
+    yield cond
+    if isinstance(cond, Not):
+        yield from _conditions(cond.cond)
+    elif isinstance(cond, (AllOf, AnyOf)):
+        for child in cond.conds:
+            yield from _conditions(child)
+
+def rule_paths(rule: Rule) -> Set[str]:
+    conds = [*_conditions(rule.when), *(_conditions(rule.require) if rule.require is not None else ())]
+    return {c.path for c in conds if hasattr(c, "path")}
+
+def rule_scope(rule: Rule) -> Optional[str]:
+    # The list a rule is checked per item of, if any.
+    lists = {_split(path)[0] for path in rule_paths(rule)} - {None}
+    if len(lists) > 1:
+        raise PolicyError(f"{rule.rule_id}: conditions span several lists ({', '.join(sorted(lists))})")
+    return lists.pop() if lists else None
+
+def _number(value: Any) -> Optional[float]:
+    if isinstance(value, bool):
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+def _present(value: Any) -> bool:
+    return value is not None and value != "" and value != []
+
+# ===========================
+# Per deal
+# ===========================
+def _getter(path: str) -> Callable[[Any, Any], Any]:
+    list_path, field = _split(path)
+    keys = field.split(".")
+
+    def get(deal: Any, item: Any) -> Any:
+        value = item if list_path else deal
+        for key in keys:
+            if not isinstance(value, dict):
+                return None
+            value = value.get(key)
+        return value
+    return get
+
+def _compile_check(cond: Condition) -> Callable[[Any, Any], bool]:
+    if isinstance(cond, Eq):
+        get, want = _getter(cond.path), cond.value
+        return lambda deal, item: get(deal, item) == want
+    if isinstance(cond, OneOf):
+        get, wanted = _getter(cond.path), cond.values
+        return lambda deal, item: get(deal, item) in wanted
+    if isinstance(cond, Compare):
+        get, op, bound = _getter(cond.path), _OPS[cond.op], cond.value
+
+        def compare(deal: Any, item: Any) -> bool:
+            value = _number(get(deal, item))
+            return value is not None and op(value, bound)
+        return compare
+    if isinstance(cond, Present):
+        get = _getter(cond.path)
+        return lambda deal, item: _present(get(deal, item))
+    if isinstance(cond, Not):
+        inner = _compile_check(cond.cond)
+        return lambda deal, item: not inner(deal, item)
+    if isinstance(cond, AllOf):
+        checks = [_compile_check(c) for c in cond.conds]
+        return lambda deal, item: all(check(deal, item) for check in checks)
+    if isinstance(cond, AnyOf):
+        checks = [_compile_check(c) for c in cond.conds]
+        return lambda deal, item: any(check(deal, item) for check in checks)
+    raise PolicyError(f"unknown condition {cond!r}")
+
+def compile_rule(rule: Rule) -> Callable[[Mapping[str, Any]], List[Breach]]:
+    scope = rule_scope(rule)
+    when = _compile_check(rule.when)
+    require = _compile_check(rule.require) if rule.require is not None else (lambda deal, item: False)
+    items = _getter(scope) if scope else None
+    name = scope.rsplit(".", 1)[-1] if scope else None
+
+    def check(deal: Mapping[str, Any]) -> List[Breach]:
+        if items is None:
+            return [Breach(rule.rule_id, rule.severity, rule.message)] if when(deal, None) and not require(deal, None) else []
+        listed = items(deal, None)
+        return [
+            Breach(rule.rule_id, rule.severity, rule.message, f"{name} {i + 1}")
+            for i, item in enumerate(listed if isinstance(listed, list) else ())
+            if when(deal, item) and not require(deal, item)
+        ]
+    return check
+
+@lru_cache(maxsize=8)
+def compile_policy(rules: Tuple[Rule, ...]) -> Callable[[Mapping[str, Any]], List[Breach]]:
+    checks = [compile_rule(rule) for rule in rules]
+    return lambda deal: [breach for check in checks for breach in check(deal)]
+
+def check_deal(snapshot: Union[DealSnapshotForm, Mapping[str, Any]], rules: Sequence[Rule] = POLICY) -> List[Breach]:
+    data = snapshot.model_dump(mode="json") if isinstance(snapshot, DealSnapshotForm) else snapshot
+    return compile_policy(tuple(rules))(data)
+
+# ===========================
+# Columnar batch
+# ===========================
+# Record = (deal_id, one value per requested root path); a root is a scalar
+# path or a list path (whose value is the whole list).
+Record = Tuple[str, List[Any]]
+Loader = Callable[[List[str]], Iterable[Record]]
+
+def _objects(values: Iterable[Any], count: int) -> np.ndarray:
+    return np.fromiter(values, dtype=object, count=count)
+
+class Columns:
+    # One object array per scalar path (a value per deal) and, per list, the
+    # owning deal and position of every item plus one array per item field.
+    # Paths are loaded on first use, all missing ones in a single pass.
+    def __init__(self, loader: Loader):
+        self._loader = loader
+        self.deal_ids: List[str] = []
+        self._roots: Dict[str, Any] = {}        # root path -> per-deal object array
+        self._items: Dict[str, Tuple[np.ndarray, np.ndarray, np.ndarray]] = {}   # list -> (owner, position, items)
+        self._fields: Dict[str, np.ndarray] = {}
+        self._numbers: Dict[str, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self.deal_ids)
+
+    def load(self, paths: Iterable[str]) -> None:
+        missing = sorted({_split(p)[0] or p for p in paths} - set(self._roots))
+        if not missing:
+            return
+        ids: List[str] = []
+        values: List[List[Any]] = [[] for _ in missing]
+        for deal_id, record in self._loader(missing):
+            ids.append(deal_id)
+            for column, value in zip(values, record):
+                column.append(value)
+        if self._roots and ids != self.deal_ids:
+            # The archive changed since the last load; start over.
+            self.__init__(self._loader)
+            return self.load(paths)
+        self.deal_ids = ids
+        for root, column in zip(missing, values):
+            self._roots[root] = _objects(column, len(ids))
+
+    def column(self, path: str, scope: Optional[str]) -> np.ndarray:
+        # Values of `path` on each row of `scope` (deals, or items of a list).
+        list_path, field = _split(path)
+        if list_path is None:
+            values = self._scalar(path)
+            return values if scope is None else values[self.items(scope)[0]]
+        key = f"{list_path}[].{field}"
+        if key not in self._fields:
+            _, _, items = self.items(list_path)
+            get = _getter(key)
+            self._fields[key] = _objects((get(None, item) for item in items), len(items))
+        return self._fields[key]
+
+    def numbers(self, path: str, scope: Optional[str]) -> np.ndarray:
+        key = f"{scope}|{path}"
+        if key not in self._numbers:
+            values = self.column(path, scope)
+            self._numbers[key] = np.fromiter(
+                (np.nan if (n := _number(v)) is None else n for v in values), dtype=float, count=len(values),
+            )
+        return self._numbers[key]
+
+    def items(self, list_path: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        # (owner deal index, position in its list, item) for every item.
+        if list_path not in self._items:
+            owner: List[int] = []
+            position: List[int] = []
+            flat: List[Any] = []
+            for i, listed in enumerate(self._scalar(list_path)):
+                if isinstance(listed, list):
+                    owner.extend([i] * len(listed))
+                    position.extend(range(len(listed)))
+                    flat.extend(listed)
+            self._items[list_path] = (np.asarray(owner, dtype=np.int64), np.asarray(position, dtype=np.int64),
+                                      _objects(flat, len(flat)))
+        return self._items[list_path]
+
+    def _scalar(self, path: str) -> np.ndarray:
+        if path not in self._roots:
+            self.load([path])
+        return self._roots[path]
+
+def _compile_mask(cond: Condition, scope: Optional[str]) -> Callable[[Columns], np.ndarray]:
+    if isinstance(cond, Eq):
+        return lambda cols: np.asarray(cols.column(cond.path, scope) == cond.value, dtype=bool)
+    if isinstance(cond, OneOf):
+        wanted = cond.values
+        return lambda cols: np.fromiter((v in wanted for v in cols.column(cond.path, scope)), dtype=bool)
+    if isinstance(cond, Compare):
+        op = _OPS[cond.op]
+        return lambda cols: op(cols.numbers(cond.path, scope), cond.value)   # NaN compares False
+    if isinstance(cond, Present):
+        return lambda cols: np.fromiter((_present(v) for v in cols.column(cond.path, scope)), dtype=bool)
+    if isinstance(cond, Not):
+        inner = _compile_mask(cond.cond, scope)
+        return lambda cols: ~inner(cols)
+    if isinstance(cond, (AllOf, AnyOf)):
+        masks = [_compile_mask(c, scope) for c in cond.conds]
+        combine = np.logical_and.reduce if isinstance(cond, AllOf) else np.logical_or.reduce
+        return lambda cols: combine([mask(cols) for mask in masks])
+    raise PolicyError(f"unknown condition {cond!r}")
+
+def check_columns(cols: Columns, rules: Sequence[Rule]) -> Dict[str, Tuple[np.ndarray, Optional[np.ndarray]]]:
+    # rule_id -> (deal index per breach, item position per breach or None).
+    cols.load(path for rule in rules for path in rule_paths(rule))
+    out: Dict[str, Tuple[np.ndarray, Optional[np.ndarray]]] = {}
+    for rule in rules:
+        scope = rule_scope(rule)
+        breach = _compile_mask(rule.when, scope)(cols)
+        if rule.require is not None:
+            breach &= ~_compile_mask(rule.require, scope)(cols)
+        if scope is None:
+            out[rule.rule_id] = (np.flatnonzero(breach), None)
+        else:
+            owner, position, _ = cols.items(scope)
+            out[rule.rule_id] = (owner[breach], position[breach])
+    return out
+
+def payload_loader(payloads: Iterable[Tuple[str, Mapping[str, Any]]]) -> Loader:
+    # Columns over already-parsed snapshots (kept in memory for reloads).
+    records = list(payloads)
+
+    def load(roots: List[str]) -> Iterator[Record]:
+        getters = [_getter(root) for root in roots]
+        for deal_id, data in records:
+            yield deal_id, [get(data, None) for get in getters]
+    return load
+
+def iter_archive(sources: Sequence[str]) -> Iterator[Tuple[str, Mapping[str, Any]]]:
+    # (record id, migrated snapshot JSON) per record in files; ids as in dealsnap.duplicates.
+    from dealsnap.sources import expand_sources, iter_tasks
+    from dealsnap.migrations import migrate
+
+    for source, line_no, raw in iter_tasks(expand_sources(sources)):
+        try:
+            if raw is None:
+                with open(source, "rb") as fh:
+                    raw = fh.read()
+            data = migrate(json.loads(raw))
+        except (OSError, ValueError):
+            continue
+        if isinstance(data, dict):
+            yield (source if line_no is None else f"{source}:{line_no}"), data
+
+# ===========================
+# CLI
+# ===========================
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m dealsnap.policy",
+        description="Check credit-policy rules against every deal in a store or archive.",
+    )
+    parser.add_argument("sources", nargs="*", help="Directories, globs, .json files or .ndjson/.jsonl files")
+    parser.add_argument("--store", help="Check the deals in this deal store instead of files")
+    parser.add_argument("--rules", action="append", default=[],
+                        help="JSON file of extra rules (repeatable); see dealsnap.policy.rule_from_dict")
+    parser.add_argument("--only", action="append", default=[], help="Only check this rule ID (repeatable)")
+    parser.add_argument("-o", "--output", help="Write one NDJSON line per breach here")
+    return parser
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    if bool(args.store) == bool(args.sources):
+        print("give either --store or file sources", file=sys.stderr)
+        return 2
+    try:
+        rules = POLICY + [rule for path in args.rules for rule in load_rules(path)]
+    except (OSError, ValueError) as e:
+        print(f"could not load rules: {e}", file=sys.stderr)
+        return 2
+    if args.only:
+        rules = [rule for rule in rules if rule.rule_id in set(args.only)]
+    store = None
+    if args.store:
+        from dealsnap.store import DealStore
+
+        store = DealStore(args.store)
+        cols = Columns(store.json_values)
+    else:
+        cols = Columns(payload_loader(iter_archive(args.sources)))
+    results = check_columns(cols, rules)
+    if store is not None:
+        store.close()
+
+    by_rule = {rule.rule_id: rule for rule in rules}
+    out = open(args.output, "w", encoding="utf-8") if args.output else None
+    try:
+        for rule_id, (deals, positions) in results.items():
+            rule = by_rule[rule_id]
+            print(f"{rule_id} ({rule.severity}): {len(np.unique(deals))} of {len(cols)} deal(s)", file=sys.stderr)
+            if out is None:
+                continue
+            for n, deal in enumerate(deals):
+                line = {"deal_id": cols.deal_ids[deal], "rule_id": rule_id, "severity": rule.severity}
+                if positions is not None:
+                    line["item"] = int(positions[n]) + 1
+                out.write(json.dumps(line) + "\n")
+    finally:
+        if out is not None:
+            out.close()
+    return 1 if any(len(d) and by_rule[r].severity == "error" for r, (d, _) in results.items()) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,287 @@
+# dealsnap/portfolio.py
+# ----------------------------- #
+# Vectorized portfolio summary engine
+# ----------------------------- #
+# The per-deal metrics of render_submission_summary (total loan amount, annual
+# income, monthly expenses and repayments, net monthly position) held as NumPy columns for a
+# whole portfolio. Group keys are encoded to dense int codes so every group-by
+# is a bincount, and per-group sums are maintained as deals arrive, so adding
+# or replacing one deal is O(1) and reading a summary never rescans the columns.
+from __future__ import annotations
+
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from dealsnap.frequency import annual_income
+from dealsnap.models import DealSnapshotForm
+from dealsnap.repayments import GRID_TERMS, RATE_BUFFERS, is_interest_only, monthly_repayment, repayment_grid
+
+DEAL_GROUPS = ("lender_id", "broker_name", "month")
+LOAN_GROUPS = ("loan_product",)
+GROUP_KEYS = DEAL_GROUPS + LOAN_GROUPS
+
+# Deal value columns; group sums carry a leading count column.
+LOAN_TOTAL, ANNUAL_INCOME, MONTHLY_EXPENSES, MONTHLY_REPAYMENTS = range(4)
+
+# (deal_id, lender_id, broker_name, submission_date, total_loan_amount, annual_income, monthly_expenses)
+DealRow = Tuple[str, str, str, str, float, float, float]
+# (deal_id, loan_product, loan_amount, interest_rate, loan_term_years, repayment_type)
+LoanRow = Tuple[str, str, float, float, int, str]
+
+def month_of(submission_date: str) -> str:
+    return submission_date[:7] if submission_date else ""
+
+def deal_rows_from_snapshot(deal_id: str, snapshot: DealSnapshotForm) -> Tuple[DealRow, List[LoanRow]]:
+    summary = snapshot.application_summary
+    loans = snapshot.loan_section.loans
+    deal = (
+        deal_id,
+        summary.lender_id,
+        summary.broker_name or "",
+        summary.submission_date,
+        sum((loan.loan_amount or 0.0) for loan in loans),
+        annual_income(snapshot.income_section.incomes),
+        sum((exp.monthly_amount or 0.0) for exp in snapshot.expense_section.households),
+    )
+    loan_rows = [
+        (deal_id, loan.loan_product.value if loan.loan_product else "", loan.loan_amount or 0.0,
+         loan.interest_rate or 0.0, loan.loan_term_years or 0, loan.repayment_type or "")
+        for loan in loans
+    ]
+    return deal, loan_rows
+
+class _Codes:
+    # Label -> dense int code for one group key; dict order is code order.
+    def __init__(self):
+        self.index: Dict[str, int] = {}
+
+    @property
+    def labels(self) -> List[str]:
+        return list(self.index)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def encode(self, values: Iterable[str]) -> np.ndarray:
+        index = self.index
+        setdefault = index.setdefault
+        return np.fromiter((setdefault(value, len(index)) for value in values), dtype=np.int64)
+
+def _grow(array: np.ndarray, size: int) -> np.ndarray:
+    if size <= len(array):
+        return array
+    grown = np.zeros((max(size, 2 * len(array), 1024),) + array.shape[1:], dtype=array.dtype)
+    grown[: len(array)] = array
+    return grown
+
+def _group_sums(codes: np.ndarray, values: np.ndarray, ncat: int) -> np.ndarray:
+    sums = np.empty((ncat, 1 + values.shape[1]))
+    sums[:, 0] = np.bincount(codes, minlength=ncat)
+    for j in range(values.shape[1]):
+        sums[:, j + 1] = np.bincount(codes, weights=values[:, j], minlength=ncat)
+    return sums
+
+class Portfolio:
+    def __init__(self):
+        self.deal_count = 0
+        self._row_of: Dict[str, int] = {}
+        self._n = 0            # deal rows used (replaced deals leave dead rows)
+        self._values = np.zeros((0, 4))
+        self._alive = np.zeros(0, dtype=bool)
+        self._deal_codes = {key: np.zeros(0, dtype=np.int64) for key in DEAL_GROUPS}
+        self._n_loans = 0
+        self._loan_deal_row = np.zeros(0, dtype=np.int64)
+        self._loan_amount = np.zeros((0, 1))
+        self._loan_rate = np.zeros(0)
+        self._loan_io = np.zeros(0, dtype=bool)
+        self._loan_codes = {key: np.zeros(0, dtype=np.int64) for key in LOAN_GROUPS}
+        self._codes = {key: _Codes() for key in GROUP_KEYS}
+        self._sums = {key: np.zeros((0, 5 if key in DEAL_GROUPS else 2)) for key in GROUP_KEYS}
+
+    # ---- loading ----
+    @classmethod
+    def from_rows(cls, deals: Sequence[DealRow], loans: Sequence[LoanRow]) -> "Portfolio":
+        portfolio = cls()
+        portfolio.add_rows(deals, loans)
+        return portfolio
+
+    def add_snapshot(self, deal_id: str, snapshot: DealSnapshotForm) -> None:
+        deal, loans = deal_rows_from_snapshot(deal_id, snapshot)
+        self.add_rows([deal], loans)
+
+    def add_rows(self, deals: Sequence[DealRow], loans: Sequence[LoanRow]) -> None:
+        # Adds or replaces deals (matched by deal_id) in one vectorized pass.
+        if not deals:
+            return
+        if len({deal[0] for deal in deals}) != len(deals):
+            # The same deal twice in one batch: apply the versions in order.
+            for deal in deals:
+                self.add_rows([deal], [loan for loan in loans if loan[0] == deal[0]])
+            return
+        for deal in deals:
+            if deal[0] in self._row_of:
+                self._remove(self._row_of[deal[0]])
+
+        start, count = self._n, len(deals)
+        stop = start + count
+        self._n = stop
+        self._values = _grow(self._values, stop)
+        self._alive = _grow(self._alive, stop)
+        ids, lenders, brokers, dates, loan_total, income, expenses = zip(*deals)
+        self._row_of.update(zip(ids, range(start, stop)))
+        self.deal_count += count
+
+        repayments = np.zeros(count)
+        if loans:
+            loan_ids, products, amounts, rates, terms, repayment_types = zip(*loans)
+            row_of = self._row_of
+            lstart = self._n_loans
+            lstop = lstart + len(loans)
+            self._n_loans = lstop
+            deal_rows = np.fromiter((row_of[deal_id] for deal_id in loan_ids), dtype=np.int64, count=len(loans))
+            amount_col = np.asarray(amounts, dtype=float).reshape(-1, 1)
+            rate_col = np.asarray(rates, dtype=float)
+            io_col = np.fromiter(map(is_interest_only, repayment_types), dtype=bool, count=len(loans))
+            loan_repayments = monthly_repayment(amount_col[:, 0], rate_col, np.asarray(terms, dtype=float), io_col)
+            repayments = np.bincount(deal_rows - start, weights=loan_repayments, minlength=count)
+            for name, column in (("_loan_deal_row", deal_rows), ("_loan_amount", amount_col),
+                                 ("_loan_rate", rate_col), ("_loan_io", io_col)):
+                array = _grow(getattr(self, name), lstop)
+                array[lstart:lstop] = column
+                setattr(self, name, array)
+            for key in LOAN_GROUPS:
+                codes = self._codes[key].encode(products)
+                self._loan_codes[key] = _grow(self._loan_codes[key], lstop)
+                self._loan_codes[key][lstart:lstop] = codes
+                self._add_sums(key, _group_sums(codes, amount_col, len(self._codes[key])))
+
+        values = np.column_stack([
+            np.asarray(loan_total, dtype=float),
+            np.asarray(income, dtype=float),
+            np.asarray(expenses, dtype=float),
+            repayments,
+        ])
+        self._values[start:stop] = values
+        self._alive[start:stop] = True
+        labels = {"lender_id": lenders, "broker_name": brokers, "month": map(month_of, dates)}
+        for key in DEAL_GROUPS:
+            codes = self._codes[key].encode(labels[key])
+            self._deal_codes[key] = _grow(self._deal_codes[key], stop)
+            self._deal_codes[key][start:stop] = codes
+            self._add_sums(key, _group_sums(codes, values, len(self._codes[key])))
+
+    def _add_sums(self, key: str, delta: np.ndarray) -> None:
+        sums = self._sums[key]
+        if len(sums) < len(delta):
+            sums = np.vstack([sums, np.zeros((len(delta) - len(sums), sums.shape[1]))])
+        sums[: len(delta)] += delta
+        self._sums[key] = sums
+
+    def _remove(self, row: int) -> None:
+        self._alive[row] = False
+        self.deal_count -= 1
+        value = np.concatenate([[1.0], self._values[row]])
+        for key in DEAL_GROUPS:
+            self._sums[key][self._deal_codes[key][row]] -= value
+        loan_rows = np.flatnonzero(self._loan_deal_row[: self._n_loans] == row)
+        for key in LOAN_GROUPS:
+            codes = self._loan_codes[key][loan_rows]
+            np.subtract.at(self._sums[key][:, 0], codes, 1.0)
+            np.subtract.at(self._sums[key][:, 1], codes, self._loan_amount[loan_rows, 0])
+        self._loan_deal_row[loan_rows] = -1
+
+    # ---- summaries ----
+    def totals(self) -> Dict[str, float]:
+        _, loan, income, expenses, repayments = self._sums["lender_id"].sum(axis=0) if self.deal_count else (0.0,) * 5
+        monthly_income = income / 12
+        return {
+            "deals": self.deal_count,
+            "total_loan_amount": float(loan),
+            "annual_income": float(income),
+            "monthly_income": float(monthly_income),
+            "monthly_expenses": float(expenses),
+            "monthly_repayments": float(repayments),
+            "net_monthly_position": float(monthly_income - expenses - repayments),
+        }
+
+    def group_by(self, key: str) -> Dict[str, np.ndarray]:
+        # Columnar result (label column + metrics), largest total loan amount first.
+        if key not in GROUP_KEYS:
+            raise ValueError(f"unknown group key {key!r}; expected one of {', '.join(GROUP_KEYS)}")
+        sums = self._sums[key]
+        labels = np.asarray(self._codes[key].labels, dtype=object)
+        keep = sums[:, 0] > 0
+        sums, labels = sums[keep], labels[keep]
+        order = np.argsort(-sums[:, 1], kind="stable")
+        sums, labels = sums[order], labels[order]
+        if key in LOAN_GROUPS:
+            return {key: labels, "loans": sums[:, 0].astype(np.int64), "total_loan_amount": sums[:, 1]}
+        monthly_income = sums[:, 2] / 12
+        return {
+            key: labels,
+            "deals": sums[:, 0].astype(np.int64),
+            "total_loan_amount": sums[:, 1],
+            "annual_income": sums[:, 2],
+            "monthly_income": monthly_income,
+            "monthly_expenses": sums[:, 3],
+            "monthly_repayments": sums[:, 4],
+            "net_monthly_position": monthly_income - sums[:, 3] - sums[:, 4],
+        }
+
+    def recompute(self, key: str) -> np.ndarray:
+        # Full rescan of the columns for one key; the maintained sums must match it.
+        if key in LOAN_GROUPS:
+            live = self._loan_deal_row[: self._n_loans] >= 0
+            codes = self._loan_codes[key][: self._n_loans][live]
+            return _group_sums(codes, self._loan_amount[: self._n_loans][live], len(self._codes[key]))
+        live = self._alive[: self._n]
+        codes = self._deal_codes[key][: self._n][live]
+        return _group_sums(codes, self._values[: self._n][live], len(self._codes[key]))
+
+    def sensitivity(self, buffers: np.ndarray = RATE_BUFFERS, terms: np.ndarray = GRID_TERMS,
+                    chunk_deals: int = 50_000) -> Dict[str, np.ndarray]:
+        # Every live loan repriced at rate + buffer over each term. For each
+        # (buffer, term) cell: the share of deals whose net monthly position stays
+        # >= 0, and the portfolio's total net position. Deals are processed in
+        # chunks only to bound memory; each chunk is one broadcast + one bincount.
+        buffers, terms = np.asarray(buffers, dtype=float), np.asarray(terms)
+        cells = len(buffers) * len(terms)
+        deal_rows = np.flatnonzero(self._alive[: self._n])
+        dense = np.full(self._n, -1, dtype=np.int64)
+        dense[deal_rows] = np.arange(len(deal_rows))
+        values = self._values[deal_rows]
+        base = values[:, ANNUAL_INCOME] / 12 - values[:, MONTHLY_EXPENSES]
+
+        loan_rows = np.flatnonzero(self._loan_deal_row[: self._n_loans] >= 0)
+        loan_deal = dense[self._loan_deal_row[loan_rows]]
+        order = np.argsort(loan_deal, kind="stable")
+        loan_rows, loan_deal = loan_rows[order], loan_deal[order]
+
+        serviceable = np.zeros(cells)
+        net_total = np.zeros(cells)
+        for a in range(0, len(deal_rows), chunk_deals):
+            b = min(a + chunk_deals, len(deal_rows))
+            lo, hi = np.searchsorted(loan_deal, [a, b])
+            rows = loan_rows[lo:hi]
+            grid = repayment_grid(self._loan_amount[rows, 0], self._loan_rate[rows], self._loan_io[rows], buffers, terms)
+            width = b - a
+            index = (np.arange(cells)[:, None] * width + (loan_deal[lo:hi] - a)[None, :]).ravel()
+            repayments = np.bincount(index, weights=grid.reshape(cells, -1).ravel(), minlength=cells * width)
+            net = base[a:b][None, :] - repayments.reshape(cells, width)
+            serviceable += (net >= 0).sum(axis=1)
+            net_total += net.sum(axis=1)
+        shape = (len(buffers), len(terms))
+        return {
+            "buffers": buffers,
+            "terms": terms,
+            "serviceable_share": (serviceable / max(len(deal_rows), 1)).reshape(shape),
+            "net_monthly_position": net_total.reshape(shape),
+        }
+
+def load_portfolio(store, since: Optional[int] = None, portfolio: Optional[Portfolio] = None) -> Portfolio:
+    # Builds (or tops up) a portfolio from a DealStore; `since` is a change_seq watermark.
+    deals, loans = store.metric_rows(since=since)
+    portfolio = portfolio or Portfolio()
+    portfolio.add_rows(deals, loans)
+    return portfolio
@@ -0,0 +1,89 @@
+# dealsnap/prefill.py
+# ----------------------------- #
+# Parsed + flattened prefill data
+# ----------------------------- #
+from __future__ import annotations
+
+import hashlib
+import json
+from typing import Any, Dict, List, Optional
+
+from pydantic import ValidationError
+
+from dealsnap.migrations import migrate
+from dealsnap.models import DealSnapshotForm
+
+def content_digest(raw: bytes) -> str:
+    return hashlib.sha256(raw).hexdigest()
+
+def flatten(data: Any, prefix: str = "", values: Optional[Dict[str, Any]] = None,
+            lengths: Optional[Dict[str, int]] = None):
+    # {"loan_section": {"loans": [{"loan_amount": 1}]}} ->
+    #   values  {"loan_section.loans.0.loan_amount": 1}
+    #   lengths {"loan_section.loans": 1}
+    values = {} if values is None else values
+    lengths = {} if lengths is None else lengths
+    if isinstance(data, dict):
+        for key, value in data.items():
+            flatten(value, f"{prefix}{key}.", values, lengths)
+    elif isinstance(data, list):
+        lengths[prefix[:-1]] = len(data)
+        for i, value in enumerate(data):
+            flatten(value, f"{prefix}{i}.", values, lengths)
+    elif prefix:
+        values[prefix[:-1]] = data
+    return values, lengths
+
+# Read-only path -> value view of one loaded snapshot. Widget defaults read
+# from here so a rerun never touches the source JSON.
+class PrefillIndex:
+    def __init__(self, data: Optional[Dict[str, Any]] = None, digest: str = "",
+                 errors: Optional[List[Dict[str, Any]]] = None):
+        self.digest = digest
+        self.errors = errors or []
+        self.loaded = data is not None
+        self.values, self.lengths = flatten(data or {})
+        self.sections = {k for k, v in (data or {}).items() if v is not None}
+
+    def has(self, path: str) -> bool:
+        return path in self.sections or self.values.get(path) is not None or path in self.lengths
+
+    def get(self, path: str, default: Any = None) -> Any:
+        value = self.values.get(path)
+        return default if value is None else value
+
+    def get_str(self, path: str, default: str = "") -> str:
+        value = self.values.get(path)
+        return default if value is None else str(value)
+
+    def get_float(self, path: str, default: float = 0.0) -> float:
+        try:
+            return float(self.values[path])
+        except (KeyError, TypeError, ValueError):
+            return default
+
+    def get_int(self, path: str, default: int = 0) -> int:
+        try:
+            return int(self.values[path])
+        except (KeyError, TypeError, ValueError):
+            return default
+
+    def count(self, path: str, default: int = 0) -> int:
+        return self.lengths.get(path, default)
+
+EMPTY_PREFILL = PrefillIndex()
+
+def load_prefill(raw: bytes, digest: Optional[str] = None) -> PrefillIndex:
+    # Raises ValueError for anything that is not a JSON object. Older
+    # schema versions are migrated first; schema problems don't block prefill,
+    # they are kept on the index so the UI can report them.
+    data = json.loads(raw)
+    if not isinstance(data, dict):
+        raise ValueError("expected a JSON object with deal snapshot sections")
+    migrate(data)
+    try:
+        DealSnapshotForm.model_validate(data)
+        errors: List[Dict[str, Any]] = []
+    except ValidationError as ve:
+        errors = ve.errors(include_url=False, include_context=False, include_input=False)
+    return PrefillIndex(data, digest=digest or content_digest(raw), errors=errors)
@@ -0,0 +1,74 @@
+# dealsnap/repayments.py
+# ----------------------------- #
+# Loan repayment + serviceability sensitivity maths (no UI)
+# ----------------------------- #
+# Every function takes and returns NumPy arrays and broadcasts, so one call
+# prices a single loan, every loan in a deal, or every loan in a portfolio
+# across a whole grid of rate buffers and terms.
+from __future__ import annotations
+
+from typing import Iterable, Optional, Tuple
+
+import numpy as np
+
+from dealsnap.models import LoanDetail
+
+# Rate buffers (percentage points added to each loan's rate) and terms (years)
+# for the sensitivity grid.
+RATE_BUFFERS = np.round(np.arange(0.0, 3.0 + 1e-9, 0.25), 2)
+GRID_TERMS = np.array([20, 25, 30], dtype=np.int64)
+# Loans saved without a term are priced like the form's default.
+DEFAULT_TERM_YEARS = 30
+
+def is_interest_only(repayment_type: Optional[str]) -> bool:
+    # repayment_type is free text ("Interest Only", "IO", "interest-only", ...).
+    text = " ".join((repayment_type or "").lower().replace("-", " ").replace("/", " ").split())
+    return text == "io" or "interest only" in text
+
+def monthly_repayment(principal, rate_pct, term_years, interest_only) -> np.ndarray:
+    # Standard annuity for P&I, interest alone for interest-only; a zero rate
+    # repays principal in equal instalments.
+    principal = np.asarray(principal, dtype=float)
+    r = np.asarray(rate_pct, dtype=float) / 1200.0
+    n = np.asarray(term_years, dtype=float) * 12.0
+    n = np.where(n > 0, n, DEFAULT_TERM_YEARS * 12.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        annuity = np.where(r > 0, principal * r / -np.expm1(-n * np.log1p(r)), principal / n)
+    return np.where(interest_only, principal * r, annuity)
+
+def loan_columns(loans: Iterable[LoanDetail]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    # (principal, rate_pct, term_years, interest_only) columns for a list of loans.
+    rows = [
+        (loan.loan_amount or 0.0, loan.interest_rate or 0.0, loan.loan_term_years or 0,
+         is_interest_only(loan.repayment_type))
+        for loan in loans
+    ]
+    principal, rate, term, io = zip(*rows) if rows else ((), (), (), ())
+    return (np.asarray(principal, dtype=float), np.asarray(rate, dtype=float),
+            np.asarray(term, dtype=np.int64), np.asarray(io, dtype=bool))
+
+def total_monthly_repayments(loans: Iterable[LoanDetail]) -> float:
+    principal, rate, term, io = loan_columns(loans)
+    return float(monthly_repayment(principal, rate, term, io).sum())
+
+def repayment_grid(principal, rate_pct, interest_only,
+                   buffers: np.ndarray = RATE_BUFFERS, terms: np.ndarray = GRID_TERMS) -> np.ndarray:
+    # (buffers, terms, loans) monthly repayments: each loan repriced at rate +
+    # buffer over each grid term. Repayment is linear in principal, so the
+    # per-dollar factor is computed once per distinct rate (a few hundred in
+    # practice) and the grid is one gather + multiply over all loans.
+    principal = np.asarray(principal, dtype=float)
+    rates, inverse = np.unique(np.asarray(rate_pct, dtype=float), return_inverse=True)
+    grid_rates = rates[None, None, :] + np.asarray(buffers, dtype=float)[:, None, None]
+    terms = np.asarray(terms)[None, :, None]
+    pi_factors = monthly_repayment(1.0, grid_rates, terms, False)  # (buffers, terms, rates)
+    io_factors = np.broadcast_to(grid_rates / 1200.0, pi_factors.shape)
+    factors = np.concatenate([pi_factors, io_factors], axis=2)
+    column = inverse.ravel() + len(rates) * np.asarray(interest_only, dtype=np.int64)
+    return factors[:, :, column] * principal
+
+def net_position_grid(monthly_income: float, monthly_expenses: float, principal, rate_pct, interest_only,
+                      buffers: np.ndarray = RATE_BUFFERS, terms: np.ndarray = GRID_TERMS) -> np.ndarray:
+    # (buffers, terms) net monthly position of one deal; >= 0 means it services.
+    repayments = repayment_grid(principal, rate_pct, interest_only, buffers, terms).sum(axis=2)
+    return monthly_income - monthly_expenses - repayments
@@ -0,0 +1,235 @@
+# dealsnap/report.py
+# ----------------------------- #
+# Printable deal packs (Jinja2 HTML)
+# ----------------------------- #
+#
+#   python -m dealsnap.report archive/ backbook.ndjson -o packs/ [-j 8]
+#   python -m dealsnap.report --store dealsnap.sqlite3 --from 2024-06-01 --to 2024-06-30 -o packs/
+#
+# One self-contained HTML page per deal: the submission summary metrics (as in
+# the app), derived LVR / LMI premium, policy checks, the serviceability grid,
+# then loans, applicants, guarantors, incomes, expenses, securities and the
+# HGS / LMI blocks. The page carries print styles, so "Print > Save as PDF"
+# from a browser gives the committee pack.
+#
+# Templates live in dealsnap/templates (DEALSNAP_REPORT_TEMPLATES, if set, is
+# searched first to override them). One Jinja2 environment per process
+# compiles each template once and keeps it; auto_reload is off, so rendering
+# never stats the template files. Batch mode renders in a process pool over a
+# bounded window of chunks (like dealsnap.batch): workers get raw JSON and
+# write the pages themselves, so memory stays flat for any number of deals.
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import jinja2
+
+from dealsnap.helpers import format_currency
+from dealsnap.lmi import DEFAULT_TABLE_PATH, FREE_LVR, PremiumTable, entered_lvr_mismatch, load_premium_table, quote_deal
+from dealsnap.models import DealSnapshotForm
+from dealsnap.policy import check_deal
+from dealsnap.repayments import GRID_TERMS, RATE_BUFFERS, loan_columns, net_position_grid
+from dealsnap.summary import summarize_submission
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(__file__), "templates")
+DEAL_PACK = "deal_pack.html.j2"
+
+# (label, raw JSON bytes or None to read `label` as a file)
+Job = Tuple[str, Optional[bytes]]
+
+# ===========================
+# Templates
+# ===========================
+def _percent(value: Any, digits: int = 1) -> str:
+    return "" if value is None else f"{value:.{digits}%}"
+
+def _value(value: Any) -> str:
+    # Enum members show their value, amounts get separators, blanks an en dash.
+    value = getattr(value, "value", value)
+    if isinstance(value, float):
+        return f"{value:,.2f}"
+    return "–" if value is None or value == "" else str(value)
+
+@lru_cache(maxsize=None)
+def environment() -> jinja2.Environment:
+    search = [TEMPLATE_DIR]
+    if os.environ.get("DEALSNAP_REPORT_TEMPLATES"):
+        search.insert(0, os.environ["DEALSNAP_REPORT_TEMPLATES"])
+    env = jinja2.Environment(
+        loader=jinja2.FileSystemLoader(search),
+        autoescape=jinja2.select_autoescape(["html", "j2"]),
+        auto_reload=False,
+        trim_blocks=True,
+        lstrip_blocks=True,
+        undefined=jinja2.StrictUndefined,
+    )
+    env.filters.update(currency=format_currency, percent=_percent, value=_value)
+    return env
+
+def template(name: str = DEAL_PACK) -> jinja2.Template:
+    return environment().get_template(name)
+
+# ===========================
+# One deal
+# ===========================
+@lru_cache(maxsize=1)
+def default_premium_table() -> Optional[PremiumTable]:
+    # Loaded once per process; no table file just means no premium on the pack.
+    try:
+        return load_premium_table(DEFAULT_TABLE_PATH)
+    except (OSError, ValueError):
+        return None
+
+def report_context(snapshot: DealSnapshotForm, deal_id: Optional[str] = None,
+                   premium_table: Optional[PremiumTable] = None) -> Dict[str, Any]:
+    summary = summarize_submission(snapshot)
+    quote = quote_deal(snapshot, premium_table)
+    loans = snapshot.loan_section.loans
+    grid = None
+    if loans:
+        principal, rate, _, io = loan_columns(loans)
+        values = net_position_grid(summary.total_monthly_income, summary.total_monthly_expenses, principal, rate, io)
+        grid = {"terms": GRID_TERMS.tolist(), "rows": list(zip(RATE_BUFFERS.tolist(), values.tolist()))}
+    return {
+        "deal": snapshot,
+        "deal_id": deal_id,
+        "summary": summary,
+        "quote": quote,
+        "premium_table": premium_table.name if premium_table is not None else None,
+        "lvr_mismatch": entered_lvr_mismatch(snapshot, quote),
+        "free_lvr": FREE_LVR,
+        "breaches": check_deal(snapshot),
+        "grid": grid,
+        "generated_at": datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M UTC"),
+    }
+
+def render_report(snapshot: DealSnapshotForm, deal_id: Optional[str] = None,
+                  premium_table: Optional[PremiumTable] = None) -> str:
+    return template().render(report_context(snapshot, deal_id, premium_table))
+
+def report_bytes(snapshot: DealSnapshotForm, deal_id: Optional[str] = None,
+                 premium_table: Optional[PremiumTable] = None) -> bytes:
+    return render_report(snapshot, deal_id, premium_table).encode("utf-8")
+
+# ===========================
+# Batch (worker side)
+# ===========================
+def render_job(job: Job, out_dir: str) -> Dict[str, Any]:
+    from pydantic import ValidationError
+
+    from dealsnap.migrations import migrate_json
+    from dealsnap.store import deal_id_for
+
+    label, raw = job
+    result: Dict[str, Any] = {"source": label}
+    try:
+        if raw is None:
+            with open(label, "rb") as fh:
+                raw = fh.read()
+        snapshot = DealSnapshotForm.model_validate(migrate_json(raw))
+        deal_id = deal_id_for(snapshot)
+        path = os.path.join(out_dir, f"{deal_id}.html")
+        with open(path, "wb") as fh:
+            fh.write(report_bytes(snapshot, deal_id, default_premium_table()))
+    except ValidationError as ve:
+        result.update(ok=False, error=f"{ve.error_count()} validation error(s)")
+    except (ValueError, OSError, jinja2.TemplateError) as e:
+        result.update(ok=False, error=str(e))
+    else:
+        result.update(ok=True, output=path)
+    return result
+
+def render_chunk(jobs: List[Job], out_dir: str) -> List[Dict[str, Any]]:
+    return [render_job(job, out_dir) for job in jobs]
+
+# ===========================
+# Batch (driver)
+# ===========================
+def iter_file_jobs(sources: Sequence[str]) -> Iterator[Job]:
+    from dealsnap.sources import expand_sources, iter_tasks
+
+    for source, line_no, raw in iter_tasks(expand_sources(sources)):
+        yield (source if line_no is None else f"{source}:{line_no}"), raw
+
+def iter_store_jobs(store, **query: Any) -> Iterator[Job]:
+    # store.find() filters (lender_id, broker_name, submitted_from, ...); the
+    # payload is read as each chunk is handed out, not all up front.
+    for ref in store.find(**query):
+        raw = store.get_bytes(ref.deal_id)
+        if raw is not None:
+            yield ref.deal_id, raw
+
+def run_reports(jobs: Iterable[Job], out_dir: str, workers: int = 0, chunksize: int = 16) -> Iterator[Dict[str, Any]]:
+    from dealsnap.sources import chunked
+
+    os.makedirs(out_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    chunks = chunked(jobs, chunksize)
+    if workers == 1:
+        for chunk in chunks:
+            yield from render_chunk(chunk, out_dir)
+        return
+
+    max_pending = workers * 2
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending: deque = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(render_chunk, chunk, out_dir))
+            if len(pending) >= max_pending:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m dealsnap.report",
+        description="Render a printable HTML deal pack per snapshot, in parallel.",
+    )
+    parser.add_argument("sources", nargs="*", help="Directories, globs, .json files or .ndjson/.jsonl files")
+    parser.add_argument("--store", help="Render deals from this deal store instead of files")
+    parser.add_argument("--lender", help="Store query: lender ID")
+    parser.add_argument("--broker", help="Store query: broker name")
+    parser.add_argument("--from", dest="submitted_from", help="Store query: submitted on or after (YYYY-MM-DD)")
+    parser.add_argument("--to", dest="submitted_to", help="Store query: submitted on or before (YYYY-MM-DD)")
+    parser.add_argument("--limit", type=int, default=100_000, help="Store query: at most this many deals, newest first")
+    parser.add_argument("-o", "--output", required=True, help="Directory for <deal_id>.html packs")
+    parser.add_argument("-j", "--workers", type=int, default=0, help="Worker processes (default: CPU count)")
+    return parser
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    if bool(args.store) == bool(args.sources):
+        print("give either --store or file sources", file=sys.stderr)
+        return 2
+    store = None
+    if args.store:
+        from dealsnap.store import DealStore
+
+        store = DealStore(args.store)
+        jobs = iter_store_jobs(store, lender_id=args.lender, broker_name=args.broker,
+                               submitted_from=args.submitted_from, submitted_to=args.submitted_to, limit=args.limit)
+    else:
+        jobs = iter_file_jobs(args.sources)
+    total = failed = 0
+    try:
+        for result in run_reports(jobs, args.output, args.workers):
+            total += 1
+            if not result["ok"]:
+                failed += 1
+                print(json.dumps(result), file=sys.stderr)
+    finally:
+        if store is not None:
+            store.close()
+    print(f"{total - failed}/{total} pack(s) written to {args.output}", file=sys.stderr)
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
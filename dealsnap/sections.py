@@ -0,0 +1,149 @@
+# dealsnap/sections.py
+# ----------------------------- #
+# Incremental per-section validation (no UI)
+# ----------------------------- #
+# The form keeps each section's model kwargs separately. SectionValidator
+# validates a section when it changes and caches the result by a hash of its
+# inputs; list items (loans, people, income/expense lines, securities) are
+# cached by their own hash, so editing one line of forty revalidates one line.
+# A full snapshot is then assembled from already-validated sub-models, which
+# Pydantic accepts as-is instead of rebuilding them.
+from __future__ import annotations
+
+import hashlib
+import json
+from collections import OrderedDict
+from typing import Any, Dict, List, Mapping, NamedTuple, Optional, Tuple, Type
+
+from pydantic import BaseModel, ValidationError
+
+from dealsnap.models import (
+    Applicant, ApplicantSection, ApplicationSummary, AssetLiabilitySection, DealSnapshotForm, ExpenseLine,
+    ExpenseSection, Guarantor, HGSBlock, IncomeLine, IncomeSection, LMIBlock, LoanDetail, LoanSection,
+    SecurityDetail, SecuritySection,
+)
+
+# Section name -> (section model, {list field: item model}). Names match the
+# DealSnapshotForm fields; "conditional_blocks" holds the two optional blocks.
+SECTION_MODELS: Dict[str, Tuple[Type[BaseModel], Dict[str, Type[BaseModel]]]] = {
+    "application_summary": (ApplicationSummary, {}),
+    "loan_section": (LoanSection, {"loans": LoanDetail}),
+    "applicant_section": (ApplicantSection, {"applicants": Applicant, "guarantors": Guarantor}),
+    "income_section": (IncomeSection, {"incomes": IncomeLine}),
+    "expense_section": (ExpenseSection, {"households": ExpenseLine}),
+    "asset_liability_section": (AssetLiabilitySection, {}),
+    "security_section": (SecuritySection, {"securities": SecurityDetail}),
+}
+OPTIONAL_BLOCKS: Dict[str, Type[BaseModel]] = {"hgs_block": HGSBlock, "lmi_block": LMIBlock}
+SECTION_NAMES = tuple(SECTION_MODELS) + ("conditional_blocks",)
+
+Errors = List[Dict[str, Any]]
+
+class SectionResult(NamedTuple):
+    digest: str
+    value: Any          # section model, or {block name: model | None} for conditional_blocks
+    errors: Errors      # Pydantic error dicts, loc relative to DealSnapshotForm
+
+class SnapshotValidationError(ValueError):
+    def __init__(self, errors: Errors):
+        self.errors = errors
+        super().__init__(f"{len(errors)} validation error(s)")
+
+    def json(self, indent: int = 2) -> str:
+        return json.dumps(self.errors, indent=indent, default=str)
+
+def input_digest(data: Any) -> str:
+    raw = json.dumps(data, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
+
+def _errors(ve: ValidationError, prefix: Tuple[Any, ...]) -> Errors:
+    errors = ve.errors(include_url=False, include_context=False, include_input=False)
+    return [{**err, "loc": prefix + tuple(err["loc"])} for err in errors]
+
+class SectionValidator:
+    def __init__(self, max_items: int = 4096):
+        self._sections: Dict[str, SectionResult] = {}
+        self._items: "OrderedDict[Tuple[str, str], BaseModel]" = OrderedDict()
+        self._max_items = max_items
+        self.hits = 0
+        self.misses = 0
+
+    def validate(self, name: str, data: Mapping[str, Any], field_errors: Errors = ()) -> SectionResult:
+        # field_errors: problems the form found before validation (e.g. an LVR
+        # that can't be read); they must follow from `data`, since the result
+        # is cached by its digest, and they block the section like any other.
+        digest = input_digest(data)
+        cached = self._sections.get(name)
+        if cached is not None and cached.digest == digest:
+            self.hits += 1
+            return cached
+        self.misses += 1
+        if name == "conditional_blocks":
+            value, errors = self._validate_blocks(data)
+        else:
+            value, errors = self._validate_section(name, data)
+        if field_errors:
+            value, errors = None, list(field_errors) + errors
+        result = SectionResult(digest, value, errors)
+        self._sections[name] = result
+        return result
+
+    def cached(self, name: str) -> Optional[SectionResult]:
+        return self._sections.get(name)
+
+    def _item(self, model: Type[BaseModel], data: Mapping[str, Any]) -> BaseModel:
+        # Valid items only; raises ValidationError otherwise.
+        key = (model.__name__, input_digest(data))
+        item = self._items.get(key)
+        if item is None:
+            item = model.model_validate(data)
+            self._items[key] = item
+            if len(self._items) > self._max_items:
+                self._items.popitem(last=False)
+        else:
+            self._items.move_to_end(key)
+        return item
+
+    def _validate_section(self, name: str, data: Mapping[str, Any]) -> Tuple[Optional[BaseModel], Errors]:
+        model, list_fields = SECTION_MODELS[name]
+        fields = dict(data)
+        errors: Errors = []
+        for field, item_model in list_fields.items():
+            items = []
+            for i, item in enumerate(fields.get(field) or []):
+                try:
+                    items.append(self._item(item_model, item))
+                except ValidationError as ve:
+                    errors.extend(_errors(ve, (name, field, i)))
+            fields[field] = items
+        if errors:
+            return None, errors
+        try:
+            return model.model_validate(fields), []
+        except ValidationError as ve:
+            return None, _errors(ve, (name,))
+
+    def _validate_blocks(self, data: Mapping[str, Any]) -> Tuple[Dict[str, Optional[BaseModel]], Errors]:
+        blocks: Dict[str, Optional[BaseModel]] = {}
+        errors: Errors = []
+        for name, model in OPTIONAL_BLOCKS.items():
+            block = data.get(name)
+            try:
+                blocks[name] = self._item(model, block) if block else None
+            except ValidationError as ve:
+                blocks[name] = None
+                errors.extend(_errors(ve, (name,)))
+        return blocks, errors
+
+    def assemble(self, sections: Mapping[str, Mapping[str, Any]]) -> DealSnapshotForm:
+        # Raises SnapshotValidationError with every section's errors.
+        results = {name: self.validate(name, sections[name]) for name in SECTION_NAMES}
+        errors = [err for result in results.values() for err in result.errors]
+        if errors:
+            raise SnapshotValidationError(errors)
+        parts = {name: results[name].value for name in SECTION_MODELS}
+        parts.update(results["conditional_blocks"].value)
+        try:
+            return DealSnapshotForm(**parts)
+        except ValidationError as ve:
+            raise SnapshotValidationError(_errors(ve, ())) from None
@@ -0,0 +1,13 @@
+# dealsnap/serialization.py
+# ----------------------------- #
+# Canonical snapshot bytes
+# ----------------------------- #
+from __future__ import annotations
+
+from pydantic import BaseModel
+
+def snapshot_to_bytes(payload: BaseModel, compact: bool = False) -> bytes:
+    # Serializes straight from the model to UTF-8 JSON bytes in one pass (no
+    # intermediate dict or str). Display, download and storage all share the
+    # result. compact=True drops indentation for machine consumers.
+    return type(payload).__pydantic_serializer__.to_json(payload, indent=None if compact else 2)
@@ -0,0 +1,50 @@
+# dealsnap/sources.py
+# ----------------------------- #
+# Input discovery for the file-based CLIs (no UI)
+# ----------------------------- #
+# Directories, globs, .json files and .ndjson/.jsonl files, expanded to
+# paths and then to one task per record. Shared by dealsnap.batch,
+# dealsnap.migrations and the other commands that read archives, so none of
+# them has to import another CLI for its helpers.
+from __future__ import annotations
+
+import glob
+import os
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple, TypeVar
+
+NDJSON_SUFFIXES = {".ndjson", ".jsonl"}
+GLOB_CHARS = set("*?[")
+
+# (source path, 1-based line number for NDJSON or None, raw bytes or None to read the file)
+Task = Tuple[str, Optional[int], Optional[bytes]]
+T = TypeVar("T")
+
+def expand_sources(sources: Iterable[str]) -> Iterator[str]:
+    for source in sources:
+        if GLOB_CHARS & set(source):
+            yield from sorted(glob.iglob(source, recursive=True))
+        elif os.path.isdir(source):
+            yield from sorted(str(p) for p in Path(source).rglob("*.json"))
+        else:
+            yield source
+
+def iter_tasks(paths: Iterable[str]) -> Iterator[Task]:
+    for path in paths:
+        if Path(path).suffix.lower() in NDJSON_SUFFIXES:
+            with open(path, "rb") as fh:
+                for line_no, line in enumerate(fh, start=1):
+                    if line.strip():
+                        yield path, line_no, line
+        else:
+            yield path, None, None
+
+def chunked(items: Iterable[T], size: int) -> Iterator[List[T]]:
+    chunk: List[T] = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
@@ -0,0 +1,541 @@
+# dealsnap/store.py
+# ----------------------------- #
+# Local indexed deal store (SQLite)
+# ----------------------------- #
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from dealsnap import duplicates
+from dealsnap.frequency import periods_per_year_sql
+from dealsnap.fulltext import (
+    INDEX_TEXT, MAX_RANKED, TEXT_INDEX_VERSION, TEXT_SCHEMA, UNINDEX_TEXT, TextHit, compile_query,
+)
+from dealsnap.models import DealSnapshotForm
+from dealsnap.serialization import snapshot_to_bytes
+
+DEFAULT_STORE_PATH = os.environ.get("DEALSNAP_STORE", "dealsnap.sqlite3")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS deals (
+    deal_id         TEXT PRIMARY KEY,
+    lender_id       TEXT NOT NULL,
+    submission_date TEXT NOT NULL,
+    broker_name     TEXT,
+    saved_at        TEXT NOT NULL,
+    payload         BLOB NOT NULL,
+    change_seq      INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS deals_lender_id ON deals(lender_id, submission_date);
+CREATE INDEX IF NOT EXISTS deals_submission_date ON deals(submission_date);
+CREATE INDEX IF NOT EXISTS deals_broker_name ON deals(broker_name, submission_date);
+CREATE INDEX IF NOT EXISTS deals_saved_at ON deals(saved_at);
+
+-- store_meta.change_seq goes up by one per committed write batch and is never
+-- reused (unlike max(deals.change_seq), which a delete can lower). Incremental
+-- readers keep the last value they saw as their watermark.
+CREATE TABLE IF NOT EXISTS store_meta (
+    key             TEXT PRIMARY KEY,
+    value           INTEGER NOT NULL
+) WITHOUT ROWID;
+
+-- submission_date is repeated here so person lookups come back newest-first
+-- straight off the index, without sorting every match.
+CREATE TABLE IF NOT EXISTS deal_people (
+    deal_id         TEXT NOT NULL,
+    role            TEXT NOT NULL,
+    position        INTEGER NOT NULL,
+    name            TEXT,
+    name_key        TEXT,
+    customer_number TEXT,
+    submission_date TEXT NOT NULL,
+    PRIMARY KEY (deal_id, role, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS deal_people_name_key ON deal_people(name_key, submission_date);
+CREATE INDEX IF NOT EXISTS deal_people_customer_number ON deal_people(customer_number, submission_date);
+
+-- MinHash signature per deal plus its LSH band keys (dealsnap.duplicates).
+-- A duplicate lookup probes (band, bucket) once per band.
+CREATE TABLE IF NOT EXISTS deal_minhash (
+    deal_id         TEXT PRIMARY KEY,
+    signature       BLOB NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS deal_bands (
+    band            INTEGER NOT NULL,
+    bucket          INTEGER NOT NULL,
+    deal_id         TEXT NOT NULL,
+    PRIMARY KEY (band, bucket, deal_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS deal_bands_deal_id ON deal_bands(deal_id);
+"""
+
+# Per-deal summary inputs extracted inside SQLite, so bulk loads never build models.
+ANNUALIZED_INCOME = (
+    "json_extract(value, '$.annual_amount') * "
+    + periods_per_year_sql("json_extract(value, '$.income_frequency')")
+)
+METRIC_DEALS = f"""
+SELECT d.deal_id, d.lender_id, coalesce(d.broker_name, ''), d.submission_date,
+    (SELECT total(json_extract(value, '$.loan_amount'))
+       FROM json_each(CAST(d.payload AS TEXT), '$.loan_section.loans')),
+    (SELECT total({ANNUALIZED_INCOME})
+       FROM json_each(CAST(d.payload AS TEXT), '$.income_section.incomes')),
+    (SELECT total(json_extract(value, '$.monthly_amount'))
+       FROM json_each(CAST(d.payload AS TEXT), '$.expense_section.households'))
+FROM deals d
+"""
+
+METRIC_LOANS = """
+SELECT d.deal_id, coalesce(json_extract(l.value, '$.loan_product'), ''),
+    coalesce(json_extract(l.value, '$.loan_amount'), 0.0),
+    coalesce(json_extract(l.value, '$.interest_rate'), 0.0),
+    coalesce(json_extract(l.value, '$.loan_term_years'), 0),
+    coalesce(json_extract(l.value, '$.repayment_type'), '')
+FROM deals d, json_each(CAST(d.payload AS TEXT), '$.loan_section.loans') l
+"""
+
+# (deal_id, total loan amount, total security value) for dealsnap.lmi; a
+# security is worth the lesser of its valuation and purchase price.
+SECURITY_VALUE = (
+    "min(coalesce(nullif(json_extract(value, '$.valuation_amount'), 0), json_extract(value, '$.purchase_price')),"
+    " coalesce(nullif(json_extract(value, '$.purchase_price'), 0), json_extract(value, '$.valuation_amount')))"
+)
+LMI_DEALS = f"""
+SELECT d.deal_id,
+    (SELECT total(json_extract(value, '$.loan_amount'))
+       FROM json_each(CAST(d.payload AS TEXT), '$.loan_section.loans')),
+    (SELECT total(max({SECURITY_VALUE}, 0))
+       FROM json_each(CAST(d.payload AS TEXT), '$.security_section.securities'))
+FROM deals d
+"""
+
+UPSERT_DEAL = """
+INSERT INTO deals (deal_id, lender_id, submission_date, broker_name, payload, saved_at, change_seq)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(deal_id) DO UPDATE SET
+    lender_id = excluded.lender_id,
+    submission_date = excluded.submission_date,
+    broker_name = excluded.broker_name,
+    payload = excluded.payload,
+    saved_at = excluded.saved_at,
+    change_seq = excluded.change_seq
+"""
+NEXT_CHANGE_SEQ = (
+    "INSERT INTO store_meta VALUES ('change_seq', 1)"
+    " ON CONFLICT(key) DO UPDATE SET value = value + 1"
+)
+
+class DealRef(NamedTuple):
+    deal_id: str
+    lender_id: str
+    submission_date: str
+    broker_name: Optional[str]
+    saved_at: str
+    applicants: str
+
+    @property
+    def label(self) -> str:
+        return f"{self.lender_id} · {self.submission_date} · {self.applicants or 'no applicants'}"
+
+class DuplicateMatch(NamedTuple):
+    ref: DealRef
+    score: float                    # estimated token similarity, 0..1
+    broker_or_MRU: Optional[str]
+
+def name_key(name: Optional[str]) -> Optional[str]:
+    return " ".join(name.lower().split()) if name else None
+
+def deal_id_for(snapshot: DealSnapshotForm) -> str:
+    # Same lender ID, submission date and applicants => same deal, so a resubmission
+    # replaces the earlier version instead of piling up beside it.
+    summary = snapshot.application_summary
+    names = sorted(filter(None, (name_key(a.name) for a in snapshot.applicant_section.applicants)))
+    key = "\x1f".join([summary.lender_id.strip(), summary.submission_date.strip(), *names])
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:20]
+
+def people_rows(deal_id: str, snapshot: DealSnapshotForm) -> Iterator[Tuple]:
+    section = snapshot.applicant_section
+    submission_date = snapshot.application_summary.submission_date
+    for role, people in (("applicant", section.applicants), ("guarantor", section.guarantors)):
+        for position, person in enumerate(people):
+            yield (deal_id, role, position, person.name, name_key(person.name),
+                   person.customer_number or None, submission_date)
+
+def minhash_rows(deal_id: str, sig: Optional[np.ndarray]) -> Tuple[List[Tuple], List[Tuple]]:
+    # (deal_minhash rows, deal_bands rows); a deal with no names, DOBs,
+    # customer numbers or addresses has nothing to match on and gets none.
+    if sig is None:
+        return [], []
+    bands = [(band, key, deal_id) for band, key in enumerate(duplicates.band_keys(sig))]
+    return [(deal_id, duplicates.signature_bytes(sig))], bands
+
+class DealStore:
+    # One connection shared by all Streamlit sessions; the lock serializes access.
+    def __init__(self, path: str = DEFAULT_STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        if "change_seq" not in {row[1] for row in self._conn.execute("PRAGMA table_info(deals)")}:
+            self._conn.execute("ALTER TABLE deals ADD COLUMN change_seq INTEGER NOT NULL DEFAULT 0")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS deals_change_seq ON deals(change_seq)")
+        self._conn.execute(TEXT_SCHEMA)
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] < TEXT_INDEX_VERSION:
+            self.rebuild_text_index()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    # ---- writes ----
+    def upsert(self, snapshot: DealSnapshotForm, payload: Optional[bytes] = None) -> str:
+        # `payload` lets callers that already serialized the snapshot store those bytes as-is.
+        return self.upsert_many([(snapshot, payload)])[0]
+
+    def upsert_many(
+        self,
+        snapshots: Iterable[DealSnapshotForm | Tuple[DealSnapshotForm, Optional[bytes]]],
+        batch_size: int = 5000,
+    ) -> List[str]:
+        deal_ids: List[str] = []
+        deals: List[Tuple] = []
+        people: List[Tuple] = []
+        minhash: Tuple[List[Tuple], List[Tuple]] = ([], [])
+        for item in snapshots:
+            snapshot, payload = item if isinstance(item, tuple) else (item, None)
+            deal_id = deal_id_for(snapshot)
+            summary = snapshot.application_summary
+            deals.append((
+                deal_id, summary.lender_id, summary.submission_date, summary.broker_name or None,
+                payload if payload is not None else snapshot_to_bytes(snapshot, compact=True),
+            ))
+            people.extend(people_rows(deal_id, snapshot))
+            signatures, bands = minhash_rows(deal_id, duplicates.signature(duplicates.snapshot_tokens(snapshot)))
+            minhash[0].extend(signatures)
+            minhash[1].extend(bands)
+            deal_ids.append(deal_id)
+            if len(deals) >= batch_size:
+                self._write_batch(deals, people, minhash)
+                deals, people, minhash = [], [], ([], [])
+        if deals:
+            self._write_batch(deals, people, minhash)
+        return deal_ids
+
+    def _write_batch(self, deals: List[Tuple], people: List[Tuple],
+                     minhash: Tuple[List[Tuple], List[Tuple]] = ([], [])) -> None:
+        # deals: (deal_id, lender_id, submission_date, broker_name, payload).
+        # saved_at and the change sequence are stamped here, inside the write
+        # transaction (IMMEDIATE, so no other writer can interleave), so a
+        # batch never lands behind a watermark a reader has already taken.
+        with self._lock:
+            conn = self._conn
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute(NEXT_CHANGE_SEQ)
+                seq = conn.execute("SELECT value FROM store_meta WHERE key = 'change_seq'").fetchone()[0]
+                saved_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+                conn.executemany(UNINDEX_TEXT, ((d[0],) for d in deals))
+                conn.executemany(UPSERT_DEAL, ((*d, saved_at, seq) for d in deals))
+                conn.executemany(INDEX_TEXT + " WHERE d.deal_id = ?", ((d[0],) for d in deals))
+                conn.executemany("DELETE FROM deal_people WHERE deal_id = ?", ((d[0],) for d in deals))
+                conn.executemany("INSERT INTO deal_people VALUES (?, ?, ?, ?, ?, ?, ?)", people)
+                self._write_minhash(((d[0],) for d in deals), *minhash)
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def delete(self, deal_id: str) -> None:
+        with self._lock:
+            conn = self._conn
+            conn.execute("BEGIN")
+            try:
+                conn.execute("DELETE FROM deal_people WHERE deal_id = ?", (deal_id,))
+                self._write_minhash([(deal_id,)], [], [])
+                conn.execute(UNINDEX_TEXT, (deal_id,))
+                conn.execute("DELETE FROM deals WHERE deal_id = ?", (deal_id,))
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def _write_minhash(self, deal_ids: Iterable[Tuple[str]], signatures: List[Tuple], bands: List[Tuple]) -> None:
+        # Caller holds the lock inside a transaction.
+        deal_ids = list(deal_ids)
+        self._conn.executemany("DELETE FROM deal_minhash WHERE deal_id = ?", deal_ids)
+        self._conn.executemany("DELETE FROM deal_bands WHERE deal_id = ?", deal_ids)
+        self._conn.executemany("INSERT INTO deal_minhash VALUES (?, ?)", signatures)
+        self._conn.executemany("INSERT OR IGNORE INTO deal_bands VALUES (?, ?, ?)", bands)
+
+    def index_duplicates(self, batch_size: int = 5000) -> int:
+        # Signs deals saved before duplicate detection existed (straight from
+        # the stored JSON, no models). Returns how many were indexed.
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT deal_id, payload FROM deals WHERE deal_id NOT IN (SELECT deal_id FROM deal_minhash)"
+            ).fetchall()
+        for start in range(0, len(rows), batch_size):
+            signatures: List[Tuple] = []
+            bands: List[Tuple] = []
+            for deal_id, payload in rows[start:start + batch_size]:
+                try:
+                    sig = duplicates.signature(duplicates.payload_tokens(json.loads(payload)))
+                except ValueError:
+                    continue
+                more_signatures, more_bands = minhash_rows(deal_id, sig)
+                signatures.extend(more_signatures)
+                bands.extend(more_bands)
+            with self._lock:
+                self._conn.execute("BEGIN")
+                try:
+                    self._conn.executemany("INSERT OR IGNORE INTO deal_minhash VALUES (?, ?)", signatures)
+                    self._conn.executemany("INSERT OR IGNORE INTO deal_bands VALUES (?, ?, ?)", bands)
+                except BaseException:
+                    self._conn.execute("ROLLBACK")
+                    raise
+                self._conn.execute("COMMIT")
+        return len(rows)
+
+    def rebuild_text_index(self) -> None:
+        # Re-creates the narrative index from the stored JSON: runs once on
+        # stores saved before it existed, or after TEXT_INDEX_VERSION changes.
+        with self._lock:
+            conn = self._conn
+            conn.execute("BEGIN")
+            try:
+                conn.execute("DROP TABLE IF EXISTS deal_text")
+                conn.execute(TEXT_SCHEMA)
+                conn.execute(INDEX_TEXT)
+                conn.execute(f"PRAGMA user_version = {TEXT_INDEX_VERSION}")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    # ---- reads ----
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM deals").fetchone()[0]
+
+    def get_bytes(self, deal_id: str) -> Optional[bytes]:
+        with self._lock:
+            row = self._conn.execute("SELECT payload FROM deals WHERE deal_id = ?", (deal_id,)).fetchone()
+        return row[0] if row else None
+
+    def get(self, deal_id: str) -> Optional[DealSnapshotForm]:
+        raw = self.get_bytes(deal_id)
+        return DealSnapshotForm.model_validate_json(raw) if raw is not None else None
+
+    def metric_rows(self, since: Optional[int] = None) -> Tuple[List[Tuple], List[Tuple]]:
+        # (deal rows, loan rows) for dealsnap.portfolio; `since` is a change_seq
+        # watermark: only deals written after it.
+        where, params = ("", ()) if since is None else (" WHERE d.change_seq > ?", (since,))
+        with self._lock:
+            deals = self._conn.execute(METRIC_DEALS + where, params).fetchall()
+            loans = self._conn.execute(METRIC_LOANS + where, params).fetchall()
+        return deals, loans
+
+    def lmi_rows(self) -> List[Tuple[str, float, float]]:
+        with self._lock:
+            return self._conn.execute(LMI_DEALS).fetchall()
+
+    def change_seq(self) -> int:
+        # The latest committed write batch (0 for a store never written to).
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM store_meta WHERE key = 'change_seq'").fetchone()
+        return row[0] if row else 0
+
+    def find(
+        self,
+        lender_id: Optional[str] = None,
+        broker_name: Optional[str] = None,
+        applicant_name: Optional[str] = None,
+        customer_number: Optional[str] = None,
+        submitted_from: Optional[str] = None,
+        submitted_to: Optional[str] = None,
+        limit: int = 50,
+    ) -> List[DealRef]:
+        # Newest first. Each key filter is served by a (key, submission_date) index, so
+        # the date range and ordering come off the same index scan. Names match
+        # case- and whitespace-insensitively.
+        where: List[str] = []
+        params: List[object] = []
+        source = "deals d"
+        if applicant_name or customer_number:
+            source = "deal_people p JOIN deals d ON d.deal_id = p.deal_id"
+            where.append("p.role = 'applicant'")
+            if applicant_name:
+                where.append("p.name_key = ?")
+                params.append(name_key(applicant_name))
+            if customer_number:
+                where.append("p.customer_number = ?")
+                params.append(customer_number)
+            date_col = "p.submission_date"
+        else:
+            date_col = "d.submission_date"
+        if lender_id:
+            where.append("d.lender_id = ?")
+            params.append(lender_id)
+        if broker_name:
+            where.append("d.broker_name = ?")
+            params.append(broker_name)
+        if submitted_from:
+            where.append(f"{date_col} >= ?")
+            params.append(submitted_from)
+        if submitted_to:
+            where.append(f"{date_col} <= ?")
+            params.append(submitted_to)
+        sql = (
+            "SELECT DISTINCT d.deal_id, d.lender_id, d.submission_date, d.broker_name, d.saved_at,"
+            " (SELECT group_concat(name, ', ') FROM deal_people a"
+            "  WHERE a.deal_id = d.deal_id AND a.role = 'applicant')"
+            f" FROM {source}"
+            + (" WHERE " + " AND ".join(where) if where else "")
+            + f" ORDER BY {date_col} DESC LIMIT ?"
+        )
+        params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [DealRef(*row[:5], applicants=row[5] or "") for row in rows]
+
+    def duplicate_signatures(self) -> Iterator[Tuple[str, np.ndarray]]:
+        # (deal_id, signature) for every indexed deal, for batch clustering.
+        with self._lock:
+            rows = self._conn.execute("SELECT deal_id, signature FROM deal_minhash").fetchall()
+        for deal_id, raw in rows:
+            yield deal_id, duplicates.signature_from_bytes(raw)
+
+    def find_duplicates(
+        self,
+        snapshot: DealSnapshotForm,
+        threshold: float = duplicates.DEFAULT_THRESHOLD,
+        limit: int = 10,
+    ) -> List[DuplicateMatch]:
+        # Likely duplicates of `snapshot` among other stored deals, best first:
+        # deals sharing at least one LSH band, scored on their full signature.
+        sig = duplicates.signature(duplicates.snapshot_tokens(snapshot))
+        if sig is None:
+            return []
+        own_id = deal_id_for(snapshot)
+        probes = list(enumerate(duplicates.band_keys(sig)))
+        with self._lock:
+            # CROSS JOIN pins the join order: probes -> band index -> signatures.
+            candidates = self._conn.execute(
+                f"WITH probe(band, bucket) AS (VALUES {', '.join('(?, ?)' for _ in probes)})"
+                " SELECT DISTINCT m.deal_id, m.signature"
+                " FROM probe p CROSS JOIN deal_bands b CROSS JOIN deal_minhash m"
+                " WHERE b.band = p.band AND b.bucket = p.bucket AND m.deal_id = b.deal_id AND b.deal_id != ?",
+                [*(v for probe in probes for v in probe), own_id],
+            ).fetchall()
+        scores: Dict[str, float] = {}
+        for deal_id, raw in candidates:
+            score = duplicates.similarity(sig, duplicates.signature_from_bytes(raw))
+            if score >= threshold:
+                scores[deal_id] = score
+        best = sorted(scores, key=scores.get, reverse=True)[:limit]
+        if not best:
+            return []
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT d.deal_id, d.lender_id, d.submission_date, d.broker_name, d.saved_at,"
+                " (SELECT group_concat(name, ', ') FROM deal_people a"
+                "  WHERE a.deal_id = d.deal_id AND a.role = 'applicant'),"
+                " json_extract(CAST(d.payload AS TEXT), '$.application_summary.broker_or_MRU')"
+                f" FROM deals d WHERE d.deal_id IN ({', '.join('?' for _ in best)})",
+                best,
+            ).fetchall()
+        matches = [DuplicateMatch(DealRef(*row[:5], applicants=row[5] or ""), scores[row[0]], row[6]) for row in rows]
+        return sorted(matches, key=lambda m: m.score, reverse=True)
+
+    def json_values(self, paths: Sequence[str], page_size: int = 20000) -> Iterator[Tuple[str, List[Any]]]:
+        # (deal_id, [value at each dotted path]) for every deal, in rowid order,
+        # for dealsnap.policy columns. One multi-path json_extract parses each
+        # payload once; the leading schema_version keeps it in that (always a
+        # JSON array) form even for a single path. Pages are read under the
+        # lock one at a time, so the app isn't blocked for the whole scan.
+        sql = (
+            "SELECT rowid, deal_id, json_extract(CAST(payload AS TEXT), '$.schema_version'"
+            + "".join(", ?" for _ in paths)
+            + ") FROM deals WHERE rowid > ? ORDER BY rowid LIMIT ?"
+        )
+        json_paths = [f"$.{path}" for path in paths]
+        last = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(sql, (*json_paths, last, page_size)).fetchall()
+            for _, deal_id, values in rows:
+                yield deal_id, json.loads(values)[1:]
+            if len(rows) < page_size:
+                return
+            last = rows[-1][0]
+
+    def payloads(self, since: Optional[int] = None, page_size: int = 5000) -> Iterator[Tuple[str, int, str, bytes]]:
+        # (deal_id, change_seq, saved_at, payload) in change order, optionally
+        # only deals written after the change_seq watermark `since`. Write
+        # batches commit in sequence order, so the last change_seq seen is a
+        # safe watermark for the next call. Keyset pages like json_values.
+        sql = (
+            "SELECT rowid, deal_id, change_seq, saved_at, payload FROM deals"
+            " WHERE change_seq > ? AND (change_seq, rowid) > (?, ?)"
+            " ORDER BY change_seq, rowid LIMIT ?"
+        )
+        floor = -1 if since is None else since
+        last = (floor, 0)
+        while True:
+            with self._lock:
+                rows = self._conn.execute(sql, (floor, *last, page_size)).fetchall()
+            for _, deal_id, seq, saved_at, payload in rows:
+                yield deal_id, seq, saved_at, payload
+            if len(rows) < page_size:
+                return
+            last = (rows[-1][2], rows[-1][0])
+
+    def search_text(self, query: str, limit: int = 20) -> List[TextHit]:
+        # Narrative search, best match first (see dealsnap.fulltext for the
+        # syntax). Raises SearchQueryError for a malformed query.
+        expr = compile_query(query)
+        if expr is None:
+            return []
+        with self._lock:
+            scored = self._conn.execute(
+                "SELECT rowid, -bm25(deal_text) FROM deal_text WHERE deal_text MATCH ? ORDER BY rowid DESC LIMIT ?",
+                (expr, MAX_RANKED),
+            ).fetchall()
+            top = dict(sorted(scored, key=lambda row: row[1], reverse=True)[:limit])
+            if not top:
+                return []
+            rows = self._conn.execute(
+                "SELECT t.rowid, d.deal_id, d.lender_id, d.submission_date, d.saved_at,"
+                " snippet(deal_text, -1, '**', '**', '…', 16)"
+                " FROM deal_text t JOIN deals d ON d.rowid = t.rowid"
+                f" WHERE deal_text MATCH ? AND t.rowid IN ({', '.join('?' for _ in top)})",
+                (expr, *top),
+            ).fetchall()
+        hits = [TextHit(*row[1:5], score=top[row[0]], snippet=row[5]) for row in rows]
+        return sorted(hits, key=lambda hit: hit.score, reverse=True)
+
+    def search(self, text: str, limit: int = 20) -> List[DealRef]:
+        # Sidebar lookup: one free-text box matched against each indexed key.
+        text = text.strip()
+        if not text:
+            return []
+        seen = {}
+        for refs in (
+            self.find(lender_id=text, limit=limit),
+            self.find(customer_number=text, limit=limit),
+            self.find(broker_name=text, limit=limit),
+            self.find(applicant_name=text, limit=limit),
+        ):
+            for ref in refs:
+                seen.setdefault(ref.deal_id, ref)
+        return sorted(seen.values(), key=lambda r: r.submission_date, reverse=True)[:limit]
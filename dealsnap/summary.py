@@ -0,0 +1,46 @@
+# dealsnap/summary.py
+# ----------------------------- #
+# Submission summary maths (no UI)
+# ----------------------------- #
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+from dealsnap.frequency import annual_income
+from dealsnap.models import DealSnapshotForm
+from dealsnap.repayments import total_monthly_repayments
+
+@dataclass(frozen=True)
+class SubmissionSummary:
+    total_loans: int
+    total_amount: float
+    applicant_count: int
+    applicant_names: str
+    guarantor_count: int
+    total_annual_income: float
+    total_monthly_income: float
+    total_monthly_expenses: float
+    total_monthly_repayments: float
+    net_monthly_position: float
+    hgs_included: bool
+    lmi_included: bool
+
+def summarize_submission(payload: DealSnapshotForm) -> SubmissionSummary:
+    total_annual_income = annual_income(payload.income_section.incomes)
+    total_monthly_income = total_annual_income / 12 if total_annual_income else 0.0
+    total_monthly_expenses = sum((exp.monthly_amount or 0.0) for exp in payload.expense_section.households)
+    total_repayments = total_monthly_repayments(payload.loan_section.loans)
+    return SubmissionSummary(
+        total_loans=int(payload.loan_section.number_of_loans),
+        total_amount=sum((loan.loan_amount or 0.0) for loan in payload.loan_section.loans),
+        applicant_count=len(payload.applicant_section.applicants),
+        applicant_names=", ".join(a.name for a in payload.applicant_section.applicants if a.name) or "n/a",
+        guarantor_count=len(payload.applicant_section.guarantors),
+        total_annual_income=total_annual_income,
+        total_monthly_income=total_monthly_income,
+        total_monthly_expenses=total_monthly_expenses,
+        total_monthly_repayments=total_repayments,
+        net_monthly_position=total_monthly_income - total_monthly_expenses - total_repayments,
+        hgs_included=payload.hgs_block is not None,
+        lmi_included=payload.lmi_block is not None,
+    )
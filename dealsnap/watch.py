@@ -0,0 +1,350 @@
+# dealsnap/watch.py
+# ----------------------------- #
+# Watch-folder ingestion service
+# ----------------------------- #
+#
+#   python -m dealsnap.watch inbox/ -o processed/ [-j 8] [--interval 2] [--once]
+#
+# Polls `inbox` for *.json snapshots, validates new or changed files against
+# DealSnapshotForm (after migrating older schema versions) across a process
+# pool and writes, under the output folder:
+#
+#   normalized/<relative path>   canonical JSON of every valid snapshot
+#   results.ndjson               one line per processed file (ok / errors)
+#   ingest_index.sqlite3         (path, mtime, size, sha256) of every file seen
+#   stats.json                   backlog / throughput counters, rewritten each cycle
+#
+# A file is only read when its (mtime, size) differs from the index, and only
+# re-validated when its content hash differs too, so a restart skips
+# everything already processed. Files modified less than --settle seconds ago
+# are left for the next scan, in case the writer hasn't finished.
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import signal
+import sqlite3
+import sys
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterator, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+from pydantic import ValidationError
+
+from dealsnap.metrics import MetricsRecorder
+from dealsnap.migrations import MigrationError, StepError, validate_json
+from dealsnap.serialization import snapshot_to_bytes
+
+INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path         TEXT PRIMARY KEY,
+    mtime_ns     INTEGER NOT NULL,
+    size         INTEGER NOT NULL,
+    sha256       TEXT NOT NULL,
+    ok           INTEGER NOT NULL,
+    processed_at TEXT NOT NULL
+) WITHOUT ROWID;
+"""
+
+class FileState(NamedTuple):
+    mtime_ns: int
+    size: int
+    sha256: str
+
+# (relative path, mtime_ns, size, sha256 already indexed or "")
+Job = Tuple[str, int, int, str]
+
+class Outcome(NamedTuple):
+    path: str
+    mtime_ns: int
+    size: int
+    sha256: str
+    status: str             # "ok" | "failed" | "unchanged" | "missing"
+    result: Optional[str]   # results.ndjson line, if the file was validated
+
+# ===========================
+# Index
+# ===========================
+class IngestIndex:
+    def __init__(self, path: str):
+        self._conn = sqlite3.connect(path)
+        self._conn.executescript(INDEX_SCHEMA)
+        self.files: Dict[str, FileState] = {
+            path: FileState(mtime_ns, size, sha)
+            for path, mtime_ns, size, sha in self._conn.execute("SELECT path, mtime_ns, size, sha256 FROM files")
+        }
+
+    def changed(self, path: str, mtime_ns: int, size: int) -> bool:
+        known = self.files.get(path)
+        return known is None or known.mtime_ns != mtime_ns or known.size != size
+
+    def record(self, outcomes: Sequence[Outcome]) -> None:
+        now = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        rows = [(o.path, o.mtime_ns, o.size, o.sha256, int(o.status != "failed"), now)
+                for o in outcomes if o.status != "missing"]
+        with self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?)", rows)
+        for path, mtime_ns, size, sha, _, _ in rows:
+            self.files[path] = FileState(mtime_ns, size, sha)
+
+    def forget(self, paths: Sequence[str]) -> None:
+        with self._conn:
+            self._conn.executemany("DELETE FROM files WHERE path = ?", [(p,) for p in paths])
+        for path in paths:
+            self.files.pop(path, None)
+
+    def close(self) -> None:
+        self._conn.close()
+
+# ===========================
+# Worker side
+# ===========================
+def _write_atomic(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+def ingest_file(job: Job, inbox: str, out_dir: str) -> Outcome:
+    rel, mtime_ns, size, known_sha = job
+    try:
+        raw = Path(inbox, rel).read_bytes()
+    except OSError:
+        return Outcome(rel, mtime_ns, size, "", "missing", None)
+    sha = hashlib.sha256(raw).hexdigest()
+    if sha == known_sha:
+        return Outcome(rel, mtime_ns, size, sha, "unchanged", None)
+    result: Dict[str, Any] = {"source": rel, "sha256": sha}
+    try:
+        snapshot = validate_json(raw)
+    except ValidationError as ve:
+        result["ok"] = False
+        result["errors"] = ve.errors(include_url=False, include_context=False)
+    except StepError as e:
+        result["ok"] = False
+        result["errors"] = [{"type": "value_error", "loc": list(e.loc), "msg": str(e)}]
+    except MigrationError as e:
+        result["ok"] = False
+        result["errors"] = [{"type": "schema_version", "loc": [], "msg": str(e)}]
+    except UnicodeDecodeError as e:
+        result["ok"] = False
+        result["errors"] = [{"type": "encoding_error", "loc": [], "msg": f"not UTF-8 JSON: {e}"}]
+    except ValueError as e:
+        result["ok"] = False
+        result["errors"] = [{"type": "json_invalid", "loc": [], "msg": str(e)}]
+    else:
+        try:
+            _write_atomic(Path(out_dir, "normalized", rel), snapshot_to_bytes(snapshot))
+            result["ok"] = True
+        except OSError as e:
+            # e.g. a full disk: this file failed; the daemon keeps going.
+            result["ok"] = False
+            result["errors"] = [{"type": "io_error", "loc": [], "msg": f"could not write normalized file: {e}"}]
+    result["processed_at"] = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    status = "ok" if result["ok"] else "failed"
+    return Outcome(rel, mtime_ns, size, sha, status, json.dumps(result, ensure_ascii=False, default=str))
+
+def ingest_chunk(jobs: List[Job], inbox: str, out_dir: str) -> List[Outcome]:
+    return [ingest_file(job, inbox, out_dir) for job in jobs]
+
+# ===========================
+# Driver
+# ===========================
+def scan(inbox: str, skip: Optional[str] = None) -> Iterator[Tuple[str, os.stat_result]]:
+    # (path relative to inbox, stat) for every *.json below it; dot-files and
+    # dot-directories (e.g. a writer's temp files) are skipped, as is the
+    # directory `skip` (the output folder, when it sits inside the inbox).
+    skip = os.path.realpath(skip) if skip else None
+    stack = [inbox]
+    while stack:
+        try:
+            entries = list(os.scandir(stack.pop()))
+        except OSError:
+            continue
+        for entry in entries:
+            if entry.name.startswith("."):
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                if skip is None or os.path.realpath(entry.path) != skip:
+                    stack.append(entry.path)
+            elif entry.name.lower().endswith(".json"):
+                try:
+                    yield os.path.relpath(entry.path, inbox), entry.stat()
+                except OSError:
+                    continue
+
+class IngestStats:
+    def __init__(self, window_s: float = 60.0):
+        self.started = time.time()
+        self.window_s = window_s
+        self.counts = {"ok": 0, "failed": 0, "unchanged": 0, "missing": 0}
+        self.backlog = 0
+        self.in_flight = 0
+        self.indexed = 0
+        self.last_scan_ms = 0.0
+        self._recent: Deque[Tuple[float, int]] = deque()
+
+    def add(self, outcomes: Sequence[Outcome]) -> None:
+        for o in outcomes:
+            self.counts[o.status] += 1
+        validated = sum(o.status in ("ok", "failed") for o in outcomes)
+        self._recent.append((time.monotonic(), validated))
+
+    def per_minute(self) -> float:
+        now = time.monotonic()
+        while self._recent and now - self._recent[0][0] > self.window_s:
+            self._recent.popleft()
+        return sum(n for _, n in self._recent) * 60.0 / self.window_s
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "backlog": self.backlog, "in_flight": self.in_flight, "indexed": self.indexed,
+            "validated_per_min": round(self.per_minute(), 1), "last_scan_ms": round(self.last_scan_ms, 1),
+            "uptime_s": round(time.time() - self.started, 1), **self.counts,
+        }
+
+    def export(self, metrics: MetricsRecorder) -> None:
+        for key, value in self.as_dict().items():
+            if key in self.counts:
+                metrics.gauge("dealsnap_ingest_files_total", value, status=key)
+            else:
+                metrics.gauge(f"dealsnap_ingest_{key}", value)
+
+class Watcher:
+    def __init__(self, inbox: str, out_dir: str, workers: int = 0, chunksize: int = 64,
+                 interval_s: float = 2.0, settle_s: float = 1.0, metrics: Optional[MetricsRecorder] = None):
+        self.inbox = os.path.abspath(inbox)
+        self.out_dir = os.path.abspath(out_dir)
+        if os.path.realpath(self.out_dir) == os.path.realpath(self.inbox):
+            raise ValueError("the output folder can't be the inbox itself (a subfolder of it is fine)")
+        os.makedirs(self.out_dir, exist_ok=True)
+        self.workers = workers or os.cpu_count() or 1
+        self.chunksize = chunksize
+        self.interval_s = interval_s
+        self.settle_s = settle_s
+        self.metrics = metrics or MetricsRecorder(prom_path=None, ndjson_path=None)
+        self.index = IngestIndex(os.path.join(self.out_dir, "ingest_index.sqlite3"))
+        self.stats = IngestStats()
+        self.queue: Deque[Job] = deque()
+        self._queued: Set[str] = set()        # queued or in flight
+        self._stopping = False
+
+    def stop(self, *_: Any) -> None:
+        self._stopping = True
+
+    def rescan(self) -> None:
+        start = time.perf_counter()
+        cutoff_ns = time.time_ns() - int(self.settle_s * 1e9)
+        seen = set()
+        for rel, st in scan(self.inbox, skip=self.out_dir):
+            seen.add(rel)
+            if rel in self._queued or st.st_mtime_ns > cutoff_ns:
+                continue
+            if self.index.changed(rel, st.st_mtime_ns, st.st_size):
+                known = self.index.files.get(rel)
+                self.queue.append((rel, st.st_mtime_ns, st.st_size, known.sha256 if known else ""))
+                self._queued.add(rel)
+        gone = [path for path in self.index.files if path not in seen]
+        if gone:
+            self.index.forget(gone)
+        self.stats.last_scan_ms = (time.perf_counter() - start) * 1000
+        self.metrics.observe("ingest:scan", self.stats.last_scan_ms, files=len(seen))
+
+    def _collect(self, done: Set[Future], results) -> None:
+        outcomes = [o for future in done for o in future.result()]
+        lines = [o.result for o in outcomes if o.result]
+        if lines:
+            results.write("\n".join(lines) + "\n")
+            results.flush()
+        self.index.record(outcomes)
+        for o in outcomes:
+            self._queued.discard(o.path)
+        self.stats.add(outcomes)
+
+    def _publish(self) -> None:
+        self.stats.backlog = len(self.queue)
+        self.stats.indexed = len(self.index.files)
+        self.stats.export(self.metrics)
+        self.metrics.flush()
+        _write_atomic(Path(self.out_dir, "stats.json"), json.dumps(self.stats.as_dict(), indent=2).encode("utf-8"))
+
+    def run(self, once: bool = False) -> Dict[str, Any]:
+        # Scans every interval_s and keeps at most workers * 4 chunks in
+        # flight; with --once, returns when the first scan's backlog is done.
+        max_pending = self.workers * 4
+        pending: Set[Future] = set()
+        next_scan, scanned = 0.0, False
+        with ProcessPoolExecutor(max_workers=self.workers) as pool, \
+                open(os.path.join(self.out_dir, "results.ndjson"), "a", encoding="utf-8") as results:
+            while True:
+                if not self._stopping and not (once and scanned) and time.monotonic() >= next_scan:
+                    self.rescan()
+                    next_scan, scanned = time.monotonic() + self.interval_s, True
+                while self.queue and len(pending) < max_pending and not self._stopping:
+                    chunk = [self.queue.popleft() for _ in range(min(self.chunksize, len(self.queue)))]
+                    pending.add(pool.submit(ingest_chunk, chunk, self.inbox, self.out_dir))
+                self.stats.in_flight = len(pending)
+                if pending:
+                    timeout = max(0.05, next_scan - time.monotonic()) if not once else None
+                    done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                    self._collect(done, results)
+                elif once or self._stopping:
+                    break
+                else:
+                    time.sleep(max(0.0, next_scan - time.monotonic()))
+                self._publish()
+                if self._stopping and not pending:
+                    break
+        self.stats.in_flight = 0
+        self._publish()
+        self.metrics.flush(force=True)
+        self.index.close()
+        return self.stats.as_dict()
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m dealsnap.watch",
+        description="Watch a folder and validate + normalize new or changed deal snapshots.",
+    )
+    parser.add_argument("inbox", help="Folder to watch (searched recursively for *.json)")
+    parser.add_argument("-o", "--output", required=True, help="Folder for normalized files, results and the index")
+    parser.add_argument("-j", "--workers", type=int, default=0, help="Worker processes (default: CPU count)")
+    parser.add_argument("--chunksize", type=int, default=64, help="Files per worker task (default: 64)")
+    parser.add_argument("--interval", type=float, default=2.0, help="Seconds between scans (default: 2)")
+    parser.add_argument("--settle", type=float, default=1.0,
+                        help="Skip files modified less than this many seconds ago (default: 1)")
+    parser.add_argument("--once", action="store_true", help="Process the current backlog and exit")
+    parser.add_argument("--metrics-prom", help="Also write counters as Prometheus text to this file")
+    return parser
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.workers < 0 or args.chunksize < 1 or args.interval <= 0:
+        print("--workers must be >= 0, --chunksize >= 1 and --interval > 0", file=sys.stderr)
+        return 2
+    if not os.path.isdir(args.inbox):
+        print(f"not a directory: {args.inbox}", file=sys.stderr)
+        return 2
+
+    try:
+        watcher = Watcher(
+            args.inbox, args.output, workers=args.workers, chunksize=args.chunksize, interval_s=args.interval,
+            settle_s=args.settle, metrics=MetricsRecorder(prom_path=args.metrics_prom, ndjson_path=None, prom_interval_s=0),
+        )
+    except ValueError as e:
+        print(str(e), file=sys.stderr)
+        return 2
+    # Finish the chunks already handed to workers, then exit.
+    signal.signal(signal.SIGTERM, watcher.stop)
+    signal.signal(signal.SIGINT, watcher.stop)
+    stats = watcher.run(once=args.once)
+    print(json.dumps(stats), file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
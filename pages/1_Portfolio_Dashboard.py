@@ -0,0 +1,127 @@
+# pages/1_Portfolio_Dashboard.py
+# ----------------------------- #
+# Portfolio dashboard (saved deals, grouped)
+# ----------------------------- #
+from __future__ import annotations
+
+import threading
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import streamlit as st
+
+from dealsnap.helpers import format_currency
+from dealsnap.portfolio import Portfolio, load_portfolio
+from dealsnap.store import DealStore
+
+GROUPINGS = {
+    "Lender ID": "lender_id",
+    "Broker": "broker_name",
+    "Loan product": "loan_product",
+    "Submission month": "month",
+}
+
+class LivePortfolio:
+    # One portfolio per server. Each rerun only pulls deals saved since the last
+    # top-up; a resubmitted deal replaces its earlier figures.
+    def __init__(self, store: DealStore):
+        self.store = store
+        self.portfolio = Portfolio()
+        self.watermark: Optional[int] = None     # store change_seq loaded up to
+        self.lock = threading.Lock()
+        self._sensitivity: Tuple[Optional[int], Dict[str, np.ndarray]] = (None, {})
+
+    def refresh(self) -> Portfolio:
+        with self.lock:
+            # Read the sequence first: a batch committed meanwhile is loaded now
+            # and again next time, which just replaces its figures.
+            latest = self.store.change_seq()
+            if latest != self.watermark:
+                load_portfolio(self.store, since=self.watermark, portfolio=self.portfolio)
+                self.watermark = latest
+            return self.portfolio
+
+    def sensitivity(self) -> Dict[str, np.ndarray]:
+        # The grid reprices every loan, so it is only recomputed when deals arrive.
+        with self.lock:
+            watermark, grid = self._sensitivity
+            if watermark != self.watermark or not grid:
+                grid = self.portfolio.sensitivity()
+                self._sensitivity = (self.watermark, grid)
+            return grid
+
+    def rebuild(self) -> None:
+        # Drops the figures; the next refresh reloads every deal. The store
+        # connection is shared with sessions mid-run, so it stays open.
+        with self.lock:
+            self.portfolio = Portfolio()
+            self.watermark = None
+            self._sensitivity = (None, {})
+
+@st.cache_resource(show_spinner=False)
+def live_portfolio() -> LivePortfolio:
+    return LivePortfolio(DealStore())
+
+st.set_page_config(page_title="Portfolio Dashboard", layout="wide")
+st.title("Portfolio Dashboard")
+
+live = live_portfolio()
+with st.sidebar:
+    if st.button("Rebuild from store", help="Drop the in-memory portfolio and reload every saved deal."):
+        live.rebuild()
+portfolio = live.refresh()
+
+totals = portfolio.totals()
+if not totals["deals"]:
+    st.info("No saved deals yet. Submitted snapshots appear here.")
+    st.stop()
+
+c1, c2, c3, c4, c5, c6 = st.columns(6)
+c1.metric("Deals", f"{totals['deals']:,}")
+c2.metric("Total loan amount", format_currency(totals["total_loan_amount"]))
+c3.metric("Monthly income", format_currency(totals["monthly_income"]))
+c4.metric("Monthly expenses", format_currency(totals["monthly_expenses"]))
+c5.metric("Monthly repayments", format_currency(totals["monthly_repayments"]))
+c6.metric("Net monthly position", format_currency(totals["net_monthly_position"]))
+st.divider()
+
+grouping = st.radio("Group by", list(GROUPINGS), horizontal=True)
+key = GROUPINGS[grouping]
+table = portfolio.group_by(key)
+if key == "month":
+    order = table[key].argsort()
+    table = {column: values[order] for column, values in table.items()}
+
+st.bar_chart(table, x=key, y="total_loan_amount", x_label=grouping, y_label="Total loan amount")
+st.dataframe(
+    table,
+    hide_index=True,
+    width="stretch",
+    column_config={
+        key: st.column_config.TextColumn(grouping),
+        "deals": st.column_config.NumberColumn("Deals", format="%d"),
+        "loans": st.column_config.NumberColumn("Loans", format="%d"),
+        "total_loan_amount": st.column_config.NumberColumn("Total loan amount", format="dollar"),
+        "annual_income": st.column_config.NumberColumn("Annual income", format="dollar"),
+        "monthly_income": st.column_config.NumberColumn("Monthly income", format="dollar"),
+        "monthly_expenses": st.column_config.NumberColumn("Monthly expenses", format="dollar"),
+        "monthly_repayments": st.column_config.NumberColumn("Monthly repayments", format="dollar"),
+        "net_monthly_position": st.column_config.NumberColumn("Net monthly position", format="dollar"),
+    },
+)
+
+st.divider()
+st.markdown("### Serviceability Sensitivity")
+st.caption(
+    "Every loan repriced at its rate plus a buffer over each term (interest-only loans keep paying interest only). "
+    "Cells show the share of deals whose net monthly position stays at or above zero."
+)
+grid = live.sensitivity()
+sensitivity_table = {"Rate buffer": [f"+{b:.2f}%" for b in grid["buffers"]]}
+for j, term in enumerate(grid["terms"]):
+    sensitivity_table[f"{term} years"] = grid["serviceable_share"][:, j] * 100
+st.dataframe(
+    sensitivity_table,
+    hide_index=True,
+    column_config={f"{t} years": st.column_config.NumberColumn(format="%.1f%%") for t in grid["terms"]},
+)